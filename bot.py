@@ -11,9 +11,14 @@ from bot_utils import load_user_medications, save_user_medications, load_care_co
 from report import report
 from family import family, family_callback, family_text_handler
 from medications import medications, medications_callback, text_router, medication_add_update_flow
-from remind import remind, remind_callback
+from remind import remind, remind_callback, med_outcome_callback
 from fall import fall, fall_callback, fall_media_handler
 from misc import schedule, emergency_location, location_history, emergency_location_handler
+from risk import risk
+from inference_service import load_inference_service
+from batch_scoring import RiskTableReader
+from online_adherence import load_online_learner
+from bot_events import timed
 
 logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -37,7 +42,8 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "/family - Manage family contacts\n"
         "/report - Generate medication report\n"
         "/emergency_location - Request immediate location sharing\n"
-        "/location_history - View your recent locations\n\n"
+        "/location_history - View your recent locations\n"
+        "/risk - View your fall and medication risk insights\n\n"
         "📍 Location Features:\n"
         "• Share your location anytime using Telegram's location button\n"
         "• Family gets notified with map links and coordinates\n"
@@ -61,28 +67,38 @@ def main():
 
     app = ApplicationBuilder().token(TOKEN).build()
 
-    app.add_handler(CommandHandler("start", start))
-    app.add_handler(CommandHandler("help", help_command))
-    app.add_handler(CommandHandler("medications", medications))
-    app.add_handler(CommandHandler("family", family))
-    app.add_handler(CommandHandler("care", care))
-    app.add_handler(CommandHandler("remind", remind))
-    app.add_handler(CommandHandler("report", report))
-    app.add_handler(CommandHandler("fall", fall))
-    app.add_handler(CommandHandler("schedule", schedule))
-    app.add_handler(CommandHandler("emergency_location", emergency_location))
-    app.add_handler(CommandHandler("location_history", location_history))
+    # Load ML models and user features once; handlers reuse the warm copies
+    app.bot_data['inference'] = load_inference_service()
+    # Nightly precomputed scores (batch_scoring.py), preferred over live inference
+    app.bot_data['risk_table'] = RiskTableReader()
+    # Taken / Missed answers to reminders keep the adherence model current
+    app.bot_data['online_adherence'] = load_online_learner(app.bot_data['inference'])
+
+    # Every handler call is timed into the bot event log (bot_events.py) for the analytics dashboard
+    app.add_handler(CommandHandler("start", timed(start)))
+    app.add_handler(CommandHandler("help", timed(help_command)))
+    app.add_handler(CommandHandler("medications", timed(medications)))
+    app.add_handler(CommandHandler("family", timed(family)))
+    app.add_handler(CommandHandler("care", timed(care)))
+    app.add_handler(CommandHandler("remind", timed(remind)))
+    app.add_handler(CommandHandler("report", timed(report)))
+    app.add_handler(CommandHandler("fall", timed(fall)))
+    app.add_handler(CommandHandler("schedule", timed(schedule)))
+    app.add_handler(CommandHandler("emergency_location", timed(emergency_location)))
+    app.add_handler(CommandHandler("location_history", timed(location_history)))
+    app.add_handler(CommandHandler("risk", timed(risk)))
 
     # Specific handlers first
-    app.add_handler(CallbackQueryHandler(fall_callback, pattern="^(fall_confirm_yes|fall_confirm_no|fall_send_media_yes|fall_send_media_no)$"))
-    app.add_handler(CallbackQueryHandler(remind_callback, pattern="^remind_(yes|no)_"))
-    app.add_handler(CallbackQueryHandler(family_callback, pattern="^(add_family_member|delete_family_.*)$"))
-    app.add_handler(CallbackQueryHandler(medications_callback, pattern="^(add_med|update_med_|delete_med_)"))
-
-    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, family_text_handler))
-    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, text_router))
-    app.add_handler(MessageHandler(filters.PHOTO | filters.VOICE, fall_media_handler))
-    app.add_handler(MessageHandler(filters.LOCATION, emergency_location_handler))
+    app.add_handler(CallbackQueryHandler(timed(fall_callback), pattern="^(fall_confirm_yes|fall_confirm_no|fall_send_media_yes|fall_send_media_no)$"))
+    app.add_handler(CallbackQueryHandler(timed(remind_callback), pattern="^remind_(yes|no)_"))
+    app.add_handler(CallbackQueryHandler(timed(med_outcome_callback), pattern="^med_(taken|missed)_"))
+    app.add_handler(CallbackQueryHandler(timed(family_callback), pattern="^(add_family_member|delete_family_.*)$"))
+    app.add_handler(CallbackQueryHandler(timed(medications_callback), pattern="^(add_med|update_med_|delete_med_)"))
+
+    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, timed(family_text_handler)))
+    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, timed(text_router)))
+    app.add_handler(MessageHandler(filters.PHOTO | filters.VOICE, timed(fall_media_handler)))
+    app.add_handler(MessageHandler(filters.LOCATION, timed(emergency_location_handler)))
     
 
     print("Bot is running...")
@@ -0,0 +1,358 @@
+"""
+bot_events.py
+
+Structured event log of the Senior Care Bot, and the rollups the bot analytics dashboard reads.
+The bot emits one compact JSON line per event - /remind menus shown, Taken / Missed confirmations,
+fall alerts, location shares, and the latency of every handler call - to an append-only log
+partitioned by day:
+    data/singapore/events/date=2024-06-01/events.jsonl
+Each line is written with a single O_APPEND write, so several bot processes can share a day's
+file without interleaving, and a crash loses at most the line being written.
+
+refresh_event_rollups() summarizes the log into two small tables under data/singapore/rollups/bot_events:
+  daily     per date: active users, event counts, adherence and handler latency / errors
+  handlers  per date and handler: calls, errors, mean and p95 latency
+Past days never change, so a refresh reads only the days after the watermark (the last finished
+day) plus today's partition, which is still being written. Every dashboard session refreshes on
+load, so a refresh holds the rollup directory's lock (rollups.rollup_lock) and writes the
+manifest last; loading takes the same lock and always sees matching tables.
+
+    python bot_events.py [--rebuild]          # bring the rollups up to date
+    python bot_events.py --simulate 90        # demo traffic for days that have no events yet
+"""
+
+import functools
+import json
+import logging
+import os
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from rollups import ROLLUP_DIR, atomic_write, rollup_lock
+
+logger = logging.getLogger(__name__)
+
+EVENT_LOG_DIR = 'data/singapore/events'
+EVENT_ROLLUP_DIR = os.path.join(ROLLUP_DIR, 'bot_events')
+
+# Event types and their fields besides ts (unix seconds), ev (type) and user (Telegram id)
+EVENT_TYPES = {
+    'reminder_menu_shown': ['med'],  # a medication's /remind entry with its Taken / Missed buttons
+    'medication_taken': ['med'],
+    'medication_missed': ['med'],
+    'fall_alert': ['notified'],       # contacts the alert reached
+    'location_share': ['notified'],
+    'handler': ['name', 'ms', 'ok'],  # handler call latency, ok=0 if it raised
+}
+EVENT_SCHEMA = pa.schema([
+    ('ts', pa.float64()), ('ev', pa.string()), ('user', pa.string()), ('med', pa.string()),
+    ('notified', pa.int32()), ('name', pa.string()), ('ms', pa.float64()), ('ok', pa.int8()),
+])
+
+# daily table column -> event type counted
+_DAILY_COUNTS = {
+    'reminder_menus_shown': 'reminder_menu_shown',
+    'medications_taken': 'medication_taken',
+    'medications_missed': 'medication_missed',
+    'fall_alerts': 'fall_alert',
+    'location_shares': 'location_share',
+}
+
+
+def _partition_path(log_dir, day):
+    return os.path.join(log_dir, f"date={day}", 'events.jsonl')
+
+
+class EventLog:
+    """Appends events to the day's partition of the log; the file is reopened when the day changes"""
+
+    def __init__(self, log_dir=EVENT_LOG_DIR):
+        self.log_dir = log_dir
+        self._day = None
+        self._fd = None
+
+    def emit(self, event, user_id=None, **fields):
+        """Record an event now; failures are logged, never raised into the handler that emitted it"""
+        now = time.time()
+        record = {'ts': round(now, 3), 'ev': event}
+        if user_id is not None:
+            record['user'] = str(user_id)
+        record.update(fields)
+        line = (json.dumps(record, separators=(',', ':')) + '\n').encode('utf-8')
+        try:
+            os.write(self._partition(now), line)
+        except OSError as e:
+            logger.warning(f"Could not log {event} event: {e}")
+
+    def _partition(self, now):
+        day = time.strftime('%Y-%m-%d', time.localtime(now))
+        if day != self._day:
+            self.close()
+            path = _partition_path(self.log_dir, day)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._day = day
+        return self._fd
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = self._day = None
+
+
+_event_log = None
+
+
+def log_event(event, user_id=None, **fields):
+    """Record an event in the bot's event log (see EVENT_TYPES for the fields of each type)"""
+    global _event_log
+    if _event_log is None:
+        _event_log = EventLog()
+    _event_log.emit(event, user_id, **fields)
+
+
+def timed(callback, name=None):
+    """Wrap a Telegram handler so every call logs a handler event with its latency and outcome"""
+    name = name or callback.__name__
+
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        started = time.perf_counter()
+        ok = 0
+        try:
+            result = await callback(update, context)
+            ok = 1
+            return result
+        finally:
+            user = getattr(getattr(update, 'effective_user', None), 'id', None)
+            log_event('handler', user, name=name, ms=round((time.perf_counter() - started) * 1000, 1), ok=ok)
+    return wrapper
+
+
+def log_partitions(log_dir=EVENT_LOG_DIR):
+    """(date, path) of every day in the log, oldest first"""
+    if not os.path.isdir(log_dir):
+        return []
+    days = sorted(entry[len('date='):] for entry in os.listdir(log_dir) if entry.startswith('date='))
+    return [(day, _partition_path(log_dir, day)) for day in days if os.path.exists(_partition_path(log_dir, day))]
+
+
+def log_fingerprint(log_dir=EVENT_LOG_DIR):
+    """Changes whenever an event is logged: number of days, and size and mtime of the latest day"""
+    partitions = log_partitions(log_dir)
+    if not partitions:
+        return (0,)
+    day, path = partitions[-1]
+    stat = os.stat(path)
+    return len(partitions), day, stat.st_size, stat.st_mtime_ns
+
+
+def read_events(path):
+    """One day's events as a DataFrame with the EVENT_SCHEMA columns; a line cut short by a crash is skipped"""
+    from pyarrow import json as pa_json
+    options = pa_json.ParseOptions(explicit_schema=EVENT_SCHEMA, unexpected_field_behavior='ignore')
+    try:
+        return pa_json.read_json(path, parse_options=options).to_pandas()
+    except pa.ArrowInvalid:
+        pass
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return pa.Table.from_pylist(records, schema=EVENT_SCHEMA).to_pandas()
+
+
+def summarize_day(day, events):
+    """The daily row (dict) and the per-handler rows (DataFrame) of one day's events"""
+    counts = events['ev'].value_counts()
+    handler = events[events['ev'] == 'handler']
+    alerts = events['ev'].isin(['fall_alert', 'location_share'])
+    ms = handler['ms'].astype(float)
+    row = {'date': pd.Timestamp(day), 'active_users': int(events['user'].dropna().nunique())}
+    row.update({column: int(counts.get(event, 0)) for column, event in _DAILY_COUNTS.items()})
+    row.update({
+        'contacts_notified': int(events.loc[alerts, 'notified'].fillna(0).sum()),
+        'handler_calls': len(handler),
+        'handler_errors': int((handler['ok'] == 0).sum()),
+        'latency_mean_ms': float(ms.mean()) if len(handler) else np.nan,
+        'latency_p95_ms': float(ms.quantile(0.95)) if len(handler) else np.nan,
+    })
+    per_handler = handler.assign(ms=ms, error=(handler['ok'] == 0).astype(int)).groupby('name').agg(
+        calls=('ms', 'size'), errors=('error', 'sum'),
+        latency_mean_ms=('ms', 'mean'), latency_p95_ms=('ms', lambda values: values.quantile(0.95)),
+    ).reset_index().rename(columns={'name': 'handler'})
+    per_handler.insert(0, 'date', pd.Timestamp(day))
+    return row, per_handler
+
+
+def _empty_tables():
+    daily = pd.DataFrame(columns=['date', 'active_users'] + list(_DAILY_COUNTS) + [
+        'contacts_notified', 'handler_calls', 'handler_errors', 'latency_mean_ms', 'latency_p95_ms'])
+    handlers = pd.DataFrame(columns=['date', 'handler', 'calls', 'errors', 'latency_mean_ms', 'latency_p95_ms'])
+    return daily, handlers
+
+
+def load_event_rollups(rollup_dir=EVENT_ROLLUP_DIR):
+    """(daily, handlers, manifest) as last saved, or None if the rollups have not been built"""
+    path = os.path.join(rollup_dir, '_rollups.json')
+    if not os.path.exists(path):
+        return None
+    with rollup_lock(rollup_dir):
+        with open(path, 'r') as f:
+            manifest = json.load(f)
+        daily = pd.read_parquet(os.path.join(rollup_dir, 'daily.parquet'))
+        handlers = pd.read_parquet(os.path.join(rollup_dir, 'handlers.parquet'))
+    return daily, handlers, manifest
+
+
+def _save_event_rollups(daily, handlers, manifest, rollup_dir):
+    """Write both tables, then the manifest that marks them complete"""
+    atomic_write(os.path.join(rollup_dir, 'daily.parquet'), lambda tmp_path: daily.to_parquet(tmp_path, index=False))
+    atomic_write(os.path.join(rollup_dir, 'handlers.parquet'),
+                 lambda tmp_path: handlers.to_parquet(tmp_path, index=False))
+
+    def dump(tmp_path):
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=1)
+    atomic_write(os.path.join(rollup_dir, '_rollups.json'), dump)
+
+
+def refresh_event_rollups(rebuild=False, log_dir=EVENT_LOG_DIR, rollup_dir=EVENT_ROLLUP_DIR):
+    """
+    Bring the daily and handler rollups up to date with the log and save them; returns
+    (daily, handlers). Days up to the watermark are kept as saved; later days are (re)summarized.
+    """
+    # Held from loading the saved rollups to writing the new manifest, so sessions refresh one at a time
+    with rollup_lock(rollup_dir):
+        return _refresh_event_rollups(rebuild, log_dir, rollup_dir)
+
+
+def _refresh_event_rollups(rebuild, log_dir, rollup_dir):
+    saved = None if rebuild else load_event_rollups(rollup_dir)
+    if saved is None:
+        (daily, handlers), watermark = _empty_tables(), None
+    else:
+        daily, handlers, manifest = saved
+        watermark = manifest['watermark']
+    today = time.strftime('%Y-%m-%d')
+    pending = [(day, path) for day, path in log_partitions(log_dir) if watermark is None or day > watermark]
+    if saved is not None and not pending:
+        return daily, handlers
+
+    # Saved rows of the days read again (today's, summarized while it was being written) are
+    # replaced, including when no day has finished yet and there is no watermark
+    redo = pd.to_datetime([day for day, _ in pending])
+    daily = daily[~pd.to_datetime(daily['date']).isin(redo)]
+    handlers = handlers[~pd.to_datetime(handlers['date']).isin(redo)]
+    rows, per_handler = [], [handlers] if len(handlers) else []
+    for day, path in pending:
+        events = read_events(path)
+        if not len(events):
+            continue
+        row, day_handlers = summarize_day(day, events)
+        rows.append(row)
+        per_handler.append(day_handlers)
+        if day < today:
+            watermark = day
+    if rows:
+        new_rows = pd.DataFrame(rows, columns=daily.columns)
+        daily = new_rows if not len(daily) else pd.concat([daily, new_rows], ignore_index=True)
+    if per_handler:
+        handlers = pd.concat(per_handler, ignore_index=True)
+
+    manifest = {
+        'watermark': watermark,
+        'days': int(len(daily)),
+        'updated': pd.Timestamp.now().replace(microsecond=0).isoformat(),
+    }
+    _save_event_rollups(daily, handlers, manifest, rollup_dir)
+    return daily, handlers
+
+
+def bot_activity(start=None, end=None, log_dir=EVENT_LOG_DIR, rollup_dir=EVENT_ROLLUP_DIR):
+    """Daily and per-handler bot metrics between start and end (inclusive), refreshed from the log first"""
+    daily, handlers = refresh_event_rollups(log_dir=log_dir, rollup_dir=rollup_dir)
+    if start is not None:
+        daily = daily[daily['date'] >= pd.Timestamp(start)]
+        handlers = handlers[handlers['date'] >= pd.Timestamp(start)]
+    if end is not None:
+        daily = daily[daily['date'] <= pd.Timestamp(end)]
+        handlers = handlers[handlers['date'] <= pd.Timestamp(end)]
+    return daily.reset_index(drop=True), handlers.reset_index(drop=True)
+
+
+# Commands of the simulated traffic and their share of handler calls
+_SIMULATED_HANDLERS = {
+    'remind': 0.25, 'med_outcome_callback': 0.3, 'medications': 0.1, 'schedule': 0.1, 'risk': 0.08,
+    'family': 0.05, 'report': 0.05, 'location_history': 0.03, 'fall_callback': 0.02,
+    'emergency_location_handler': 0.02,
+}
+
+
+def simulate_events(days=90, users=300, seed=42, log_dir=EVENT_LOG_DIR):
+    """
+    Write demo traffic in the log's format for the last `days` finished days that have no
+    partition yet (real traffic is never overwritten); returns the number of events written
+    """
+    rng = np.random.default_rng(seed)
+    user_ids = rng.integers(10**8, 10**10, users).astype(str)
+    names = np.array(list(_SIMULATED_HANDLERS))
+    shares = np.array(list(_SIMULATED_HANDLERS.values()))
+    written = 0
+    for day in pd.date_range(end=pd.Timestamp.now().normalize() - pd.Timedelta(days=1), periods=days):
+        path = _partition_path(log_dir, f"{day:%Y-%m-%d}")
+        if os.path.exists(path):
+            continue
+        day_rng = np.random.default_rng([seed, day.toordinal()])
+        active = user_ids[day_rng.random(users) < (0.55 if day.weekday() >= 5 else 0.7)]
+        reminded = np.repeat(active, day_rng.integers(1, 5, len(active)))
+        answered = reminded[day_rng.random(len(reminded)) < 0.85]
+        taken = day_rng.random(len(answered)) < 0.82
+        alerts = day_rng.poisson([1.5, 2.5])
+        calls = np.repeat(active, day_rng.poisson(4, len(active)))
+
+        records = [('reminder_menu_shown', user, {'med': 'sim'}) for user in reminded]
+        records += [('medication_taken' if ok else 'medication_missed', user, {'med': 'sim'})
+                    for user, ok in zip(answered, taken)]
+        records += [('fall_alert', user, {'notified': int(n)})
+                    for user, n in zip(day_rng.choice(active, alerts[0]), day_rng.integers(1, 4, alerts[0]))]
+        records += [('location_share', user, {'notified': int(n)})
+                    for user, n in zip(day_rng.choice(active, alerts[1]), day_rng.integers(1, 4, alerts[1]))]
+        latencies = day_rng.lognormal(np.log(120), 0.6, len(calls))
+        records += [('handler', user, {'name': name, 'ms': round(float(ms), 1), 'ok': int(ok)})
+                    for user, name, ms, ok in zip(calls, day_rng.choice(names, len(calls), p=shares / shares.sum()),
+                                                  latencies, day_rng.random(len(calls)) > 0.005)]
+        stamps = np.sort(time.mktime(day.timetuple()) + day_rng.uniform(7 * 3600, 22 * 3600, len(records)))
+        order = day_rng.permutation(len(records))
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            for ts, i in zip(stamps, order):
+                event, user, fields = records[i]
+                f.write(json.dumps({'ts': round(float(ts), 3), 'ev': event, 'user': user, **fields},
+                                   separators=(',', ':')) + '\n')
+        written += len(records)
+    return written
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Summarize the bot event log into the dashboard rollups")
+    parser.add_argument('--rebuild', action='store_true', help="Summarize every day again, ignoring the watermark")
+    parser.add_argument('--simulate', type=int, metavar='DAYS', help="First write demo traffic for the last DAYS days")
+    parser.add_argument('--users', type=int, default=300, help="Simulated users")
+    parser.add_argument('--log-dir', default=EVENT_LOG_DIR)
+    parser.add_argument('--rollup-dir', default=EVENT_ROLLUP_DIR)
+    args = parser.parse_args()
+
+    if args.simulate:
+        written = simulate_events(args.simulate, args.users, log_dir=args.log_dir)
+        print(f"🤖 Simulated {written:,} events -> {args.log_dir}")
+    started = time.perf_counter()
+    daily, handlers = refresh_event_rollups(args.rebuild, args.log_dir, args.rollup_dir)
+    print(f"✅ {len(daily)} days, {int(daily['handler_calls'].sum()):,} handler calls "
+          f"summarized in {time.perf_counter() - started:.2f}s -> {args.rollup_dir}")
@@ -7,6 +7,8 @@ CARE_CONTACTS_FILE = Config.CARE_CONTACTS_FILE
 MEDICATIONS_FILE = Config.MEDICATIONS_FILE
 FAMILY_CONTACTS_FILE = Config.FAMILY_CONTACTS_FILE
 USER_ACTIVITY_FILE = Config.USER_ACTIVITY_FILE
+MEDICATION_LOG_FILE = Config.MEDICATION_LOG_FILE
+USER_PROFILES_FILE = Config.USER_PROFILES_FILE
 
 # Utility functions
 
@@ -49,6 +51,47 @@ def save_family_contacts(contacts):
     with portalocker.Lock(FAMILY_CONTACTS_FILE, 'w', timeout=5) as f:
         json.dump(contacts, f, indent=2)
 
+def log_medication_outcome(user_id, med_key, med_name, taken):
+    """Append a taken/missed reminder outcome to the medication log (one JSON object per line)."""
+    import datetime
+    entry = {
+        'timestamp': datetime.datetime.now().isoformat(),
+        'user_id': user_id,
+        'med_key': med_key,
+        'medication': med_name,
+        'taken': bool(taken),
+    }
+    with portalocker.Lock(MEDICATION_LOG_FILE, 'a', timeout=5) as f:
+        f.write(json.dumps(entry) + '\n')
+
+def load_medication_log():
+    """Load all logged reminder outcomes, oldest first."""
+    try:
+        with portalocker.Lock(MEDICATION_LOG_FILE, 'r', timeout=5) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+def load_user_profiles():
+    """Load the Telegram id -> health profile links from JSON with file-locking."""
+    try:
+        with portalocker.Lock(USER_PROFILES_FILE, 'r', timeout=5) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def save_user_profiles(profiles):
+    """Save the Telegram id -> health profile links to JSON with file-locking."""
+    with portalocker.Lock(USER_PROFILES_FILE, 'w', timeout=5) as f:
+        json.dump(profiles, f, indent=2)
+
+def resolve_profile_id(telegram_id, profiles=None):
+    """Health profile id (user_id in the bot data and feature store, e.g. user_001) of a Telegram user.
+    Users without a link keep their Telegram id, which matches profiles keyed by it."""
+    if profiles is None:
+        profiles = load_user_profiles()
+    return profiles.get(str(telegram_id), str(telegram_id))
+
 def load_user_activity():
     """Load user activity from JSON with file-locking."""
     try:
@@ -13,5 +13,7 @@ class Config:
     USER_ACTIVITY_FILE = os.getenv("USER_ACTIVITY_FILE", "user_activity.json")
     USER_LOCATIONS_FILE = os.getenv("USER_LOCATIONS_FILE", "user_locations.json")
     MEDICATION_LOG_FILE = os.getenv("MEDICATION_LOG_FILE", "medication_log.txt")
+    USER_PROFILES_FILE = os.getenv("USER_PROFILES_FILE", "user_profiles.json")  # Telegram id -> health profile user_id
     MISSED_MEDICATION_WINDOW = int(os.getenv("MISSED_MEDICATION_WINDOW", "30"))
     DAILY_CHECKIN_HOURS = int(os.getenv("DAILY_CHECKIN_HOURS", "24"))
+    RISK_MODEL_TIER = os.getenv("RISK_MODEL_TIER", "accurate")  # 'fast' scores /risk with the distilled models
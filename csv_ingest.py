@@ -0,0 +1,221 @@
+"""
+csv_ingest.py
+
+Typed, chunked reading of the Singapore Senior Care CSVs.
+Every CSV the pipeline reads has a declared schema: facility, town, district and condition
+columns are categoricals, counts are int32 (nullable Int8/Int16 for bot data, which may
+have gaps) and rates and amounts float32. Reading with the schema skips pandas' type
+inference and keeps frames a fraction of their object/int64/float64 size.
+
+Large files are read chunk by chunk: iter_csv_chunks() yields typed chunks, and
+StreamingAggregate / aggregate_csv() group and aggregate while reading, keeping only one
+partial row per group between chunks, so a multi-GB attendance history is summarized in
+constant memory.
+
+    python csv_ingest.py data/singapore/raw/polyclinic_attendance.csv --by polyclinic --month
+"""
+
+import os
+import pandas as pd
+
+DEFAULT_CHUNK_ROWS = 500_000
+
+CSV_SCHEMAS = {
+    'polyclinic_attendance': {
+        'date': 'datetime', 'polyclinic': 'category', 'total_attendance': 'int32', 'elderly_attendance': 'int32',
+        'chronic_disease_consultations': 'int32', 'medication_refills': 'int32',
+    },
+    'hospital_bed_occupancy': {
+        'date': 'datetime', 'hospital': 'category', 'total_beds': 'int32', 'occupied_beds': 'int32',
+        'occupancy_rate': 'float32', 'elderly_patients_pct': 'float32',
+    },
+    'chronic_disease_prevalence': {
+        'district': 'category', 'age_group': 'category', 'condition': 'category', 'prevalence_rate': 'float32',
+        'estimated_cases': 'int32', 'year': 'int16',
+    },
+    'singapore_demographics': {
+        'town': 'category', 'total_population': 'int32', 'senior_population_60plus': 'int32',
+        'senior_percentage': 'float32', 'median_age': 'float32', 'hdb_flats_total': 'int32',
+        'elderly_friendly_flats': 'int32', 'healthcare_facilities': 'int8', 'avg_household_income': 'int32',
+        'seniors_living_alone_pct': 'float32',
+    },
+    'bot_activity_data': {
+        'user_id': 'str', 'age': 'Int16', 'chronic_conditions_count': 'Int8', 'medications_per_day': 'Int8',
+    },
+    'singapore_enhanced_bot_data': {
+        'user_id': 'str', 'age': 'Int16', 'chronic_conditions_count': 'Int8', 'medications_per_day': 'Int8',
+        'singapore_town': 'category', 'hdb_flat_type': 'category', 'pioneer_generation': 'Int8',
+        'medisave_balance': 'float32', 'has_family_nearby': 'Int8', 'preferred_language': 'category',
+        'healthcare_subsidy_eligible': 'Int8',
+    },
+}
+
+
+def schema_for(path, dataset=None):
+    """Schema of a CSV: by dataset name, or by file name (e.g. .../polyclinic_attendance.csv)"""
+    name = dataset or os.path.splitext(os.path.basename(path))[0].replace('_simulated', '')
+    if name not in CSV_SCHEMAS:
+        raise ValueError(f"No schema for {name} (one of {', '.join(CSV_SCHEMAS)})")
+    return CSV_SCHEMAS[name]
+
+
+def _read_options(path, dataset, columns):
+    """read_csv keyword arguments for the schema, restricted to the columns present in the file"""
+    schema = schema_for(path, dataset)
+    header = pd.read_csv(path, nrows=0).columns
+    wanted = [column for column in (columns or header) if column in header]
+    return {
+        'usecols': wanted,
+        'dtype': {column: schema[column] for column in wanted if schema.get(column) not in (None, 'datetime')},
+        'parse_dates': [column for column in wanted if schema.get(column) == 'datetime'],
+    }
+
+
+def read_csv_typed(path, dataset=None, columns=None):
+    """A whole CSV with its declared dtypes (columns the schema does not know are inferred)"""
+    return pd.read_csv(path, **_read_options(path, dataset, columns))
+
+
+def iter_csv_chunks(path, dataset=None, columns=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Typed chunks of a CSV, chunk_rows rows at a time"""
+    with pd.read_csv(path, chunksize=chunk_rows, **_read_options(path, dataset, columns)) as reader:
+        yield from reader
+
+
+# How partial results of each aggregation combine across chunks
+_COMBINE = {'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max'}
+
+
+def _aggregate(grouped, spec):
+    """{name: (column, how)} over a groupby, one vectorized call per aggregation function"""
+    parts = {}
+    for how in dict.fromkeys(how for _, how in spec.values()):
+        names = [name for name, (_, name_how) in spec.items() if name_how == how]
+        result = getattr(grouped[list(dict.fromkeys(spec[name][0] for name in names))], how)()
+        for name in names:
+            parts[name] = result[spec[name][0]]
+    return pd.DataFrame({name: parts[name] for name in spec})
+
+
+class StreamingAggregate:
+    """
+    Group-by aggregation fed chunk by chunk. Between chunks only the partial aggregate (one row
+    per group seen so far) is kept, so memory follows the number of groups, not rows.
+    aggregations: {output column: (input column, 'sum' | 'count' | 'min' | 'max' | 'mean')}
+    """
+
+    def __init__(self, by, aggregations):
+        self.by = list(by)
+        self.aggregations = dict(aggregations)
+        self.partials = {}
+        for output, (column, how) in self.aggregations.items():
+            if how == 'mean':
+                self.partials[f'{output}__sum'] = (column, 'sum')
+                self.partials[f'{output}__count'] = (column, 'count')
+            elif how in _COMBINE:
+                self.partials[output] = (column, how)
+            else:
+                raise ValueError(f"Unsupported aggregation {how} for {output}")
+        self.state = None
+        self.rows = 0
+
+    @classmethod
+    def from_state(cls, by, aggregations, state, rows=0):
+        """Resume an aggregate from a saved state frame (group columns plus partial columns)"""
+        aggregate = cls(by, aggregations)
+        if len(state):
+            aggregate.state = state.set_index(aggregate.by)[list(aggregate.partials)]
+        aggregate.rows = rows
+        return aggregate
+
+    def state_frame(self):
+        """The partial aggregate as a flat frame, for saving (see from_state)"""
+        if self.state is None:
+            return pd.DataFrame(columns=self.by + list(self.partials))
+        return self.state.reset_index()
+
+    def regroup(self, by):
+        """The same aggregate over coarser groups (a subset of self.by), e.g. per month from per month and facility"""
+        coarse = StreamingAggregate(by, self.aggregations)
+        if self.state is not None:
+            coarse._combine(_aggregate(self.state.groupby(level=list(by), observed=True, sort=False),
+                                       self._combine_spec()))
+        coarse.rows = self.rows
+        return coarse
+
+    def update(self, chunk):
+        """Fold a chunk of rows (with the by and input columns) into the aggregate"""
+        if not len(chunk):
+            return
+        # float32 values are summed in float64, so long histories keep their precision and the
+        # result does not depend on how the rows were chunked
+        values = dict.fromkeys(column for column, _ in self.partials.values())
+        chunk = chunk.astype({column: 'float64' for column in values if chunk[column].dtype == 'float32'})
+        self._combine(_aggregate(chunk.groupby(self.by, observed=True, sort=False), self.partials))
+        self.rows += len(chunk)
+
+    def merge(self, other):
+        """Add another aggregate with the same groups and aggregations (e.g. from a worker process)"""
+        self._combine(other.state)
+        self.rows += other.rows
+
+    def _combine(self, partial):
+        if partial is None or not len(partial):
+            return
+        if self.state is None:
+            self.state = partial
+            return
+        combined = pd.concat([self.state, partial])
+        self.state = _aggregate(combined.groupby(level=list(range(len(self.by))), observed=True, sort=False),
+                                self._combine_spec())
+
+    def _combine_spec(self):
+        return {name: (name, _COMBINE[how]) for name, (_, how) in self.partials.items()}
+
+    def result(self):
+        """The aggregate as a DataFrame with the group columns first, sorted by group"""
+        if self.state is None:
+            return pd.DataFrame(columns=self.by + list(self.aggregations))
+        state = self.state.sort_index()
+        result = pd.DataFrame(index=state.index)
+        for output, (_, how) in self.aggregations.items():
+            if how == 'mean':
+                result[output] = state[f'{output}__sum'] / state[f'{output}__count']
+            else:
+                result[output] = state[output]
+        return result.reset_index()
+
+
+def aggregate_csv(path, by, aggregations, dataset=None, derive=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Group and aggregate a CSV while reading it in typed chunks (see StreamingAggregate).
+    derive: extra key columns computed per chunk, as DataFrame.assign arguments, e.g.
+    {'month': lambda chunk: chunk['date'].dt.to_period('M')}
+    """
+    derive = derive or {}
+    needed = {column for column, _ in aggregations.values()} | (set(by) - set(derive))
+    columns = None if derive else sorted(needed)  # derived keys may read any column
+    aggregate = StreamingAggregate(by, aggregations)
+    for chunk in iter_csv_chunks(path, dataset, columns, chunk_rows):
+        aggregate.update(chunk.assign(**derive) if derive else chunk)
+    return aggregate.result()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Aggregate a Singapore health CSV in constant memory")
+    parser.add_argument('path', help="CSV with a declared schema (see CSV_SCHEMAS)")
+    parser.add_argument('--by', nargs='+', default=[], help="Group columns")
+    parser.add_argument('--month', action='store_true', help="Also group by calendar month of the date column")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    schema = schema_for(args.path)
+    values = [column for column, dtype in schema.items() if dtype in ('int32', 'float32')]
+    by = args.by + (['month'] if args.month else [])
+    if not by:
+        parser.error("give --by columns and/or --month")
+    derive = {'month': lambda chunk: chunk['date'].dt.to_period('M')} if args.month else None
+    result = aggregate_csv(args.path, by, {f'{column}_sum': (column, 'sum') for column in values},
+                           derive=derive, chunk_rows=args.chunk_rows)
+    print(result.to_string(index=False, max_rows=40))
@@ -0,0 +1,247 @@
+"""
+data_lake.py
+
+Columnar store for the daily Singapore health datasets (polyclinic attendance and hospital bed
+occupancy). Each dataset is a directory of Parquet files partitioned by year and month
+(<dataset>/year=2023/month=1/part-000000-0.parquet): the facility column is dictionary-encoded
+(categorical), dates are date32 and counts and rates are downcast to int32 and float32.
+A _lake.json file next to the partitions records the row count, date range and facilities.
+
+load_lake() reads only the requested columns, and prunes on dates at two levels: whole
+year/month directories are skipped from their names, and row groups inside the remaining files
+from their min/max statistics. So a dashboard showing one quarter reads that quarter.
+
+    python data_lake.py   # convert the raw CSVs in data/singapore/raw into the lake
+"""
+
+import json
+import os
+import shutil
+import pandas as pd
+import pyarrow as pa
+from csv_ingest import iter_csv_chunks
+
+LAKE_DIR = 'data/singapore/lake'
+RAW_DIR = 'data/singapore/raw'
+
+# Facility column and downcast value columns of each dataset
+LAKE_DATASETS = {
+    'polyclinic_attendance': {
+        'facility': 'polyclinic',
+        'columns': {
+            'total_attendance': pa.int32(),
+            'elderly_attendance': pa.int32(),
+            'chronic_disease_consultations': pa.int32(),
+            'medication_refills': pa.int32(),
+        },
+    },
+    'hospital_bed_occupancy': {
+        'facility': 'hospital',
+        'columns': {
+            'total_beds': pa.int32(),
+            'occupied_beds': pa.int32(),
+            'occupancy_rate': pa.float32(),
+            'elderly_patients_pct': pa.float32(),
+        },
+    },
+}
+PARTITION_SCHEMA = pa.schema([('year', pa.int16()), ('month', pa.int8())])
+ROW_GROUP_ROWS = 64_000  # a few days of a large simulation: fine-grained date pruning inside files
+
+
+def _partitioning():
+    import pyarrow.dataset as ds
+    return ds.partitioning(PARTITION_SCHEMA, flavor='hive')
+
+
+def lake_schema(dataset):
+    """Arrow schema of a lake dataset, partition columns last"""
+    spec = LAKE_DATASETS[dataset]
+    fields = [('date', pa.date32()), (spec['facility'], pa.dictionary(pa.int32(), pa.string()))]
+    fields += list(spec['columns'].items())
+    return pa.schema(fields + list(zip(PARTITION_SCHEMA.names, PARTITION_SCHEMA.types)))
+
+
+def lake_table(dataset, chunk):
+    """A chunk of a daily dataset (DataFrame as simulated or read from CSV) as a typed Arrow table"""
+    spec = LAKE_DATASETS[dataset]
+    date = pd.to_datetime(chunk['date'])
+    arrays = [
+        pa.array(date.to_numpy().astype('datetime64[D]'), pa.date32()),
+        pa.array(pd.Categorical(chunk[spec['facility']].astype(str))).cast(pa.dictionary(pa.int32(), pa.string())),
+    ]
+    arrays += [pa.array(chunk[column].to_numpy(), type=dtype, from_pandas=True)
+               for column, dtype in spec['columns'].items()]
+    arrays += [pa.array(date.dt.year.to_numpy(), pa.int16()), pa.array(date.dt.month.to_numpy(), pa.int8())]
+    return pa.Table.from_arrays(arrays, schema=lake_schema(dataset))
+
+
+class LakeWriter:
+    """
+    Writes one dataset of the lake chunk by chunk, e.g. while it is simulated. Partitions are
+    built in a staging directory and swapped in on close(), so readers never see a partial dataset.
+    """
+
+    def __init__(self, dataset, lake_dir=LAKE_DIR):
+        if dataset not in LAKE_DATASETS:
+            raise ValueError(f"{dataset} is not a lake dataset (one of {', '.join(LAKE_DATASETS)})")
+        self.dataset = dataset
+        self.path = os.path.join(lake_dir, dataset)
+        self.staging = f"{self.path}.{os.getpid()}.tmp"
+        self.rows = 0
+        self.chunks = 0
+        self.start = self.end = None
+        self.facilities = set()
+        shutil.rmtree(self.staging, ignore_errors=True)
+        os.makedirs(self.staging)
+
+    def write(self, chunk):
+        import pyarrow.dataset as ds
+        if not len(chunk):
+            return
+        table = lake_table(self.dataset, chunk)
+        ds.write_dataset(table, self.staging, format='parquet', partitioning=_partitioning(),
+                         # Zero-padded so files list in write order (part-10 would sort before part-9)
+                         basename_template=f"part-{self.chunks:06d}-{{i}}.parquet",
+                         existing_data_behavior='overwrite_or_ignore',
+                         max_rows_per_group=ROW_GROUP_ROWS, min_rows_per_group=min(ROW_GROUP_ROWS, len(chunk)))
+        dates = table.column('date').to_pandas(date_as_object=False)
+        self.start = dates.min() if self.start is None else min(self.start, dates.min())
+        self.end = dates.max() if self.end is None else max(self.end, dates.max())
+        self.facilities.update(chunk[LAKE_DATASETS[self.dataset]['facility']].astype(str).unique().tolist())
+        self.rows += len(chunk)
+        self.chunks += 1
+
+    def close(self):
+        """Record the dataset's metadata and replace the previous version; returns the metadata"""
+        info = {
+            'dataset': self.dataset,
+            'rows': int(self.rows),
+            'start': None if self.start is None else f"{self.start:%Y-%m-%d}",
+            'end': None if self.end is None else f"{self.end:%Y-%m-%d}",
+            'facilities': sorted(map(str, self.facilities)),
+            'created': pd.Timestamp.now().replace(microsecond=0).isoformat(),
+        }
+        with open(os.path.join(self.staging, '_lake.json'), 'w') as f:
+            json.dump(info, f, indent=1)
+        old = f"{self.path}.{os.getpid()}.old"
+        if os.path.exists(self.path):
+            os.replace(self.path, old)
+        os.replace(self.staging, self.path)
+        shutil.rmtree(old, ignore_errors=True)
+        return info
+
+    def abort(self):
+        shutil.rmtree(self.staging, ignore_errors=True)
+
+
+def lake_info(dataset, lake_dir=LAKE_DIR):
+    """Row count, date range and facilities of a lake dataset, or None if it has not been written"""
+    path = os.path.join(lake_dir, dataset, '_lake.json')
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _months_from(timestamp):
+    """Partition filter: year/month directories on or after the timestamp's month"""
+    import pyarrow.dataset as ds
+    year, month = ds.field('year'), ds.field('month')
+    return (year > timestamp.year) | ((year == timestamp.year) & (month >= timestamp.month))
+
+
+def _months_until(timestamp):
+    """Partition filter: year/month directories on or before the timestamp's month"""
+    import pyarrow.dataset as ds
+    year, month = ds.field('year'), ds.field('month')
+    return (year < timestamp.year) | ((year == timestamp.year) & (month <= timestamp.month))
+
+
+def _scan_options(dataset, columns, start, end, facilities, lake_dir):
+    """The lake dataset, projected columns and pushed-down filter of a read"""
+    import pyarrow.dataset as ds
+    spec = LAKE_DATASETS[dataset]
+    lake = ds.dataset(os.path.join(lake_dir, dataset), format='parquet', partitioning=_partitioning(),
+                      schema=lake_schema(dataset))
+    if columns is None:
+        columns = ['date', spec['facility']] + list(spec['columns'])
+
+    conditions = []
+    if start is not None:
+        start = pd.Timestamp(start)
+        conditions += [_months_from(start), ds.field('date') >= pa.scalar(start.date(), pa.date32())]
+    if end is not None:
+        end = pd.Timestamp(end)
+        conditions += [_months_until(end), ds.field('date') <= pa.scalar(end.date(), pa.date32())]
+    if facilities is not None:
+        conditions.append(ds.field(spec['facility']).isin(list(facilities)))
+    condition = None
+    for expression in conditions:
+        condition = expression if condition is None else condition & expression
+    return lake, list(columns), condition
+
+
+def load_lake(dataset, columns=None, start=None, end=None, facilities=None, lake_dir=LAKE_DIR):
+    """
+    Read a lake dataset as a DataFrame (date as datetime64, facility as categorical).
+    columns: the columns to read (default: date, facility and all values); start/end: inclusive
+    date bounds; facilities: only these polyclinics/hospitals. Filters are pushed down to the
+    partition directories and Parquet row groups, so unread slices are never decoded.
+    """
+    lake, columns, condition = _scan_options(dataset, columns, start, end, facilities, lake_dir)
+    table = lake.to_table(columns=columns, filter=condition)
+    if 'date' in table.column_names:
+        # Partition directories are listed in name order (month=1, month=10, ...); the sort is
+        # stable, so rows of a day keep their facility order as in the CSV
+        table = table.sort_by('date')
+    return table.to_pandas(date_as_object=False)
+
+
+def iter_lake(dataset, columns=None, start=None, end=None, facilities=None, lake_dir=LAKE_DIR,
+              batch_rows=500_000):
+    """Like load_lake, but as DataFrames of about batch_rows rows in no particular order (for aggregation)"""
+    lake, columns, condition = _scan_options(dataset, columns, start, end, facilities, lake_dir)
+    # The scanner yields a batch per row group or file; small ones are coalesced so per-frame
+    # overhead downstream is paid once per batch_rows rows
+    pending, rows = [], 0
+    for batch in lake.to_batches(columns=columns, filter=condition, batch_size=batch_rows):
+        pending.append(batch)
+        rows += batch.num_rows
+        if rows >= batch_rows:
+            yield pa.Table.from_batches(pending).to_pandas(date_as_object=False)
+            pending, rows = [], 0
+    if rows:
+        yield pa.Table.from_batches(pending).to_pandas(date_as_object=False)
+
+
+def convert_csv_to_lake(dataset, csv_path, lake_dir=LAKE_DIR, chunk_rows=1_000_000):
+    """Stream a daily dataset's CSV into the lake; returns the lake metadata"""
+    writer = LakeWriter(dataset, lake_dir)
+    try:
+        for chunk in iter_csv_chunks(csv_path, dataset, chunk_rows=chunk_rows):
+            writer.write(chunk)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.close()
+
+
+def main(raw_dir=RAW_DIR, lake_dir=LAKE_DIR):
+    for dataset in LAKE_DATASETS:
+        csv_path = os.path.join(raw_dir, f"{dataset}.csv")
+        if not os.path.exists(csv_path):
+            print(f"⚠️ {csv_path} not found - run singapore_data_setup.py first")
+            continue
+        info = convert_csv_to_lake(dataset, csv_path, lake_dir)
+        print(f"✅ {dataset}: {info['rows']:,} rows, {info['start']} to {info['end']}, "
+              f"{len(info['facilities'])} facilities -> {os.path.join(lake_dir, dataset)}")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Convert the daily Singapore health CSVs into the Parquet lake")
+    parser.add_argument('--raw-dir', default=RAW_DIR, help="Directory with the raw CSVs")
+    parser.add_argument('--lake-dir', default=LAKE_DIR, help="Where the partitioned datasets go")
+    args = parser.parse_args()
+    main(args.raw_dir, args.lake_dir)
@@ -0,0 +1,72 @@
+"""
+dataset_cache.py
+
+Content-addressed cache for the synthetic training datasets of the Singapore Senior Care ML models.
+A dataset is stored as a Parquet file keyed by a hash of its input CSVs, the generator parameters
+and the seed, so repeated training runs load it instead of regenerating it.
+"""
+
+import hashlib
+import json
+import os
+import pandas as pd
+
+CACHE_DIR = 'data/singapore/cache'
+
+# (path, size, mtime) -> sha256, so unchanged inputs are hashed once per process
+_digest_memo = {}
+
+
+def file_digest(path):
+    """SHA-256 of a file's contents, read in 1 MB blocks"""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if memo_key not in _digest_memo:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        _digest_memo[memo_key] = digest.hexdigest()
+    return _digest_memo[memo_key]
+
+
+def frame_digest(frame):
+    """SHA-256 of an in-memory DataFrame (for callers that pass data instead of a path)"""
+    row_hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    return hashlib.sha256(row_hashes.tobytes() + ','.join(map(str, frame.columns)).encode()).hexdigest()
+
+
+def dataset_key(name, input_paths, params, seed):
+    """Hash identifying one generated dataset"""
+    payload = {
+        'name': name,
+        'inputs': {path: file_digest(path) for path in sorted(input_paths)},
+        'params': params,
+        'seed': seed,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def cached_dataset(name, input_paths, params, seed, build_fn, cache_dir=CACHE_DIR):
+    """
+    Return the dataset built by build_fn(), loading it from the cache when an identical one exists.
+    Unseeded datasets are never cached since they are not reproducible.
+    """
+    if seed is None:
+        return build_fn()
+
+    key = dataset_key(name, input_paths, params, seed)
+    path = os.path.join(cache_dir, f"{name}-{key[:20]}.parquet")
+    if os.path.exists(path):
+        print(f"📦 Loaded cached {name} dataset ({os.path.basename(path)})")
+        return pd.read_parquet(path)
+
+    data = build_fn()
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        data.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)  # atomic, so concurrent trainers never read a partial file
+    except ImportError:
+        print("⚠️ pyarrow not installed - training datasets will not be cached")
+    return data
@@ -0,0 +1,203 @@
+"""
+drift_monitor.py
+
+Feature drift monitoring for the Singapore Senior Care ML models.
+At training time each model's inputs are summarized into a reference sketch: per feature,
+decile cut points of the training rows and the share of rows between them. The reference is
+stored with the model version in the registry manifest.
+
+Live inputs are folded into a FeatureSketch over the same cut points: one counter per bin and
+feature, updated batch by batch, so memory stays fixed however many users are scored and
+sketches from parallel workers can be merged by adding counts. Drift is measured per feature
+with the population stability index (PSI) against the reference:
+  PSI < 0.1 stable, 0.1 - 0.25 moderate shift, > 0.25 significant drift (retrain or investigate)
+
+Features the bot does not collect and fills with an inference default (model_features.py) do
+not follow the training distribution by construction: fixed defaults are constant, and
+social_support_score / social_isolation_score drop the training noise. They are listed as
+imputed and not judged. Defaults derived exactly as in training (medication_count,
+seasonal_factor) vary with live data and are judged like the rest.
+The nightly batch job (batch_scoring.py) reports the PSI of every served model and writes
+it as a metrics file under data/singapore/drift/.
+
+    python drift_monitor.py   # show the latest drift report
+"""
+
+import glob
+import json
+import os
+from datetime import datetime
+import numpy as np
+from model_features import IMPUTED_FEATURES
+
+DRIFT_DIR = 'data/singapore/drift'
+N_BINS = 10
+MODERATE_PSI = 0.1
+SIGNIFICANT_PSI = 0.25
+_EPSILON = 1e-4  # floor for empty bins, which would make PSI infinite
+
+
+def _padded_edges(edges):
+    """Ragged per-feature cut points as one (features x max cuts) array padded with +inf"""
+    width = max(len(cuts) for cuts in edges)
+    padded = np.full((len(edges), width), np.inf)
+    for j, cuts in enumerate(edges):
+        padded[j, :len(cuts)] = cuts
+    return padded
+
+
+def _bin_counts(X, padded_edges):
+    """Rows per bin and feature (bins are right-closed), plus missing values per feature"""
+    X = np.asarray(X, dtype=np.float64)
+    n_features, n_cuts = padded_edges.shape
+    counts = np.zeros((n_features, n_cuts + 1), dtype=np.int64)
+    missing = np.isnan(X).sum(axis=0)
+    for j in range(n_features):
+        column = X[:, j]
+        bins = np.searchsorted(padded_edges[j], column[~np.isnan(column)], side='left')
+        counts[j] = np.bincount(bins, minlength=n_cuts + 1)
+    return counts, missing
+
+
+def drift_reference(X, features, n_bins=N_BINS):
+    """Reference sketch of training rows X (raw model inputs) for the registry manifest"""
+    X = np.asarray(X, dtype=np.float64)
+    edges = []
+    for j in range(X.shape[1]):
+        column = X[:, j][~np.isnan(X[:, j])]
+        # Discrete features have repeated quantiles; each distinct cut point is kept once
+        edges.append(np.unique(np.quantile(column, np.arange(1, n_bins) / n_bins)))
+    counts, _ = _bin_counts(X, _padded_edges(edges))
+    proportions = counts / max(1, len(X))
+    return {
+        'features': list(features),
+        'n_rows': int(len(X)),
+        'edges': [cuts.tolist() for cuts in edges],
+        'proportions': [proportions[j, :len(cuts) + 1].tolist() for j, cuts in enumerate(edges)],
+    }
+
+
+class FeatureSketch:
+    """Fixed-size histogram of live inputs over a reference's cut points"""
+
+    def __init__(self, reference):
+        self.reference = reference
+        self.features = reference['features']
+        self.edges = _padded_edges([np.asarray(cuts) for cuts in reference['edges']])
+        self.counts = np.zeros((len(self.features), self.edges.shape[1] + 1), dtype=np.int64)
+        self.missing = np.zeros(len(self.features), dtype=np.int64)
+        self.n = 0
+
+    def update(self, X):
+        """Fold a batch of raw model input rows into the sketch"""
+        X = np.atleast_2d(X)
+        if not len(X):
+            return
+        counts, missing = _bin_counts(X, self.edges)
+        self.counts += counts
+        self.missing += missing
+        self.n += len(X)
+
+    def merge(self, other):
+        """Add another sketch over the same reference (e.g. from a worker process)"""
+        self.counts += other.counts
+        self.missing += other.missing
+        self.n += other.n
+
+    def psi(self):
+        """Population stability index per feature (None for features with no live values)"""
+        result = {}
+        for j, feature in enumerate(self.features):
+            expected = np.asarray(self.reference['proportions'][j])
+            observed = self.counts[j, :len(expected)]
+            if observed.sum() == 0:
+                result[feature] = None
+                continue
+            expected = np.maximum(expected, _EPSILON)
+            actual = np.maximum(observed / observed.sum(), _EPSILON)
+            result[feature] = float(np.sum((actual - expected) * np.log(actual / expected)))
+        return result
+
+    def report(self, imputed=()):
+        """PSI of every feature, and the features that shifted or drifted (imputed ones are not judged)"""
+        psi = self.psi()
+        scored = {feature: value for feature, value in psi.items() if value is not None and feature not in imputed}
+        return {
+            'rows': int(self.n),
+            'reference_rows': self.reference['n_rows'],
+            'psi': psi,
+            'imputed': sorted(feature for feature in psi if feature in imputed),
+            'max_psi': max(scored.values()) if scored else None,
+            'drifted': sorted(feature for feature, value in scored.items() if value > SIGNIFICANT_PSI),
+            'shifted': sorted(feature for feature, value in scored.items()
+                              if MODERATE_PSI < value <= SIGNIFICANT_PSI),
+            'missing': {feature: int(count) for feature, count in zip(self.features, self.missing) if count},
+        }
+
+
+class DriftMonitor:
+    """One sketch per served model that has a drift reference in the registry"""
+
+    def __init__(self, registry, names=None):
+        self.versions = {}
+        self.sketches = {}
+        for name in names or registry.names:
+            loaded = registry.get(name)
+            if loaded is not None and loaded.drift_reference is not None:
+                self.versions[name] = loaded.version
+                self.sketches[name] = FeatureSketch(loaded.drift_reference)
+
+    def update(self, name, X):
+        sketch = self.sketches.get(name)
+        if sketch is not None and X is not None:
+            sketch.update(X)
+
+    def report(self):
+        return {name: {'version': self.versions[name], **sketch.report(IMPUTED_FEATURES.get(name, ()))}
+                for name, sketch in self.sketches.items() if sketch.n}
+
+
+def save_drift_report(report, directory=DRIFT_DIR, created=None):
+    """Write a drift report as drift-<time>.json; returns the path"""
+    created = created or datetime.now().replace(microsecond=0)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"drift-{created:%Y%m%dT%H%M%S}.json")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({'created': created.isoformat(), 'models': report}, f, indent=1)
+    os.replace(tmp_path, path)
+    return path
+
+
+def latest_drift_report(directory=DRIFT_DIR):
+    """The newest saved drift report, or None"""
+    paths = sorted(glob.glob(os.path.join(directory, 'drift-*.json')))
+    if not paths:
+        return None
+    with open(paths[-1], 'r') as f:
+        return json.load(f)
+
+
+def print_drift_report(report):
+    if not report:
+        print("📉 No drift references yet - retrain the models to record them")
+        return
+    print("📉 Feature drift (PSI against the training data):")
+    for name, model_report in report.items():
+        if model_report['max_psi'] is None:
+            print(f"   {name}: no live values")
+            continue
+        status = '🚨' if model_report['drifted'] else '⚠️' if model_report['shifted'] else '✅'
+        imputed = f", {len(model_report['imputed'])} imputed features skipped" if model_report['imputed'] else ''
+        print(f"   {status} {name}: max PSI {model_report['max_psi']:.3f} over {model_report['rows']:,} rows{imputed}")
+        for feature in model_report['drifted'] + model_report['shifted']:
+            print(f"      - {feature}: {model_report['psi'][feature]:.3f}")
+
+
+if __name__ == "__main__":
+    saved = latest_drift_report()
+    if saved is None:
+        print("No drift report found - run python batch_scoring.py first")
+    else:
+        print(f"🕒 {saved['created']}")
+        print_drift_report(saved['models'])
@@ -1,6 +1,7 @@
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import ContextTypes
 from bot_utils import load_care_contacts, load_family_contacts
+from bot_events import log_event
 
 async def fall(update: Update, context: ContextTypes.DEFAULT_TYPE):
     print("fall() handler called")  # Add this line
@@ -50,6 +51,7 @@ async def fall_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if query.data == "fall_confirm_yes":
         print(f"Contact IDs to notify: {contact_ids}")  # Add this line
         # Send alert to contacts
+        notified = 0
         for contact_id in contact_ids:
             print(f"Trying to send fall alert to contact_id: {contact_id}")
             try:
@@ -57,8 +59,10 @@ async def fall_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     chat_id=contact_id,
                     text=f"🚨 Fall alert! {query.from_user.full_name} may need help."
                 )
+                notified += 1
             except Exception as e:
                 print(f"Failed to send fall alert to {contact_id}: {e}")
+        log_event('fall_alert', user_id, notified=notified)
 
         keyboard = [
             [
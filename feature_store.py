@@ -0,0 +1,170 @@
+"""
+feature_store.py
+
+Per-user feature store shared by the Singapore Senior Care ML models.
+Profile features (age, chronic conditions, medications, family support, HDB type, language, ...)
+are derived once from the Singapore-enhanced bot data and kept as a float32 column-major matrix.
+Each build is versioned by the schema version and a hash of the source CSV, and is read by
+MedicationAdherenceModel, SingaporeFallRiskModel and SingaporeHealthAnomalyModel for both
+training and inference.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from security_utils import sanitize_input
+from dataset_cache import file_digest
+from csv_ingest import read_csv_typed
+
+ENHANCED_BOT_DATA = 'data/singapore/processed/singapore_enhanced_bot_data.csv'
+FEATURE_STORE_DIR = 'data/singapore/features'
+FEATURE_SCHEMA_VERSION = 1
+
+HDB_ENCODING = {'1-room': 1, '2-room': 2, '3-room': 3, '4-room': 4, '5-room': 5}
+LANGUAGE_ENCODING = {'English': 1, 'Mandarin': 2, 'Malay': 3, 'Tamil': 4}
+
+# Stored features and the value used when a source column or cell is missing
+USER_FEATURES = {
+    'age': 70,
+    'chronic_conditions_count': 2,
+    'medications_per_day': 3,
+    'pioneer_generation': 0,
+    'hdb_flat_type_encoded': 3,
+    'has_family_nearby': 1,
+    'medisave_balance': 25000,
+    'healthcare_subsidy_eligible': 1,
+    'preferred_language_encoded': 1,
+}
+
+
+def encode_hdb_type(hdb_type):
+    return HDB_ENCODING.get(hdb_type, 3)
+
+
+def encode_language(language):
+    return LANGUAGE_ENCODING.get(language, 1)
+
+
+def _encode_categories(raw, encode, default, index):
+    """Encode a string column once per distinct value (missing column or cells get default)"""
+    if raw is None:
+        return pd.Series(encode(default), index=index)
+    raw = raw.astype('category')
+    codes = np.array([encode(sanitize_input(str(value))) for value in raw.cat.categories] + [encode(default)])
+    # Code -1 (missing) picks the default appended last
+    return pd.Series(codes[raw.cat.codes.to_numpy()], index=index)
+
+
+class UserFeatureStore:
+    """
+    Versioned per-user feature vectors in a compact float32 layout.
+    values[i, j] is feature columns[j] of user user_ids[i]; the matrix is column-major so
+    training reads whole columns contiguously, and lookups by user_id are a dict hit.
+    """
+
+    def __init__(self, user_ids, columns, values, version):
+        self.user_ids = np.asarray(user_ids)
+        self.columns = list(columns)
+        self.values = np.asfortranarray(values, dtype=np.float32)
+        self.version = version
+        self._row = {user_id: i for i, user_id in enumerate(self.user_ids.tolist())}
+        self._col = {name: j for j, name in enumerate(self.columns)}
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def __contains__(self, user_id):
+        return user_id in self._row
+
+    @staticmethod
+    def source_version(source_path=ENHANCED_BOT_DATA):
+        return f"v{FEATURE_SCHEMA_VERSION}-{file_digest(source_path)[:12]}"
+
+    @classmethod
+    def build(cls, source_path=ENHANCED_BOT_DATA):
+        """Derive the feature matrix from the Singapore-enhanced bot data"""
+        print("🧮 Building user feature store...")
+        source = read_csv_typed(source_path, 'singapore_enhanced_bot_data')
+        n_users = len(source)
+        if 'user_id' in source.columns:
+            # Sanitize all string inputs from external data
+            user_ids = [sanitize_input(str(x)) for x in source['user_id']]
+        else:
+            user_ids = [f"user_{i}" for i in range(n_users)]
+
+        values = np.empty((n_users, len(USER_FEATURES)), dtype=np.float32, order='F')
+        for j, (name, default) in enumerate(USER_FEATURES.items()):
+            if name == 'hdb_flat_type_encoded':
+                column = _encode_categories(source.get('hdb_flat_type'), encode_hdb_type, '3-room', source.index)
+            elif name == 'preferred_language_encoded':
+                column = _encode_categories(source.get('preferred_language'), encode_language, 'English', source.index)
+            elif name in source.columns:
+                column = pd.to_numeric(source[name], errors='coerce').fillna(default)
+            else:
+                column = pd.Series(default, index=source.index)
+            values[:, j] = column.to_numpy(dtype=np.float32)
+
+        return cls(user_ids, USER_FEATURES.keys(), values, cls.source_version(source_path))
+
+    def save(self, store_dir=FEATURE_STORE_DIR):
+        os.makedirs(store_dir, exist_ok=True)
+        path = os.path.join(store_dir, f"user_features-{self.version}.npz")
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, values=self.values, user_ids=self.user_ids.astype(str),
+                 columns=np.asarray(self.columns), version=np.asarray(self.version))
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data['user_ids'], data['columns'].tolist(), data['values'], str(data['version']))
+
+    @classmethod
+    def load_or_build(cls, source_path=ENHANCED_BOT_DATA, store_dir=FEATURE_STORE_DIR):
+        """Load the store for the current source data, building and saving it on first use"""
+        version = cls.source_version(source_path)
+        path = os.path.join(store_dir, f"user_features-{version}.npz")
+        if os.path.exists(path):
+            return cls.load(path)
+        store = cls.build(source_path)
+        store.save(store_dir)
+        return store
+
+    def column(self, name):
+        """All users' values of one feature (a contiguous view)"""
+        return self.values[:, self._col[name]]
+
+    def vector(self, user_id):
+        """One user's feature vector, or None for unknown users"""
+        row = self._row.get(user_id)
+        return None if row is None else self.values[row]
+
+    def rows(self, user_ids):
+        """Row positions of user_ids; raises KeyError for unknown users"""
+        return np.fromiter((self._row[user_id] for user_id in user_ids), dtype=np.intp, count=len(user_ids))
+
+    def frame(self):
+        """The stored features as a DataFrame (for training code)"""
+        return pd.DataFrame(self.values, columns=self.columns, index=self.user_ids, copy=True)
+
+    def model_matrix(self, feature_columns, user_ids=None, defaults=None):
+        """
+        Assemble float32 model input rows in the model's training column order.
+        Stored features are copied from the store; any other feature comes from defaults,
+        either a value (scalar or per-row array) or a callable taking {feature: column}
+        for the selected users.
+        """
+        defaults = defaults or {}
+        rows = slice(None) if user_ids is None else self.rows(user_ids)
+        selected = {name: self.values[rows, j] for j, name in enumerate(self.columns)}
+        n_rows = len(self) if user_ids is None else len(user_ids)
+        matrix = np.empty((n_rows, len(feature_columns)), dtype=np.float32)
+        for j, name in enumerate(feature_columns):
+            if name in selected:
+                matrix[:, j] = selected[name]
+            elif callable(defaults.get(name)):
+                matrix[:, j] = defaults[name](selected)
+            else:
+                matrix[:, j] = defaults[name]
+        return matrix
@@ -0,0 +1,116 @@
+"""
+inference_service.py
+
+Online risk inference for the Senior Care Bot.
+Scores a single user's fall risk and medication adherence risk from the feature store
+with the models held warm in the ModelRegistry. The hot path is numpy only: published
+versions are scored by their memory-mapped tree arrays with the scaler fused in (well under a
+millisecond per user), legacy pickles tree by tree.
+Callers choose a tier: 'accurate' scores with the full ensembles, 'fast' with the shallow
+students distilled from them (model_distillation.py), falling back to the ensemble when no
+student has been published.
+"""
+
+import logging
+import numpy as np
+from model_registry import ModelRegistry, STUDENT_MODELS
+from feature_store import UserFeatureStore
+from model_features import adherence_features, fall_risk_features
+
+logger = logging.getLogger(__name__)
+
+TIERS = ('accurate', 'fast')
+
+
+def _forest_proba(forest, X):
+    """RandomForestClassifier.predict_proba over the fitted trees, skipping per-call input validation"""
+    total = None
+    for estimator in forest.estimators_:
+        proba = estimator.tree_.predict(X)[:, :forest.n_classes_]
+        normalizer = proba.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+        proba = proba / normalizer
+        total = proba if total is None else total + proba
+    return total / len(forest.estimators_)
+
+
+def adherent_proba(loaded, X):
+    """P(adherent) from the adherence forest, or its distilled student, for raw feature rows"""
+    if loaded.trees is not None and loaded.trees.kind != 'forest_classifier':
+        # Students regress the forest's P(adherent) directly
+        return loaded.trees.predict(X)
+    if loaded.trees is not None:
+        proba = loaded.trees.predict(X)
+        adherent_col = list(loaded.trees.classes).index(1)
+    else:
+        proba = _forest_proba(loaded.model, loaded.transform(X))
+        adherent_col = list(loaded.model.classes_).index(1)
+    return proba[:, adherent_col]
+
+
+class RiskInferenceService:
+    """Answers fall-risk and adherence-risk queries for one user at a time"""
+
+    def __init__(self, registry=None, store=None, online=None):
+        self.registry = registry if registry is not None else ModelRegistry().load()
+        self.store = store if store is not None else UserFeatureStore.load_or_build()
+        # Online adherence model (online_adherence.py), used once it beats the forest on recent outcomes
+        self.online = online
+        self._warm_up()
+
+    def _warm_up(self):
+        """Run one prediction per model so the first real request pays no first-call costs"""
+        if len(self.store):
+            user_id = self.store.user_ids[0]
+            for tier in TIERS:
+                self.user_risk(user_id, tier)
+
+    def _model(self, name, tier):
+        """The model serving a tier: the distilled student for 'fast' when there is one, else the teacher"""
+        if tier not in TIERS:
+            raise ValueError(f"Unknown tier: {tier}")
+        if tier == 'fast':
+            student = self.registry.get(STUDENT_MODELS[name])
+            if student is not None:
+                return student
+        return self.registry.get(name)
+
+    def adherence_risk(self, user_id, tier='accurate'):
+        """Probability (0-1) that the user misses medication, or None if unknown"""
+        loaded = self._model('medication_adherence', tier)
+        if loaded is None or user_id not in self.store:
+            return None
+        X = adherence_features(self.store, [user_id])
+        if tier == 'accurate' and self.online is not None and self.online.preferred():
+            return float(1.0 - self.online.adherent_proba(X)[0])
+        return float(min(1.0, max(0.0, 1.0 - adherent_proba(loaded, X)[0])))
+
+    def fall_risk(self, user_id, tier='accurate'):
+        """Fall risk score (0-100), or None if unknown"""
+        loaded = self._model('fall_risk', tier)
+        if loaded is None or user_id not in self.store:
+            return None
+        X = fall_risk_features(self.store, [user_id])
+        if loaded.trees is not None:
+            score = loaded.trees.predict(X)[0]
+        else:
+            score = loaded.model.predict(loaded.transform(X))[0]
+        return float(min(100.0, max(0.0, score)))
+
+    def user_risk(self, user_id, tier='accurate'):
+        """Both scores for a user, or None when the user has no profile in the feature store"""
+        if user_id not in self.store:
+            return None
+        return {
+            'adherence_risk': self.adherence_risk(user_id, tier),
+            'fall_risk': self.fall_risk(user_id, tier),
+        }
+
+
+def load_inference_service():
+    """Create the service at bot startup; returns None (and logs) if models or data are missing"""
+    try:
+        return RiskInferenceService()
+    except Exception as e:
+        logger.warning("Risk inference disabled: %s", e)
+        return None
@@ -1,6 +1,7 @@
 from telegram import Update
 from telegram.ext import ContextTypes
 from bot_utils import load_user_medications, load_care_contacts, load_family_contacts
+from bot_events import log_event
 import json
 import os
 
@@ -104,6 +105,7 @@ async def emergency_location_handler(update: Update, context: ContextTypes.DEFAU
         save_location_history(history)
 
         # Notify contacts directly
+        notified = 0
         for contact_id in contact_ids:
             try:
                 print(f"Trying to send alert to contact_id: {contact_id}")
@@ -114,8 +116,10 @@ async def emergency_location_handler(update: Update, context: ContextTypes.DEFAU
                         f"{map_url}"
                     )
                 )
+                notified += 1
             except Exception as e:
                 print(f"Failed to send message to {contact_id}: {e}")
+        log_event('location_share', user_id, notified=notified)
 
         await update.message.reply_text(
             f"✅ Your location has been sent to your contacts: {', '.join(names)}\nMap: {map_url}"
@@ -0,0 +1,262 @@
+"""
+ml_benchmark.py
+
+Stage-timing benchmark for the Singapore Senior Care ML pipeline.
+Runs the medication adherence, fall risk and health anomaly pipelines of singapore_ml_models.py
+at several dataset scales and times every stage separately: CSV load, sanitize, feature store,
+feature generation, scaling, fit, predict, plot rendering and serialization. For each stage it
+records the wall time and the peak resident memory (sampled from /proc by a background thread),
+plus the peak Python/numpy allocation when --trace-allocations is given (tracemalloc slows
+allocation-heavy stages several times over, so timings are only comparable between runs with
+the same setting). Results are written as JSON with one record per (model, rows, stage), so two
+runs can be diffed or compared with --compare to see which stage to optimize.
+
+    python ml_benchmark.py [--scales 500 50000 1000000] [--models adherence fall_risk anomaly]
+                           [--no-plots] [--trace-allocations] [--output PATH] [--compare BASELINE.json]
+"""
+
+import gc
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.model_selection import train_test_split
+from security_utils import sanitize_input
+from dataset_cache import frame_digest
+from feature_store import UserFeatureStore, ENHANCED_BOT_DATA
+from model_registry import publish_model
+from singapore_ml_models import MedicationAdherenceModel, SingaporeFallRiskModel, SingaporeHealthAnomalyModel
+
+BENCHMARK_DIR = 'benchmarks'
+DEFAULT_SCALES = [500, 50_000, 1_000_000]
+MODELS = ['adherence', 'fall_risk', 'anomaly']
+ANOMALY_DAYS = 30
+STRING_COLUMNS = ['user_id', 'singapore_town', 'hdb_flat_type', 'preferred_language']
+
+
+def _current_rss_mb():
+    """Resident set size now, the process peak where /proc is not available, or NaN on Windows"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError):
+        pass
+    try:
+        import resource  # POSIX only
+    except ImportError:
+        return float('nan')
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class _RssSampler:
+    """Polls the resident set size in a background thread and keeps the peak"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = _current_rss_mb()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, _current_rss_mb())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._done.set()
+        self._thread.join()
+        self.peak = max(self.peak, _current_rss_mb())
+
+
+class StageTimer:
+    """Collects one record per timed stage"""
+
+    def __init__(self, trace_allocations=False):
+        self.trace_allocations = trace_allocations
+        self.records = []
+
+    @contextmanager
+    def stage(self, model, rows, stage):
+        gc.collect()
+        if self.trace_allocations:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        rss_before = _current_rss_mb()
+        with _RssSampler() as sampler:
+            started = time.perf_counter()
+            yield
+            seconds = time.perf_counter() - started
+        record = {'model': model, 'rows': rows, 'stage': stage, 'seconds': round(seconds, 4),
+                  'peak_rss_mb': round(sampler.peak, 1), 'rss_growth_mb': round(sampler.peak - rss_before, 1)}
+        if self.trace_allocations:
+            record['peak_alloc_mb'] = round((tracemalloc.get_traced_memory()[1] - baseline) / 2**20, 1)
+        self.records.append(record)
+        print(f"   {stage:<20} {seconds:9.3f}s  peak RSS {record['peak_rss_mb']:8.1f} MB")
+
+
+def _scaled_bot_csv(n_users, directory):
+    """The Singapore-enhanced bot data repeated to n_users rows (with unique user_ids)"""
+    source = pd.read_csv(ENHANCED_BOT_DATA)
+    repeats = -(-n_users // len(source))
+    scaled = pd.concat([source] * repeats, ignore_index=True).iloc[:n_users]
+    scaled['user_id'] = [f"user_{i:07d}" for i in range(n_users)]
+    path = os.path.join(directory, f"bot_data_{n_users}.csv")
+    scaled.to_csv(path, index=False)
+    return path
+
+
+def _model_stages(timer, name, rows, store, workdir, render_plots):
+    """Feature generation through serialization for one model"""
+    if name == 'adherence':
+        model = MedicationAdherenceModel()
+        with timer.stage(name, rows, 'feature_generation'):
+            data = model._build_adherence_data(rows, store, model.seed)
+        X, y = data[model.FEATURE_COLUMNS], data['medication_adherent']
+        split = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    elif name == 'fall_risk':
+        model = SingaporeFallRiskModel()
+        with timer.stage(name, rows, 'feature_generation'):
+            data = model._build_singapore_fall_data(store, datetime.now().month, model.seed)
+        X, y = data[model.FEATURE_COLUMNS], data['fall_risk_score']
+        split = train_test_split(X, y, test_size=0.2, random_state=42)
+    else:
+        model = SingaporeHealthAnomalyModel()
+        with timer.stage(name, rows, 'feature_generation'):
+            data = model._build_singapore_anomaly_data(store, max(1, rows // ANOMALY_DAYS), ANOMALY_DAYS, 0.1, model.seed)
+        X, y = data[model.ANOMALY_FEATURES], data['is_anomaly']
+        split = train_test_split(X, y, test_size=0.2, random_state=42)
+    X_train, X_test, y_train, y_test = split
+
+    with timer.stage(name, rows, 'scaling'):
+        X_train_scaled = model.scaler.fit_transform(X_train)
+        X_test_scaled = model.scaler.transform(X_test)
+    with timer.stage(name, rows, 'fit'):
+        if name == 'anomaly':
+            model.model.fit(X_train_scaled[(y_train == 0).to_numpy()])
+        else:
+            model.model.fit(X_train_scaled, y_train)
+    with timer.stage(name, rows, 'predict'):
+        y_pred = model.model.predict(X_test_scaled)
+
+    if render_plots:
+        import singapore_model_plots as plots
+        from sklearn.metrics import confusion_matrix
+        plot_dir = os.path.join(workdir, 'plots')
+        os.makedirs(plot_dir, exist_ok=True)
+        with timer.stage(name, rows, 'plot_rendering'):
+            if name == 'anomaly':
+                plots.render_anomaly_plots(confusion_matrix(y_test, (y_pred == -1).astype(int)), plot_dir)
+            else:
+                importance = pd.DataFrame({'feature': X.columns, 'importance': model.model.feature_importances_}
+                                          ).sort_values('importance', ascending=False)
+                if name == 'adherence':
+                    plots.render_adherence_plots('Singapore', importance, confusion_matrix(y_test, y_pred), plot_dir)
+                else:
+                    plots.render_fall_plots(importance, y_test.to_numpy(), y_pred, plot_dir)
+
+    with timer.stage(name, rows, 'serialization'):
+        publish_model(f"benchmark_{name}", model.model, model.scaler, frame_digest(data), {},
+                      model_dir=os.path.join(workdir, 'models'))
+
+
+def run_benchmark(scales=DEFAULT_SCALES, models=MODELS, render_plots=True, trace_allocations=False):
+    timer = StageTimer(trace_allocations)
+    if trace_allocations:
+        tracemalloc.start()
+    workdir = tempfile.mkdtemp(prefix='ml_benchmark_')
+    try:
+        for rows in scales:
+            print(f"\n📏 {rows:,} rows")
+            csv_path = _scaled_bot_csv(rows, workdir)
+            print("   data")
+            with timer.stage('data', rows, 'csv_load'):
+                source = pd.read_csv(csv_path)
+            with timer.stage('data', rows, 'sanitize'):
+                for column in STRING_COLUMNS:
+                    source[column] = [sanitize_input(str(x)) for x in source[column]]
+            with timer.stage('data', rows, 'feature_store'):
+                store = UserFeatureStore.build(csv_path)
+            del source
+            for name in models:
+                print(f"   {name}")
+                _model_stages(timer, name, rows, store, workdir, render_plots)
+    finally:
+        if trace_allocations:
+            tracemalloc.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return timer.records
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return 'unknown'
+
+
+def save_results(records, output=None, trace_allocations=False):
+    commit = _git_commit()
+    if output is None:
+        os.makedirs(BENCHMARK_DIR, exist_ok=True)
+        output = os.path.join(BENCHMARK_DIR, f"ml_benchmark-{datetime.now():%Y%m%dT%H%M%S}-{commit}.json")
+    meta = {
+        'commit': commit,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'cpu_count': os.cpu_count(),
+        # tracemalloc slows allocation-heavy stages, so compare timings only between runs with the same setting
+        'tracemalloc': trace_allocations,
+    }
+    with open(output, 'w') as f:
+        json.dump({'meta': meta, 'results': records}, f, indent=1, sort_keys=True)
+    return output
+
+
+def compare(baseline_path, records):
+    """Print each stage's time against a previous run"""
+    with open(baseline_path, 'r') as f:
+        baseline = {(r['model'], r['rows'], r['stage']): r['seconds'] for r in json.load(f)['results']}
+    print(f"\n🔍 Compared with {baseline_path}:")
+    print(f"   {'model':<10} {'rows':>9} {'stage':<20} {'before':>9} {'after':>9} {'speedup':>8}")
+    for r in records:
+        before = baseline.get((r['model'], r['rows'], r['stage']))
+        if before is None:
+            continue
+        speedup = before / r['seconds'] if r['seconds'] else float('inf')
+        print(f"   {r['model']:<10} {r['rows']:>9,} {r['stage']:<20} {before:9.3f} {r['seconds']:9.3f} {speedup:7.2f}x")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Time each stage of the Singapore ML pipeline at several scales")
+    parser.add_argument('--scales', nargs='+', type=int, default=DEFAULT_SCALES, help="Training rows per model")
+    parser.add_argument('--models', nargs='+', choices=MODELS, default=MODELS)
+    parser.add_argument('--no-plots', action='store_true', help="Skip the plot rendering stage")
+    parser.add_argument('--trace-allocations', action='store_true',
+                        help="Also record peak Python/numpy allocations per stage (slows the run down)")
+    parser.add_argument('--output', help="Result JSON path (default: benchmarks/ml_benchmark-<time>-<commit>.json)")
+    parser.add_argument('--compare', help="Previous result JSON to compare stage timings against")
+    args = parser.parse_args()
+
+    records = run_benchmark(args.scales, args.models, not args.no_plots, args.trace_allocations)
+    path = save_results(records, args.output, args.trace_allocations)
+    print(f"\n💾 Benchmark results saved to: {path}")
+    if args.compare:
+        compare(args.compare, records)
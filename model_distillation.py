@@ -0,0 +1,164 @@
+"""
+model_distillation.py
+
+Distills the Singapore Senior Care ensembles into compact student models for the fast tier.
+A single shallow regression tree is trained to reproduce each teacher's output: the
+adherence forest's P(adherent) (soft targets, which carry more than the 0/1 labels) and
+the fall risk gradient boosting score. The transfer set is the teacher's own training split
+plus jittered copies of it (TRANSFER_ROWS in all), labeled by the teacher, so the student
+sees the teacher's decision surface around the data and not just at the few training points.
+
+Each candidate depth is reported with its accuracy on the held-out labels, its fidelity to
+the teacher (on jittered copies of the held-out rows) and its single-row latency, next to
+the teacher's. The chosen student is published to the model registry as <teacher>_fast,
+with the teacher version it came from.
+
+    python model_distillation.py [--models medication_adherence fall_risk] [--depth 8]
+"""
+
+import time
+import numpy as np
+from sklearn.model_selection import train_test_split
+from sklearn.tree import DecisionTreeRegressor
+from dataset_cache import frame_digest
+from feature_store import UserFeatureStore
+from model_registry import ModelRegistry, STUDENT_MODELS, publish_model
+from tree_arrays import TreeArrays
+from singapore_ml_models import MedicationAdherenceModel, SingaporeFallRiskModel
+
+CANDIDATE_DEPTHS = [2, 4, 6, 8]
+DEFAULT_DEPTH = 8
+TRANSFER_ROWS = 50_000  # teacher-labeled rows the students learn from
+JITTER_SCALE = 0.3      # noise in standard deviations of each (scaled) feature
+FIDELITY_ROWS = 5_000
+LATENCY_ROWS = 500
+
+
+def _teacher_data(name, store):
+    """Training data and split of a teacher, exactly as singapore_ml_models.py trains it"""
+    if name == 'medication_adherence':
+        model = MedicationAdherenceModel(params={})
+        data = model.prepare_adherence_data(store=store, seed=model.seed)
+        X, y = data[model.FEATURE_COLUMNS], data['medication_adherent']
+        split = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    elif name == 'fall_risk':
+        model = SingaporeFallRiskModel(params={})
+        data = model.prepare_singapore_fall_data(store=store, seed=model.seed)
+        X, y = data[model.FEATURE_COLUMNS], data['fall_risk_score']
+        split = train_test_split(X, y, test_size=0.2, random_state=42)
+    else:
+        raise ValueError(f"No student defined for {name}")
+    return data, split
+
+
+def _teacher_output(trees, X_scaled):
+    """What the student learns: P(adherent) for the forest, the score for gradient boosting"""
+    output = trees.predict_scaled(X_scaled)
+    if trees.kind == 'forest_classifier':
+        return output[:, list(trees.classes).index(1)]
+    return output
+
+
+def _jittered(X_scaled, n_rows, rng):
+    """n_rows drawn from X_scaled with Gaussian noise, in scaled feature space"""
+    rows = X_scaled[rng.integers(0, len(X_scaled), n_rows)]
+    return (rows + rng.normal(0.0, JITTER_SCALE, rows.shape)).astype(np.float32)
+
+
+def _latency_us(trees, X):
+    """Mean single-row latency of TreeArrays.predict on raw rows, in microseconds"""
+    rows = [X[i:i + 1] for i in range(min(LATENCY_ROWS, len(X)))]
+    trees.predict(rows[0])
+    started = time.perf_counter()
+    for row in rows:
+        trees.predict(row)
+    return (time.perf_counter() - started) / len(rows) * 1e6
+
+
+def _quality(name, output, y_test):
+    """Held-out accuracy (adherence) or R² (fall risk) against the true labels"""
+    if name == 'medication_adherence':
+        return {'accuracy': float(np.mean((output >= 0.5) == y_test))}
+    from sklearn.metrics import r2_score
+    return {'r2': float(r2_score(y_test, output))}
+
+
+def _fidelity(name, output, teacher_output):
+    """Agreement with the teacher: same predicted class, or R² against the teacher's scores"""
+    if name == 'medication_adherence':
+        return float(np.mean((output >= 0.5) == (teacher_output >= 0.5)))
+    from sklearn.metrics import r2_score
+    return float(r2_score(teacher_output, output))
+
+
+def distill(name, depth=DEFAULT_DEPTH, store=None, registry=None, seed=42):
+    """Train students of several depths for a teacher, report the trade-off and publish the chosen depth"""
+    print(f"🎓 Distilling {name}...")
+    if store is None:
+        store = UserFeatureStore.load_or_build()
+    if registry is None:
+        registry = ModelRegistry(names=[name]).load()
+    teacher = registry.get(name)
+    if teacher is None:
+        raise RuntimeError(f"No {name} model in the registry - run singapore_ml_models.py first")
+    teacher_trees = teacher.trees if teacher.trees is not None else TreeArrays.from_model(teacher.model, teacher.scaler)
+
+    data, (X_train, X_test, _, y_test) = _teacher_data(name, store)
+    X_test, y_test = X_test.to_numpy(), y_test.to_numpy()
+    rng = np.random.default_rng(seed)
+    X_train_scaled = teacher.transform(X_train)
+    transfer_X = np.vstack([X_train_scaled, _jittered(X_train_scaled, TRANSFER_ROWS - len(X_train_scaled), rng)])
+    transfer_y = _teacher_output(teacher_trees, transfer_X)
+    fidelity_X = _jittered(teacher.transform(X_test), FIDELITY_ROWS, rng)
+    fidelity_y = _teacher_output(teacher_trees, fidelity_X)
+
+    teacher_test = _teacher_output(teacher_trees, teacher.transform(X_test))
+    report = {'teacher': {**_quality(name, teacher_test, y_test),
+                          'latency_us': _latency_us(teacher_trees, X_test),
+                          'n_nodes': len(teacher_trees.feature)}}
+    students = {}
+    for candidate in sorted(set(CANDIDATE_DEPTHS) | {depth}):
+        student = DecisionTreeRegressor(max_depth=candidate, min_samples_leaf=5, random_state=seed)
+        student.fit(transfer_X, transfer_y)
+        student_trees = TreeArrays.from_model(student, teacher.scaler)
+        students[candidate] = student
+        report[f'depth {candidate}'] = {**_quality(name, student_trees.predict(X_test), y_test),
+                                        'fidelity': _fidelity(name, student_trees.predict_scaled(fidelity_X), fidelity_y),
+                                        'latency_us': _latency_us(student_trees, X_test),
+                                        'n_nodes': len(student_trees.feature)}
+
+    quality = 'accuracy' if name == 'medication_adherence' else 'r2'
+    print(f"   {'model':<10} {quality:>8} {'fidelity':>9} {'latency':>10} {'nodes':>7}")
+    for label, row in report.items():
+        fidelity = f"{row['fidelity']:9.3f}" if label != 'teacher' else f"{'-':>9}"
+        print(f"   {label:<10} {row[quality]:8.3f} {fidelity} {row['latency_us']:8.1f}µs {row['n_nodes']:7,}")
+
+    chosen = report[f'depth {depth}']
+    metrics = {**chosen, f'teacher_{quality}': report['teacher'][quality],
+               'teacher_latency_us': report['teacher']['latency_us']}
+    version = publish_model(STUDENT_MODELS[name], students[depth], teacher.scaler, frame_digest(data), metrics,
+                            params={'max_depth': depth, 'min_samples_leaf': 5},
+                            model_dir=registry.model_dir, teacher=(name, teacher.version),
+                            drift_reference=teacher.drift_reference)
+    speedup = report['teacher']['latency_us'] / chosen['latency_us']
+    print(f"✅ {STUDENT_MODELS[name]}: {quality} {chosen[quality]:.3f} vs {report['teacher'][quality]:.3f}, "
+          f"{speedup:.1f}x faster")
+    return version, report
+
+
+def main(names=None, depth=DEFAULT_DEPTH):
+    names = names or list(STUDENT_MODELS)
+    store = UserFeatureStore.load_or_build()
+    registry = ModelRegistry(names=names).load()
+    results = {name: distill(name, depth, store, registry) for name in names}
+    print(f"\n🎉 Distilled {len(results)} models; serve them with tier='fast' (RISK_MODEL_TIER=fast for /risk)")
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Distill the ensembles into fast student models")
+    parser.add_argument('--models', nargs='+', choices=list(STUDENT_MODELS), help="Teachers to distill (default: all)")
+    parser.add_argument('--depth', type=int, default=DEFAULT_DEPTH, help="Depth of the published student trees")
+    args = parser.parse_args()
+    main(args.models, args.depth)
@@ -0,0 +1,105 @@
+"""
+model_features.py
+
+Input features of the Singapore Senior Care ML models, shared by training and inference.
+Column order and the defaults for features the bot does not collect are defined once here,
+so the bot, batch scoring and streaming jobs can build model rows from the feature store
+without importing singapore_ml_models.py and the training stack behind it (sklearn
+estimators, metrics, plotting).
+"""
+
+from datetime import datetime
+
+ADHERENCE_FEATURES = [
+    'age', 'chronic_conditions_count', 'pioneer_generation', 'hdb_flat_type_encoded', 'has_family_nearby',
+    'medisave_balance', 'healthcare_subsidy_eligible', 'preferred_language_encoded', 'medications_per_day',
+    'polyclinic_distance', 'medication_cost_monthly', 'cognitive_score', 'social_support_score',
+    'technology_comfort'
+]
+# Expected values of the simulated features, used when scoring real users
+ADHERENCE_INFERENCE_DEFAULTS = {
+    'polyclinic_distance': 2.0,
+    'medication_cost_monthly': 150.0,
+    'cognitive_score': 25.0,
+    'social_support_score': lambda f: f['has_family_nearby'] * 5 + 3,
+    'technology_comfort': 2.5,
+}
+
+FALL_RISK_FEATURES = [
+    'age', 'bmi', 'chronic_conditions_count', 'medication_count', 'blood_pressure_systolic', 'vision_score',
+    'hearing_score', 'mobility_aid_use', 'home_hazards_count', 'exercise_frequency', 'balance_score',
+    'cognitive_score', 'social_isolation_score', 'previous_falls', 'fear_of_falling',
+    'polyclinic_visits_per_year', 'seasonal_factor', 'hdb_floor_level', 'lift_availability'
+]
+FALL_RISK_INFERENCE_DEFAULTS = {
+    'bmi': 24.0,
+    'medication_count': lambda f: f['medications_per_day'],
+    'blood_pressure_systolic': 135.0,
+    'vision_score': 7.0,
+    'hearing_score': 8.0,
+    'mobility_aid_use': 0.3,
+    'home_hazards_count': 2.0,
+    'exercise_frequency': 3.5,
+    'balance_score': 40.0,
+    'cognitive_score': 25.0,
+    'social_isolation_score': lambda f: (1 - f['has_family_nearby']) * 5 + 2,
+    'previous_falls': 0.5,
+    'fear_of_falling': 3.15,
+    'polyclinic_visits_per_year': 8.0,
+    'seasonal_factor': lambda f: 1.2 if datetime.now().month in [11, 12, 1, 2] else 1.0,
+    'hdb_floor_level': 7.5,
+    'lift_availability': 0.9,
+}
+
+ANOMALY_FEATURES = [
+    'age', 'steps_daily', 'heart_rate_avg', 'blood_pressure_systolic', 'blood_pressure_diastolic',
+    'sleep_hours', 'medication_taken_on_time', 'meals_per_day', 'water_intake_liters',
+    'bathroom_visits', 'emergency_button_pressed', 'family_contact_frequency', 'mood_score',
+    'confusion_episodes', 'temperature_celsius', 'indoor_activity_hours', 'outdoor_activity_hours',
+    'app_usage_minutes', 'missed_appointments', 'weight_kg', 'humidity_comfort', 'air_quality_aqi'
+]
+# Everything but age comes from the daily vitals and activity records
+DAILY_FEATURES = [name for name in ANOMALY_FEATURES if name != 'age']
+
+
+
+# Derived defaults that are the expected value of a noisy training column (the simulation adds
+# N(3, 1) / N(2, 1) to the family term): live values take two levels where training spreads
+# around them, so they would always read as drifted. has_family_nearby, which they follow, is
+# monitored in the adherence model.
+_NOISELESS_DEFAULTS = ['social_support_score', 'social_isolation_score']
+
+
+def _imputed_defaults(defaults):
+    """Features a defaults dict fills with a fixed or noiseless value (other derived ones follow live data)"""
+    return sorted(name for name, default in defaults.items() if not callable(default) or name in _NOISELESS_DEFAULTS)
+
+
+# Features filled with an inference default when scoring real users, per registry model: their
+# live values do not follow the training distribution by construction, so drift monitoring leaves
+# them out. Derived defaults computed exactly as in training (medication_count from
+# medications_per_day, seasonal_factor from the date) are monitored like any other feature.
+IMPUTED_FEATURES = {
+    'medication_adherence': _imputed_defaults(ADHERENCE_INFERENCE_DEFAULTS),
+    'fall_risk': _imputed_defaults(FALL_RISK_INFERENCE_DEFAULTS),
+    'health_anomaly': [],
+}
+
+
+def adherence_features(store, user_ids=None):
+    """Medication adherence model rows for real users from the feature store, in training column order"""
+    return store.model_matrix(ADHERENCE_FEATURES, user_ids, ADHERENCE_INFERENCE_DEFAULTS)
+
+
+def fall_risk_features(store, user_ids=None):
+    """Fall risk model rows for real users from the feature store, in training column order"""
+    return store.model_matrix(FALL_RISK_FEATURES, user_ids, FALL_RISK_INFERENCE_DEFAULTS)
+
+
+def anomaly_features(store, user_ids, daily_records):
+    """
+    Health anomaly model rows for real users: age from the feature store, everything else from
+    daily_records (a DataFrame or {feature: array} aligned with user_ids)
+    """
+    daily = {name: daily_records[name] for name in DAILY_FEATURES}
+    return store.model_matrix(ANOMALY_FEATURES, user_ids, daily)
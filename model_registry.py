@@ -0,0 +1,426 @@
+"""
+model_registry.py
+
+Versioned, hot-reloadable registry of the trained Singapore Senior Care models.
+
+Training publishes each model and scaler as a new immutable version under
+models/singapore_models/registry/<name>/<version>/ and records it in manifest.json
+(version, training-data hash, metrics, drift reference, active version). Consumers keep the active
+versions warm in memory and swap to a newly activated version without restarting:
+the candidate is loaded, validated and warmed up before it replaces the old one,
+and a bad release can be rolled back to the previous version. Tree ensembles are also
+exported as flat arrays (tree_arrays.py) that every serving process memory-maps and shares.
+Distilled students (model_distillation.py) are registered next to their teachers under
+STUDENT_MODELS names and serve the fast tier, only while the teacher version they were
+distilled from is still the active one.
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+import joblib
+import numpy as np
+import portalocker
+import tree_arrays
+from tree_arrays import TreeArrays
+
+logger = logging.getLogger(__name__)
+
+MODEL_DIR = 'models/singapore_models'
+REGISTRY_SUBDIR = 'registry'
+
+# Fixed paths written before the registry existed, used when a model has no manifest entry yet
+LEGACY_MODEL_FILES = {
+    'medication_adherence': ('medication_adherence_model_Singapore.pkl', 'medication_adherence_scaler_Singapore.pkl'),
+    'medication_adherence_US': ('medication_adherence_model_US.pkl', 'medication_adherence_scaler_US.pkl'),
+    'medication_adherence_Japan': ('medication_adherence_model_Japan.pkl', 'medication_adherence_scaler_Japan.pkl'),
+    'medication_adherence_UK': ('medication_adherence_model_UK.pkl', 'medication_adherence_scaler_UK.pkl'),
+    'fall_risk': ('fall_risk_model.pkl', 'fall_risk_scaler.pkl'),
+    'health_anomaly': ('health_anomaly_model.pkl', 'health_anomaly_scaler.pkl'),
+}
+# Compact students distilled from a teacher model, served when callers ask for the fast tier
+STUDENT_MODELS = {'medication_adherence': 'medication_adherence_fast', 'fall_risk': 'fall_risk_fast'}
+SERVING_MODELS = ['medication_adherence', 'fall_risk', 'health_anomaly'] + list(STUDENT_MODELS.values())
+
+
+def _active_version(manifest, name):
+    return manifest['models'].get(name, {}).get('active') or 'legacy'
+
+
+def student_mismatch(name, manifest):
+    """
+    Why the active version of a distilled student can't serve, or None if it can: a student
+    only reproduces the teacher version it was distilled from, so once the teacher is retrained
+    or rolled back it must be distilled again.
+    """
+    teacher_name = next((teacher for teacher, student in STUDENT_MODELS.items() if student == name), None)
+    model_entry = manifest['models'].get(name)
+    if teacher_name is None or not model_entry or not model_entry.get('active'):
+        return None
+    entry = next(v for v in model_entry['versions'] if v['version'] == model_entry['active'])
+    distilled_from = entry.get('teacher', {}).get('version')
+    teacher_version = _active_version(manifest, teacher_name)
+    if distilled_from == teacher_version:
+        return None
+    return (f"{name} {entry['version']} was distilled from {teacher_name} {distilled_from}, "
+            f"but {teacher_version} is active - run model_distillation.py")
+
+
+def _registry_dir(model_dir):
+    return os.path.join(model_dir, REGISTRY_SUBDIR)
+
+
+def _manifest_path(model_dir):
+    return os.path.join(_registry_dir(model_dir), 'manifest.json')
+
+
+def read_manifest(model_dir=MODEL_DIR):
+    try:
+        with open(_manifest_path(model_dir), 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'models': {}}
+
+
+def _write_manifest(manifest, model_dir):
+    path = _manifest_path(model_dir)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)  # readers see the old or the new manifest, never a partial one
+
+
+def _manifest_lock(model_dir):
+    os.makedirs(_registry_dir(model_dir), exist_ok=True)
+    return portalocker.Lock(os.path.join(_registry_dir(model_dir), 'manifest.lock'), 'a', timeout=30)
+
+
+def publish_model(name, model, scaler, data_hash, metrics, model_dir=MODEL_DIR, activate=True, params=None,
+                  teacher=None, drift_reference=None):
+    """
+    Store a trained model as a new version and (by default) make it the active one.
+    teacher is the (name, version) a distilled student was trained from; drift_reference
+    summarizes the training inputs (drift_monitor.drift_reference) for drift monitoring.
+    """
+    version = f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')[:-3]}-{data_hash[:8]}"
+    relative_path = os.path.join(name, version)
+    version_dir = os.path.join(_registry_dir(model_dir), relative_path)
+    tmp_dir = f"{version_dir}.{os.getpid()}.tmp"
+    os.makedirs(tmp_dir, exist_ok=True)
+    joblib.dump(model, os.path.join(tmp_dir, 'model.pkl'))
+    joblib.dump(scaler, os.path.join(tmp_dir, 'scaler.pkl'))
+    if tree_arrays.supports(model):
+        # Flat node arrays (with the scaler fused in) that serving processes memory-map and share
+        trees = TreeArrays.from_model(model, scaler)
+        check_rows = np.random.default_rng(0).standard_normal((256, trees.n_features)) * 2
+        trees.verify(model, check_rows)
+        trees.save(os.path.join(tmp_dir, 'trees'))
+    if os.path.exists(version_dir):
+        shutil.rmtree(version_dir)
+    os.rename(tmp_dir, version_dir)
+
+    entry = {
+        'version': version,
+        'created': datetime.now().isoformat(),
+        'data_hash': data_hash,
+        'metrics': {key: float(value) for key, value in metrics.items()},
+        'n_features': int(len(scaler.mean_)),
+        'path': relative_path,
+    }
+    if params:
+        entry['params'] = params
+    if teacher:
+        entry['teacher'] = {'name': teacher[0], 'version': teacher[1]}
+    if drift_reference:
+        entry['drift_reference'] = drift_reference
+    with _manifest_lock(model_dir):
+        manifest = read_manifest(model_dir)
+        model_entry = manifest['models'].setdefault(name, {'active': None, 'versions': []})
+        model_entry['versions'].append(entry)
+        if activate:
+            model_entry['active'] = version
+        _write_manifest(manifest, model_dir)
+    print(f"📦 Published {name} version {version}")
+    return version
+
+
+def record_tuning(name, params, score, details=None, model_dir=MODEL_DIR):
+    """Store the best hyperparameters found for a model; later training runs pick them up"""
+    with _manifest_lock(model_dir):
+        manifest = read_manifest(model_dir)
+        model_entry = manifest['models'].setdefault(name, {'active': None, 'versions': []})
+        model_entry['tuned'] = {'params': params, 'score': float(score), 'tuned_at': datetime.now().isoformat(),
+                                **(details or {})}
+        _write_manifest(manifest, model_dir)
+
+
+def tuned_params(name, model_dir=MODEL_DIR):
+    """Best hyperparameters recorded by model_tuning.py, or {} if the model was never tuned"""
+    return dict(read_manifest(model_dir)['models'].get(name, {}).get('tuned', {}).get('params', {}))
+
+
+def activate_version(name, version, model_dir=MODEL_DIR):
+    """Point the manifest at an existing version of a model"""
+    with _manifest_lock(model_dir):
+        manifest = read_manifest(model_dir)
+        model_entry = manifest['models'].get(name)
+        if model_entry is None or version not in [v['version'] for v in model_entry['versions']]:
+            raise ValueError(f"Unknown version {version} for model {name}")
+        model_entry['active'] = version
+        _write_manifest(manifest, model_dir)
+
+
+def rollback(name, model_dir=MODEL_DIR):
+    """Re-activate the version published before the active one; returns that version"""
+    # Read and write under one lock, so a concurrent publish is neither lost nor mistaken for the active version
+    with _manifest_lock(model_dir):
+        manifest = read_manifest(model_dir)
+        model_entry = manifest['models'].get(name)
+        if model_entry is None or not model_entry.get('active'):
+            raise ValueError(f"Model {name} has no published versions")
+        versions = [v['version'] for v in model_entry['versions']]
+        position = versions.index(model_entry['active'])
+        if position == 0:
+            raise ValueError(f"{name} is already at its oldest version {versions[0]}")
+        model_entry['active'] = versions[position - 1]
+        _write_manifest(manifest, model_dir)
+    return versions[position - 1]
+
+
+class LoadedModel:
+    """
+    A fitted model with its StandardScaler parameters unpacked for numpy-only scoring.
+    When the version has exported tree arrays they are memory-mapped and used for scoring,
+    and the pickled model is only unpickled if something asks for .model.
+    """
+
+    def __init__(self, name, scaler, model=None, model_path=None, version=None, trees=None, drift_reference=None):
+        self.name = name
+        self.scaler = scaler
+        self.version = version
+        self.trees = trees
+        self.drift_reference = drift_reference
+        self.model_path = model_path
+        self._model = None
+        if model is not None:
+            self._set_model(model)
+        self.mean = np.asarray(scaler.mean_, dtype=np.float64)
+        self.scale = np.asarray(scaler.scale_, dtype=np.float64)
+        self.n_features = len(self.mean)
+
+    def _set_model(self, model):
+        if hasattr(model, 'n_jobs'):
+            # Single-row scoring: spinning up a thread pool costs more than the trees
+            model.n_jobs = 1
+        self._model = model
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._set_model(joblib.load(self.model_path))
+        return self._model
+
+    def transform(self, X):
+        """StandardScaler.transform without validation, returning the float32 rows trees expect"""
+        return ((np.asarray(X, dtype=np.float64) - self.mean) / self.scale).astype(np.float32)
+
+    def validate(self, expected_features=None):
+        """Check shapes and warm the model up with one prediction; raises ValueError if unusable"""
+        if self.trees is not None:
+            model_features = self.trees.n_features
+        else:
+            model_features = getattr(self.model, 'n_features_in_', self.n_features)
+        if model_features != self.n_features:
+            raise ValueError(f"{self.name}: model expects {model_features} features, scaler has {self.n_features}")
+        if expected_features is not None and expected_features != self.n_features:
+            raise ValueError(f"{self.name}: manifest records {expected_features} features, artifact has {self.n_features}")
+        # The training mean scales to all zeros: a typical input every model must handle
+        row = self.transform(self.mean[np.newaxis, :])
+        if self.trees is not None:
+            output = self.trees.predict_scaled(row)
+        elif hasattr(self.model, 'predict_proba'):
+            output = self.model.predict_proba(row)
+        elif hasattr(self.model, 'score_samples'):
+            output = self.model.score_samples(row)
+        else:
+            output = self.model.predict(row)
+        if not np.all(np.isfinite(output)):
+            raise ValueError(f"{self.name}: warm-up prediction is not finite")
+
+
+class ModelRegistry:
+    """
+    Keeps the active version of each model warm and follows the manifest.
+    get() re-checks the manifest at most every check_interval seconds, so a newly
+    activated or rolled-back version is picked up without restarting the bot. The check and
+    any reload run on a background thread: get() always returns the model serving right now
+    and never unpickles or maps files in the caller (e.g. an async Telegram handler).
+    """
+
+    def __init__(self, model_dir=MODEL_DIR, names=None, check_interval=30):
+        self.model_dir = model_dir
+        self.names = list(names or SERVING_MODELS)
+        self.check_interval = check_interval
+        self._models = {}
+        self._manifest_mtime = None
+        self._next_check = 0.0
+        self._refreshing = threading.Lock()
+        self._refresh_thread = None
+
+    def load(self):
+        self.refresh(force=True)
+        self._next_check = time.monotonic() + self.check_interval
+        return self
+
+    def pin(self):
+        """Stop following the manifest: the loaded versions serve until the registry is dropped"""
+        self._next_check = float('inf')
+        return self
+
+    def load_versions(self, versions):
+        """
+        Load exactly the given {name: version} and pin them, e.g. in the worker processes of a
+        batch run, which must score with the versions the run started with. Raises ValueError
+        if one of them cannot be loaded.
+        """
+        manifest = read_manifest(self.model_dir)
+        models = {}
+        for name, version in versions.items():
+            try:
+                models[name] = self._load_candidate(name, manifest, version)
+            except Exception as e:
+                raise ValueError(f"Model {name} version {version} could not be loaded: {e}") from e
+            if models[name] is None:
+                raise ValueError(f"Model {name} version {version} is not in {self.model_dir}")
+        self.names = list(versions)
+        self._models = models
+        return self.pin()
+
+    def _load_candidate(self, name, manifest, version=None):
+        """The active version of a model (or the given one), None if it is not in the registry"""
+        model_entry = manifest['models'].get(name) or {}
+        version = version or _active_version(manifest, name)
+        if version != 'legacy':
+            entry = next((v for v in model_entry.get('versions', []) if v['version'] == version), None)
+            if entry is None:
+                return None
+            version_dir = os.path.join(_registry_dir(self.model_dir), entry['path'])
+            trees_dir = os.path.join(version_dir, 'trees')
+            trees = TreeArrays.load(trees_dir) if os.path.isdir(trees_dir) else None
+            loaded = LoadedModel(name, joblib.load(os.path.join(version_dir, 'scaler.pkl')),
+                                 model_path=os.path.join(version_dir, 'model.pkl'),
+                                 version=entry['version'], trees=trees,
+                                 drift_reference=entry.get('drift_reference'))
+            loaded.validate(entry.get('n_features'))
+            return loaded
+        if name in LEGACY_MODEL_FILES:
+            model_file, scaler_file = LEGACY_MODEL_FILES[name]
+            model_path = os.path.join(self.model_dir, model_file)
+            scaler_path = os.path.join(self.model_dir, scaler_file)
+            if os.path.exists(model_path) and os.path.exists(scaler_path):
+                loaded = LoadedModel(name, joblib.load(scaler_path), model=joblib.load(model_path), version='legacy')
+                loaded.validate()
+                return loaded
+        return None
+
+    def refresh(self, force=False):
+        """Swap in any model whose active version changed; failed candidates leave the current one serving"""
+        try:
+            mtime = os.stat(_manifest_path(self.model_dir)).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if not force and mtime == self._manifest_mtime:
+            return
+        manifest = read_manifest(self.model_dir)
+        for name in self.names:
+            active = _active_version(manifest, name)
+            current = self._models.get(name)
+            mismatch = student_mismatch(name, manifest)
+            if mismatch:
+                # Callers of the fast tier fall back to the teacher until the student is distilled again
+                if current is not None or force:
+                    logger.warning("Not serving %s", mismatch)
+                self._models = {key: value for key, value in self._models.items() if key != name}
+                continue
+            if not force and current is not None and current.version == active:
+                continue
+            try:
+                candidate = self._load_candidate(name, manifest)
+            except Exception as e:
+                logger.error("Model %s version %s failed validation, keeping %s: %s",
+                             name, active, current.version if current else None, e)
+                continue
+            if candidate is None:
+                script = 'model_distillation.py' if name in STUDENT_MODELS.values() else 'singapore_ml_models.py'
+                logger.warning("Model %s not found in %s - run %s first", name, self.model_dir, script)
+                continue
+            # A single reference assignment: concurrent readers see the old or the new model
+            self._models = {**self._models, name: candidate}
+            logger.info("Serving model %s version %s", name, candidate.version)
+        self._manifest_mtime = mtime
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("Model registry refresh failed")
+        finally:
+            self._refreshing.release()
+
+    def maybe_refresh(self):
+        """Start a background refresh when the check interval has passed (one at a time); returns immediately"""
+        now = time.monotonic()
+        if now < self._next_check or not self._refreshing.acquire(blocking=False):
+            return
+        self._next_check = now + self.check_interval
+        self._refresh_thread = threading.Thread(target=self._background_refresh, name='model-registry-refresh',
+                                                daemon=True)
+        self._refresh_thread.start()
+
+    def wait_for_refresh(self, timeout=None):
+        """Block until a running background refresh has finished (for scripts and tests)"""
+        if self._refresh_thread is not None:
+            self._refresh_thread.join(timeout)
+
+    def get(self, name):
+        self.maybe_refresh()
+        return self._models.get(name)
+
+    def __contains__(self, name):
+        return name in self._models
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Inspect or roll back registered models")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    subcommands.add_parser('list', help="Show every model's versions")
+    rollback_parser = subcommands.add_parser('rollback', help="Re-activate the previous version of a model")
+    rollback_parser.add_argument('name')
+    activate_parser = subcommands.add_parser('activate', help="Activate a specific version of a model")
+    activate_parser.add_argument('name')
+    activate_parser.add_argument('version')
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        manifest = read_manifest()
+        for name, model_entry in manifest['models'].items():
+            print(f"{name}:")
+            for entry in model_entry['versions']:
+                marker = '*' if entry['version'] == model_entry['active'] else ' '
+                teacher = f"  teacher={entry['teacher']['version']}" if 'teacher' in entry else ''
+                print(f"  {marker} {entry['version']}  data={entry['data_hash'][:12]}  metrics={entry['metrics']}{teacher}")
+            mismatch = student_mismatch(name, manifest)
+            if mismatch:
+                print(f"    ⚠️ {mismatch}")
+            if 'tuned' in model_entry:
+                print(f"    tuned: {model_entry['tuned']['params']} (score {model_entry['tuned']['score']:.3f})")
+    elif args.command == 'rollback':
+        print(f"✅ {args.name} rolled back to {rollback(args.name)}")
+    else:
+        activate_version(args.name, args.version)
+        print(f"✅ {args.name} now serving {args.version}")
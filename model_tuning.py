@@ -0,0 +1,144 @@
+"""
+model_tuning.py
+
+Hyperparameter tuning for the Singapore Senior Care ML models.
+Each model is tuned with successive halving (HalvingRandomSearchCV): many random configurations
+are cross-validated on a small share of the training rows, and only the best third survive to
+the next round with three times as much data, so a full run fits in a nightly window.
+Candidates are evaluated in parallel on all cores, on the cached training datasets and the
+same train split as singapore_ml_models.py, with fixed folds so runs are comparable.
+The best configuration is stored in the model registry manifest and used by the next training run.
+
+    python model_tuning.py [--models NAME ...] [--candidates N]
+    python singapore_ml_models.py --no-plots   # retrain with the tuned hyperparameters
+"""
+
+import time
+import numpy as np
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 (enables HalvingRandomSearchCV)
+from sklearn.model_selection import HalvingRandomSearchCV, KFold, StratifiedKFold, train_test_split
+from sklearn.metrics import f1_score
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from dataset_cache import frame_digest
+from feature_store import UserFeatureStore
+from model_registry import record_tuning
+from singapore_ml_models import MedicationAdherenceModel, SingaporeFallRiskModel, SingaporeHealthAnomalyModel
+
+COUNTRIES = ['Singapore', 'US', 'Japan', 'UK']
+
+SEARCH_SPACES = {
+    'adherence': {
+        'n_estimators': [50, 100, 200, 300],
+        'max_depth': [None, 6, 10, 16],
+        'min_samples_leaf': [1, 2, 4, 8],
+        'max_features': ['sqrt', 0.5, None],
+    },
+    'fall_risk': {
+        'n_estimators': [50, 100, 200, 300],
+        'learning_rate': [0.01, 0.03, 0.05, 0.1, 0.2],
+        'max_depth': [2, 3, 4],
+        'subsample': [0.7, 0.85, 1.0],
+        'min_samples_leaf': [1, 3, 5],
+    },
+    'health_anomaly': {
+        'n_estimators': [50, 100, 200, 300],
+        'contamination': [0.05, 0.08, 0.1, 0.12, 0.15],
+        'max_samples': ['auto', 0.5, 0.8],
+        'max_features': [0.5, 0.8, 1.0],
+    },
+}
+
+# Rows in the first halving round; 'exhaust' sizes the rounds so the last one uses all training rows.
+# The anomaly search starts larger so every fold of the first round still holds a few anomalies.
+MIN_RESOURCES = {'health_anomaly': 300}
+
+
+def _anomaly_f1(estimator, X, y):
+    """F1 on the anomaly class; IsolationForest predicts -1 for anomalies"""
+    return f1_score(y, (estimator.predict(X) == -1).astype(int))
+
+
+def _tuning_problem(name, store):
+    """Estimator, training rows, folds and scoring for one registry model, split as in training"""
+    if name.startswith('medication_adherence'):
+        country = name[len('medication_adherence_'):] or 'Singapore'
+        model = MedicationAdherenceModel(country=country, n_jobs=1, params={})
+        data = model.prepare_adherence_data(store=store, seed=model.seed)
+        X, y = data[model.FEATURE_COLUMNS], data['medication_adherent']
+        X_train, _, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+        cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+        return model.model, SEARCH_SPACES['adherence'], X_train, y_train, cv, 'accuracy', data
+    if name == 'fall_risk':
+        model = SingaporeFallRiskModel(params={})
+        data = model.prepare_singapore_fall_data(store=store, seed=model.seed)
+        X, y = data[model.FEATURE_COLUMNS], data['fall_risk_score']
+        X_train, _, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=42)
+        cv = KFold(n_splits=5, shuffle=True, random_state=42)
+        return model.model, SEARCH_SPACES['fall_risk'], X_train, y_train, cv, 'r2', data
+    if name == 'health_anomaly':
+        model = SingaporeHealthAnomalyModel(params={})
+        model.model.set_params(n_jobs=1)
+        data = model.prepare_singapore_anomaly_data(store=store, seed=model.seed)
+        X, y = data[model.ANOMALY_FEATURES], data['is_anomaly']
+        X_train, _, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=42)
+        # Stratified so every fold has anomalies to score; the forest itself ignores the labels
+        cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+        return model.model, SEARCH_SPACES['health_anomaly'], X_train, y_train, cv, _anomaly_f1, data
+    raise ValueError(f"Unknown model: {name}")
+
+
+def tune_model(name, n_candidates=60, n_jobs=-1, store=None):
+    """Successive-halving search for one model; records and returns the best configuration"""
+    print(f"🎛️ Tuning {name}...")
+    started = time.perf_counter()
+    if store is None:
+        store = UserFeatureStore.load_or_build()
+    estimator, space, X_train, y_train, cv, scoring, data = _tuning_problem(name, store)
+
+    # Scaling inside the pipeline keeps every fold's scaler fitted on that fold's training rows
+    pipeline = Pipeline([('scaler', StandardScaler()), ('model', estimator)])
+    search = HalvingRandomSearchCV(
+        pipeline,
+        {f'model__{param}': values for param, values in space.items()},
+        n_candidates=min(n_candidates, int(np.prod([len(values) for values in space.values()]))),
+        factor=3,
+        min_resources=MIN_RESOURCES.get(name, 'exhaust'),
+        cv=cv,
+        scoring=scoring,
+        random_state=42,
+        n_jobs=n_jobs,
+    )
+    search.fit(X_train, y_train)
+
+    best_params = {param[len('model__'):]: value for param, value in search.best_params_.items()}
+    elapsed = time.perf_counter() - started
+    record_tuning(name, best_params, search.best_score_, {
+        'scoring': scoring if isinstance(scoring, str) else 'anomaly_f1',
+        'candidates': int(search.n_candidates_[0]),
+        'rounds': int(search.n_iterations_),
+        'data_hash': frame_digest(data),
+        'elapsed_seconds': round(elapsed, 1),
+    })
+    print(f"✅ {name}: best CV score {search.best_score_:.3f} with {best_params} ({elapsed:.1f}s)")
+    return best_params, search.best_score_
+
+
+def main(names=None, n_candidates=60):
+    names = names or ['medication_adherence', 'fall_risk', 'health_anomaly']
+    store = UserFeatureStore.load_or_build()
+    started = time.perf_counter()
+    results = {name: tune_model(name, n_candidates=n_candidates, store=store) for name in names}
+    print(f"\n🎉 Tuned {len(results)} models in {time.perf_counter() - started:.1f}s")
+    print("💾 Best configurations saved to the model registry manifest (python model_registry.py list)")
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    model_names = [MedicationAdherenceModel.registry_name(country) for country in COUNTRIES] + ['fall_risk', 'health_anomaly']
+    parser = argparse.ArgumentParser(description="Tune the Singapore senior care ML models")
+    parser.add_argument('--models', nargs='+', choices=model_names, help="Models to tune (default: the three served by the bot)")
+    parser.add_argument('--candidates', type=int, default=60, help="Configurations sampled in the first round")
+    args = parser.parse_args()
+    main(args.models, args.candidates)
@@ -0,0 +1,184 @@
+"""
+online_adherence.py
+
+Online medication adherence learning from real reminder confirmations.
+Every Taken / Missed answer to a /remind message is logged to the medication log and becomes a
+labeled example. Answers are logged under the Telegram id and mapped to the user's health profile
+before they are featurized. Examples are buffered and applied in mini-batches to an incremental logistic
+regression (SGDClassifier.partial_fit) over the same features as MedicationAdherenceModel, so the
+model follows the real population without retraining the forest. The model is saved after every
+answer with its pending examples, so a restart does not drop a half-filled mini-batch; the bot
+records answers off the event loop (asyncio.to_thread), so the save never stalls other chats.
+
+Each mini-batch is first scored by both the online model and the published forest before it is
+learned from (test-then-train), which gives a rolling holdout over the most recent examples.
+The inference service switches to the online model once it beats the forest on that holdout.
+
+    python online_adherence.py   # rebuild the online model from the whole medication log
+"""
+
+import logging
+import os
+import threading
+from collections import deque
+import joblib
+import numpy as np
+from bot_utils import load_medication_log, load_user_profiles, resolve_profile_id
+from model_features import adherence_features
+from inference_service import adherent_proba
+
+logger = logging.getLogger(__name__)
+
+ONLINE_MODEL_PATH = 'data/singapore/online/online_adherence.pkl'
+CLASSES = np.array([0, 1])  # 0 = missed, 1 = taken
+
+
+def _log_loss(p_adherent, y):
+    p = np.clip(np.where(y == 1, p_adherent, 1.0 - p_adherent), 1e-6, 1.0)
+    return -np.log(p)
+
+
+class OnlineAdherenceModel:
+    """Incremental adherence classifier with a rolling test-then-train comparison against the forest"""
+
+    def __init__(self, batch_size=32, window=500, min_holdout=100):
+        # Imported here so the bot only loads sklearn's linear models when it has no saved model
+        from sklearn.linear_model import SGDClassifier
+        from sklearn.preprocessing import StandardScaler
+        self.scaler = StandardScaler()
+        # A constant step size keeps adapting as the population drifts, and stays well calibrated
+        self.model = SGDClassifier(loss='log_loss', alpha=1e-3, learning_rate='constant', eta0=0.01, random_state=42)
+        self.batch_size = batch_size
+        self.min_holdout = min_holdout
+        self.n_seen = 0
+        self._pending_X, self._pending_y = [], []
+        # (online log loss, forest log loss, online correct, forest correct) per holdout example
+        self.holdout = deque(maxlen=window)
+
+    @property
+    def pending(self):
+        """Examples queued for the next mini-batch"""
+        return sum(len(y) for y in self._pending_y)
+
+    @property
+    def fitted(self):
+        return self.n_seen > 0
+
+    def adherent_proba(self, X):
+        """P(taken) for raw feature rows"""
+        proba = self.model.predict_proba(self.scaler.transform(X))
+        return proba[:, list(self.model.classes_).index(1)]
+
+    def observe(self, X, taken, forest=None):
+        """Queue labeled example rows; learns once batch_size examples are pending. Returns True after an update"""
+        self._pending_X.append(np.atleast_2d(np.asarray(X, dtype=np.float32)))
+        self._pending_y.append(np.atleast_1d(np.asarray(taken, dtype=int)))
+        if self.pending < self.batch_size:
+            return False
+        self.update(forest)
+        return True
+
+    def update(self, forest=None):
+        """Apply the pending mini-batch: score it with both models first, then learn from it"""
+        if not self._pending_y:
+            return
+        X, y = np.vstack(self._pending_X), np.concatenate(self._pending_y)
+        self._pending_X, self._pending_y = [], []
+
+        if self.fitted and forest is not None:
+            online_p = self.adherent_proba(X)
+            forest_p = adherent_proba(forest, X)
+            self.holdout.extend(zip(_log_loss(online_p, y), _log_loss(forest_p, y),
+                                    (online_p >= 0.5) == y, (forest_p >= 0.5) == y))
+
+        self.scaler.partial_fit(X)
+        self.model.partial_fit(self.scaler.transform(X), y, classes=CLASSES)
+        self.n_seen += len(y)
+
+    def report(self):
+        """Rolling holdout metrics for the online model and the forest"""
+        if not self.holdout:
+            return {'examples_seen': self.n_seen, 'holdout_size': 0}
+        online_loss, forest_loss, online_correct, forest_correct = (np.asarray(col) for col in zip(*self.holdout))
+        return {
+            'examples_seen': self.n_seen,
+            'holdout_size': len(self.holdout),
+            'online_log_loss': float(online_loss.mean()),
+            'forest_log_loss': float(forest_loss.mean()),
+            'online_accuracy': float(online_correct.mean()),
+            'forest_accuracy': float(forest_correct.mean()),
+        }
+
+    def preferred(self):
+        """True once the online model beats the forest's log loss over a full enough holdout"""
+        metrics = self.report()
+        return metrics['holdout_size'] >= self.min_holdout and metrics['online_log_loss'] < metrics['forest_log_loss']
+
+    def save(self, path=ONLINE_MODEL_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        joblib.dump(self, tmp_path)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load_or_create(cls, path=ONLINE_MODEL_PATH):
+        if os.path.exists(path):
+            try:
+                return joblib.load(path)
+            except Exception as e:
+                logger.warning("Could not load online adherence model %s, starting fresh: %s", path, e)
+        return cls()
+
+
+class OnlineAdherenceLearner:
+    """Feeds reminder outcomes from the bot into the online model, featurized from the inference service"""
+
+    def __init__(self, service, model=None, path=ONLINE_MODEL_PATH):
+        self.service = service
+        self.model = model if model is not None else OnlineAdherenceModel.load_or_create(path)
+        self.path = path
+        # Answers are recorded from worker threads; one at a time updates and saves the model
+        self._lock = threading.Lock()
+
+    def record_outcome(self, telegram_id, taken):
+        """Learn from one Taken / Missed answer of a Telegram user; users without a feature profile are skipped"""
+        user_id = resolve_profile_id(telegram_id)
+        if user_id not in self.service.store:
+            return
+        X = adherence_features(self.service.store, [user_id])
+        with self._lock:
+            updated = self.model.observe(X, taken, self.service.registry.get('medication_adherence'))
+            # Saved on every answer, so examples still pending are not lost on restart
+            self.model.save(self.path)
+        if updated:
+            logger.info("Online adherence model updated: %s", self.model.report())
+
+
+def load_online_learner(service):
+    """Attach an online learner to the inference service; None when live inference is unavailable"""
+    if service is None:
+        return None
+    learner = OnlineAdherenceLearner(service)
+    service.online = learner.model
+    return learner
+
+
+def rebuild_from_log(service, path=ONLINE_MODEL_PATH):
+    """Replay the whole medication log into a fresh online model"""
+    model = OnlineAdherenceModel()
+    forest = service.registry.get('medication_adherence')
+    profiles = load_user_profiles()
+    for entry in load_medication_log():
+        user_id = resolve_profile_id(entry['user_id'], profiles)
+        if user_id in service.store:
+            model.observe(adherence_features(service.store, [user_id]), entry['taken'], forest)
+    model.update(forest)
+    model.save(path)
+    return model
+
+
+if __name__ == "__main__":
+    from inference_service import RiskInferenceService
+    model = rebuild_from_log(RiskInferenceService())
+    print(f"✅ Online adherence model rebuilt: {model.report()}")
+    print(f"   Serving: {'online model' if model.preferred() else 'forest'}")
@@ -1,6 +1,8 @@
+import asyncio
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import ContextTypes
-from bot_utils import load_user_medications, save_user_medications
+from bot_utils import load_user_medications, save_user_medications, log_medication_outcome
+from bot_events import log_event
 
 async def remind(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = str(update.effective_user.id)
@@ -17,13 +19,19 @@ async def remind(update: Update, context: ContextTypes.DEFAULT_TYPE):
             [
                 InlineKeyboardButton("Yes", callback_data=f"remind_yes_{med_key}"),
                 InlineKeyboardButton("No", callback_data=f"remind_no_{med_key}")
+            ],
+            [
+                InlineKeyboardButton("✅ Taken", callback_data=f"med_taken_{med_key}"),
+                InlineKeyboardButton("❌ Missed", callback_data=f"med_missed_{med_key}")
             ]
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         await update.message.reply_text(
-            f"💊 {med['name']} ({times})\nRemind you for this medication? (Current: {'Yes' if remind_status else 'No'})",
+            f"💊 {med['name']} ({times})\nRemind you for this medication? (Current: {'Yes' if remind_status else 'No'})\n"
+            f"Did you take your last dose?",
             reply_markup=reply_markup
         )
+        log_event('reminder_menu_shown', user_id, med=med_key)
 
 async def remind_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
@@ -45,4 +53,29 @@ async def remind_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
         else:
             await query.answer()
-            await query.edit_message_text("Medication not found.")
\ No newline at end of file
+            await query.edit_message_text("Medication not found.")
+
+async def med_outcome_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Log a Taken / Missed answer and feed it to the online adherence model."""
+    query = update.callback_query
+    user_id = str(query.from_user.id)
+    user_meds = load_user_medications().get(user_id, {})
+    taken = query.data.startswith("med_taken_")
+    med_key = query.data.split("_", 2)[2]
+    await query.answer()
+    if med_key not in user_meds:
+        await query.edit_message_text("Medication not found.")
+        return
+
+    log_medication_outcome(user_id, med_key, user_meds[med_key]['name'], taken)
+    log_event('medication_taken' if taken else 'medication_missed', user_id, med=med_key)
+    learner = context.bot_data.get('online_adherence')
+    if learner is not None:
+        # Featurizing and saving the model touch disk, so they run off the event loop
+        await asyncio.to_thread(learner.record_outcome, user_id, taken)
+    if taken:
+        await query.edit_message_text(f"✅ Great! {user_meds[med_key]['name']} marked as taken.")
+    else:
+        await query.edit_message_text(
+            f"📝 {user_meds[med_key]['name']} marked as missed. Take it as soon as you can, unless your doctor advised otherwise."
+        )
@@ -0,0 +1,32 @@
+from telegram import Update
+from telegram.ext import ContextTypes
+from config import Config
+from bot_utils import resolve_profile_id
+
+async def risk(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # Scores are keyed by the health profile's user_id, not the Telegram id
+    user_id = resolve_profile_id(update.effective_user.id)
+    risk_table = context.bot_data.get('risk_table')
+    service = context.bot_data.get('inference')
+    scores = risk_table.get(user_id) if risk_table is not None else None
+    if scores is None and service is None:
+        await update.message.reply_text("Risk insights are not available right now. Please try again later.")
+        return
+
+    if scores is None:
+        scores = service.user_risk(user_id, Config.RISK_MODEL_TIER)
+    if scores is None:
+        await update.message.reply_text("📋 No health profile found for you yet, so I can't estimate your risks.")
+        return
+
+    msg = "🩺 Your Health Risk Insights:\n"
+    if scores['fall_risk'] is not None:
+        msg += f"\n🚶 Fall risk score: {scores['fall_risk']:.0f}/100"
+    if scores['adherence_risk'] is not None:
+        msg += f"\n💊 Chance of missing medication: {scores['adherence_risk']:.0%}"
+    if scores.get('anomaly_flag'):
+        msg += "\n⚠️ Your latest health readings look unusual for you."
+    if scores.get('scored_at'):
+        msg += f"\n\n🕒 As of {scores['scored_at']:%d %b %Y, %H:%M}"
+    msg += "\n\nThese are estimates only. Please talk to your doctor about any concerns."
+    await update.message.reply_text(msg)
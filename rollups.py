@@ -0,0 +1,315 @@
+"""
+rollups.py
+
+Materialized rollup tables for the Singapore health dashboards.
+When data is ingested, the daily polyclinic and hospital records are folded into small
+pre-aggregated tables, so a dashboard render reads a few thousand rows instead of regrouping
+the full history:
+  daily     per date and district
+  monthly   per month and facility (with its town and district)
+  seasonal  per year, calendar month and district (the seasonal heatmap)
+and the chronic disease prevalence into one table per district and condition.
+
+Tables hold partial aggregates (sums and counts, so means stay exact), which is what makes
+them incremental: each dataset keeps a watermark (the last day ingested), and a refresh folds
+in only the days after it, read from the Parquet lake with a date predicate (or from the CSV
+in typed chunks). Days are append-only; a corrected past day needs --rebuild.
+Rollups are rebuilt by singapore_data_setup.py when it regenerates the data.
+
+A refresh holds a lock on the dataset's rollup directory from reading the saved tables to
+writing the manifest (last), and loading takes the same lock: dashboard sessions (threads of one
+Streamlit process) and other processes see one consistent snapshot of the tables and never race
+on the temporary files.
+
+    python rollups.py [--rebuild] [--datasets polyclinic_attendance ...]
+"""
+
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+import portalocker
+from csv_ingest import StreamingAggregate, iter_csv_chunks
+from data_lake import LAKE_DIR, RAW_DIR, iter_lake, lake_info
+from dataset_cache import file_digest
+
+ROLLUP_DIR = 'data/singapore/rollups'
+
+# Town and district of the named facilities; simulated extra ones ('Polyclinic 19', ...)
+# are their own town in district 'Other'
+FACILITY_LOCATIONS = {
+    'SGH': ('Bukit Merah', 'Central'), 'NUH': ('Clementi', 'West'), 'TTSH': ('Toa Payoh', 'Central'),
+    'CGH': ('Tampines', 'East'), 'KTPH': ('Yishun', 'North'), 'AH': ('Queenstown', 'Central'),
+    'IMH': ('Hougang', 'North-East'), 'KKH': ('Kallang/Whampoa', 'Central'),
+    'Ang Mo Kio': ('Ang Mo Kio', 'North-East'), 'Bedok': ('Bedok', 'East'),
+    'Bukit Batok': ('Bukit Batok', 'West'), 'Clementi': ('Clementi', 'West'), 'Geylang': ('Geylang', 'Central'),
+    'Hougang': ('Hougang', 'North-East'), 'Jurong': ('Jurong West', 'West'),
+    'Kallang': ('Kallang/Whampoa', 'Central'), 'Marine Parade': ('Marine Parade', 'East'),
+    'Pasir Ris': ('Pasir Ris', 'East'), 'Punggol': ('Punggol', 'North-East'),
+    'Queenstown': ('Queenstown', 'Central'), 'Sembawang': ('Sembawang', 'North'),
+    'Sengkang': ('Sengkang', 'North-East'), 'Tampines': ('Tampines', 'East'),
+    'Toa Payoh': ('Toa Payoh', 'Central'), 'Woodlands': ('Woodlands', 'North'), 'Yishun': ('Yishun', 'North'),
+}
+
+_POLYCLINIC_VALUES = {column: (column, 'sum') for column in
+                      ['total_attendance', 'elderly_attendance', 'chronic_disease_consultations', 'medication_refills']}
+_POLYCLINIC_VALUES['facility_days'] = ('total_attendance', 'count')
+_HOSPITAL_VALUES = {
+    'total_beds': ('total_beds', 'sum'),
+    'occupied_beds': ('occupied_beds', 'sum'),
+    'occupancy_rate': ('occupancy_rate', 'mean'),
+    'elderly_patients_pct': ('elderly_patients_pct', 'mean'),
+    'facility_days': ('occupancy_rate', 'count'),
+}
+
+# dataset -> facility column (None for undated data) and grain -> (group columns, aggregations)
+ROLLUPS = {
+    'polyclinic_attendance': ('polyclinic', {
+        'daily': (['date', 'district'], _POLYCLINIC_VALUES),
+        'monthly': (['month', 'polyclinic', 'town', 'district'], _POLYCLINIC_VALUES),
+        'seasonal': (['year', 'month_of_year', 'district'], _POLYCLINIC_VALUES),
+    }),
+    'hospital_bed_occupancy': ('hospital', {
+        'daily': (['date', 'district'], _HOSPITAL_VALUES),
+        'monthly': (['month', 'hospital', 'town', 'district'], _HOSPITAL_VALUES),
+        'seasonal': (['year', 'month_of_year', 'district'], _HOSPITAL_VALUES),
+    }),
+    'chronic_disease_prevalence': (None, {
+        'by_district': (['district', 'condition'], {
+            'prevalence_rate': ('prevalence_rate', 'mean'),
+            'estimated_cases': ('estimated_cases', 'sum'),
+        }),
+    }),
+}
+
+
+def _per_facility(codes, values):
+    """Categorical with values[code] for each row's facility code, without per-row string work"""
+    categories = sorted(set(values))
+    position = {value: i for i, value in enumerate(categories)}
+    return pd.Categorical.from_codes(np.array([position[value] for value in values])[codes], categories=categories)
+
+
+def _with_keys(facility, chunk):
+    """A chunk with the derived rollup keys: calendar keys from the date, town and district from the facility"""
+    if facility is None:
+        return chunk
+    date = pd.to_datetime(chunk['date'])
+    names = chunk[facility].astype('category')
+    locations = [FACILITY_LOCATIONS.get(str(name), (str(name), 'Other')) for name in names.cat.categories]
+    codes = names.cat.codes.to_numpy()
+    return chunk.assign(
+        date=date,
+        month=date.to_numpy().astype('datetime64[M]').astype(date.dtype),
+        year=date.dt.year,
+        month_of_year=date.dt.month,
+        town=_per_facility(codes, [town for town, _ in locations]),
+        district=_per_facility(codes, [district for _, district in locations]),
+    )
+
+
+_held_locks = threading.local()
+
+
+@contextmanager
+def rollup_lock(directory):
+    """Exclusive lock on a rollup directory across processes and threads; re-entrant within a thread"""
+    held = _held_locks.__dict__.setdefault('directories', set())
+    key = os.path.abspath(directory)
+    if key in held:
+        yield
+        return
+    os.makedirs(directory, exist_ok=True)
+    with portalocker.Lock(os.path.join(directory, '.lock'), 'a', timeout=60):
+        held.add(key)
+        try:
+            yield
+        finally:
+            held.discard(key)
+
+
+def atomic_write(path, write):
+    """Call write(tmp_path) on a unique temporary file next to path, then move it over path"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f"{os.path.basename(path)}.", suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _dump_json(value, path):
+    with open(path, 'w') as f:
+        json.dump(value, f, indent=1)
+
+
+def _month_start(frame):
+    """First day of each rollup row's period, for date filters on monthly and seasonal tables"""
+    if 'date' in frame:
+        return frame['date']
+    if 'month' in frame:
+        return frame['month']
+    return pd.to_datetime(dict(year=frame['year'], month=frame['month_of_year'], day=1))
+
+
+class Rollups:
+    """
+    The rollup tables of one dataset, loaded from rollup_dir (or empty with rebuild=True).
+    update() folds in rows newer than the saved watermark; save() writes the tables atomically.
+    """
+
+    def __init__(self, dataset, rollup_dir=ROLLUP_DIR, rebuild=False):
+        if dataset not in ROLLUPS:
+            raise ValueError(f"No rollups defined for {dataset}")
+        self.dataset = dataset
+        self.facility, self.grains = ROLLUPS[dataset]
+        self.path = os.path.join(rollup_dir, dataset)
+        self.aggregates = {grain: StreamingAggregate(by, aggregations)
+                           for grain, (by, aggregations) in self.grains.items()}
+        manifest = None
+        if not rebuild and os.path.exists(self.path):
+            with rollup_lock(self.path):
+                manifest = self._manifest()
+                for grain, (by, aggregations) in self.grains.items():
+                    if manifest is not None:
+                        state = pd.read_parquet(os.path.join(self.path, f"{grain}.parquet"))
+                        self.aggregates[grain] = StreamingAggregate.from_state(by, aggregations, state,
+                                                                               manifest['rows'])
+        self.since = pd.Timestamp(manifest['watermark']) if manifest and manifest['watermark'] else None
+        self.watermark = self.since
+        self.source = manifest['source'] if manifest else None
+
+    def _manifest(self):
+        path = os.path.join(self.path, '_rollups.json')
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    @property
+    def empty(self):
+        return all(aggregate.state is None for aggregate in self.aggregates.values())
+
+    def update(self, chunk):
+        """Fold a chunk of raw rows into every table; days up to the saved watermark are skipped"""
+        if self.facility is not None:
+            if self.since is not None:
+                chunk = chunk[pd.to_datetime(chunk['date']) > self.since]
+            chunk = _with_keys(self.facility, chunk)
+            if len(chunk):
+                latest = chunk['date'].max()
+                self.watermark = latest if self.watermark is None else max(self.watermark, latest)
+        for aggregate in self.aggregates.values():
+            aggregate.update(chunk)
+        return len(chunk)
+
+    def save(self, source=None):
+        """Write the tables, then the manifest (watermark, rows and source), under the directory's lock"""
+        self.source = source or self.source
+        manifest = {
+            'dataset': self.dataset,
+            'watermark': None if self.watermark is None else f"{self.watermark:%Y-%m-%d}",
+            'rows': int(next(iter(self.aggregates.values())).rows),
+            'source': self.source,
+            'updated': pd.Timestamp.now().replace(microsecond=0).isoformat(),
+        }
+        with rollup_lock(self.path):
+            for grain, aggregate in self.aggregates.items():
+                state = aggregate.state_frame()
+                # Categorical keys from different chunks come back as objects; store them as strings
+                for column in aggregate.by:
+                    if not pd.api.types.is_numeric_dtype(state[column]) and \
+                            not pd.api.types.is_datetime64_any_dtype(state[column]):
+                        state[column] = state[column].astype(str)
+                atomic_write(os.path.join(self.path, f"{grain}.parquet"),
+                             lambda tmp_path: state.to_parquet(tmp_path, index=False))
+            atomic_write(os.path.join(self.path, '_rollups.json'), lambda tmp_path: _dump_json(manifest, tmp_path))
+
+    def table(self, grain, by=None, start=None, end=None, **filters):
+        """
+        A rollup table, finished (means computed): optionally only periods overlapping
+        [start, end], only rows whose key columns are in filters (e.g. district=['East']), and
+        regrouped to the coarser keys `by` (e.g. by=['month'] for all facilities together)
+        """
+        aggregate = self.aggregates[grain]
+        state = aggregate.state_frame()
+        if len(state):
+            keep = pd.Series(True, index=state.index)
+            if start is not None or end is not None:
+                period = _month_start(state)
+                if start is not None:
+                    start = pd.Timestamp(start)
+                    keep &= period >= (start if 'date' in state else start.to_period('M').to_timestamp())
+                if end is not None:
+                    keep &= period <= pd.Timestamp(end)
+            for column, values in filters.items():
+                if values is not None:
+                    keep &= state[column].astype(str).isin([str(value) for value in values])
+            state = state[keep]
+        filtered = StreamingAggregate.from_state(aggregate.by, aggregate.aggregations, state, aggregate.rows)
+        return (filtered.regroup(by) if by is not None else filtered).result()
+
+
+def source_signature(dataset, csv_path, lake_dir=LAKE_DIR):
+    """What rollups are built from: the lake's creation time for daily data with a lake, else the CSV's digest"""
+    info = lake_info(dataset, lake_dir) if ROLLUPS[dataset][0] is not None else None
+    if info is not None:
+        return f"lake:{info['created']}"
+    return f"csv:{file_digest(csv_path)[:16]}"
+
+
+def refresh_rollups(dataset, rebuild=False, raw_dir=RAW_DIR, lake_dir=LAKE_DIR, rollup_dir=ROLLUP_DIR):
+    """
+    Bring a dataset's rollups up to date and save them; returns the Rollups.
+    Dated datasets fold in only the days after the watermark; undated ones (chronic disease
+    prevalence) are rebuilt when their CSV changed.
+    """
+    facility, _ = ROLLUPS[dataset]
+    csv_path = os.path.join(raw_dir, f"{dataset}.csv")
+    source = source_signature(dataset, csv_path, lake_dir)
+    # Held from reading the saved tables to saving the new ones, so concurrent refreshes queue up
+    with rollup_lock(os.path.join(rollup_dir, dataset)):
+        rollups = Rollups(dataset, rollup_dir, rebuild=rebuild)
+        if facility is None:
+            if not rollups.empty and rollups.source == source:
+                return rollups
+            rollups = Rollups(dataset, rollup_dir, rebuild=True)
+
+        if facility is not None and lake_info(dataset, lake_dir) is not None:
+            start = None if rollups.since is None else rollups.since + pd.Timedelta(days=1)
+            chunks = iter_lake(dataset, start=start, lake_dir=lake_dir)
+        else:
+            chunks = iter_csv_chunks(csv_path, dataset)
+        added = sum(rollups.update(chunk) for chunk in chunks)
+        rollups.save(source)
+    print(f"✅ {dataset} rollups: {added:,} new rows folded in"
+          + (f", up to {rollups.watermark:%Y-%m-%d}" if rollups.watermark is not None else ''))
+    return rollups
+
+
+def load_rollups(dataset, rollup_dir=ROLLUP_DIR):
+    """Saved rollups of a dataset, or None if they have not been built"""
+    rollups = Rollups(dataset, rollup_dir)
+    return None if rollups.empty else rollups
+
+
+def main(datasets=None, rebuild=False, raw_dir=RAW_DIR, lake_dir=LAKE_DIR, rollup_dir=ROLLUP_DIR):
+    for dataset in datasets or list(ROLLUPS):
+        refresh_rollups(dataset, rebuild, raw_dir, lake_dir, rollup_dir)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Build or incrementally refresh the dashboard rollup tables")
+    parser.add_argument('--datasets', nargs='+', choices=list(ROLLUPS), help="Datasets to refresh (default: all)")
+    parser.add_argument('--rebuild', action='store_true', help="Rebuild from scratch instead of adding new days")
+    parser.add_argument('--raw-dir', default=RAW_DIR)
+    parser.add_argument('--lake-dir', default=LAKE_DIR)
+    parser.add_argument('--rollup-dir', default=ROLLUP_DIR)
+    args = parser.parse_args()
+    main(args.datasets, args.rebuild, args.raw_dir, args.lake_dir, args.rollup_dir)
@@ -4,27 +4,31 @@ security_utils.py
 Reusable security and privacy utilities for Singapore Senior Care Bot.
 - Encryption/decryption for sensitive data (e.g., contact IDs, chat IDs)
 - Input sanitization for user data
+cryptography is imported on first use, so modules that only sanitize input load quickly.
 """
 
-from cryptography.fernet import Fernet
 import html
 
 # --- Encryption Utilities ---
 def generate_key():
     """Generate a new Fernet key (store securely, e.g., in .env or secrets manager)"""
+    from cryptography.fernet import Fernet
     return Fernet.generate_key()
 
 def generate_fernet_key():
     """Generate a new Fernet key as a string (for bot.py compatibility)."""
+    from cryptography.fernet import Fernet
     return Fernet.generate_key().decode()
 
 def encrypt_data(data: str, key: bytes) -> bytes:
     """Encrypt a string using Fernet key"""
+    from cryptography.fernet import Fernet
     cipher = Fernet(key)
     return cipher.encrypt(data.encode())
 
 def decrypt_data(token: bytes, key: bytes) -> str:
     """Decrypt a Fernet-encrypted token"""
+    from cryptography.fernet import Fernet
     cipher = Fernet(key)
     return cipher.decrypt(token).decode()
 
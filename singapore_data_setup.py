@@ -2,11 +2,15 @@
 # Download and prepare Singapore-specific datasets for the capstone project
 
 import pandas as pd
+import numpy as np
 import requests
 import json
 import os
 from datetime import datetime, timedelta
 import sqlite3
+from csv_ingest import read_csv_typed
+from data_lake import LAKE_DIR, LAKE_DATASETS, RAW_DIR, LakeWriter
+from rollups import ROLLUP_DIR, ROLLUPS, Rollups, source_signature
 
 def setup_singapore_data_environment():
     """Set up the data environment for Singapore datasets"""
@@ -25,13 +29,43 @@ def setup_singapore_data_environment():
         os.makedirs(directory, exist_ok=True)
         print(f"✅ Created directory: {directory}")
 
-def download_singapore_health_data():
+# Facilities and towns of the simulated datasets; larger scales add numbered ones
+HOSPITALS = ['SGH', 'NUH', 'TTSH', 'CGH', 'KTPH', 'AH', 'IMH', 'KKH']
+POLYCLINICS = ['Ang Mo Kio', 'Bedok', 'Bukit Batok', 'Clementi', 'Geylang',
+               'Hougang', 'Jurong', 'Kallang', 'Marine Parade', 'Pasir Ris',
+               'Punggol', 'Queenstown', 'Sembawang', 'Sengkang', 'Tampines',
+               'Toa Payoh', 'Woodlands', 'Yishun']
+HDB_TOWNS = [
+    'Ang Mo Kio', 'Bedok', 'Bishan', 'Bukit Batok', 'Bukit Merah', 'Bukit Panjang',
+    'Bukit Timah', 'Central Area', 'Choa Chu Kang', 'Clementi', 'Geylang', 'Hougang',
+    'Jurong East', 'Jurong West', 'Kallang/Whampoa', 'Marine Parade', 'Pasir Ris',
+    'Punggol', 'Queenstown', 'Sembawang', 'Sengkang', 'Serangoon', 'Tampines',
+    'Toa Payoh', 'Woodlands', 'Yishun'
+]
+DAILY_DATASETS = ['hospital_bed_occupancy', 'polyclinic_attendance']
+SIMULATION_START = '2023-01-01'
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+
+def _scaled_names(names, count, prefix):
+    """The first count names, extended with numbered ones ('<prefix> 19', ...) beyond the list"""
+    if count is None:
+        return list(names)
+    return list(names[:count]) + [f"{prefix} {i + 1}" for i in range(len(names), count)]
+
+
+def download_singapore_health_data(years=2, facilities=None, towns=None, seed=42, output_dir=RAW_DIR,
+                                   chunk_rows=DEFAULT_CHUNK_ROWS, lake_dir=LAKE_DIR, rollup_dir=ROLLUP_DIR):
     """
     Download Singapore health datasets from data.gov.sg
     Note: You'll need to register at data.gov.sg for API access
+    Simulated data is written in chunks, so the scale knobs can go to tens of millions of rows.
+    The daily datasets are also written to the partitioned Parquet lake in lake_dir (see data_lake.py),
+    and the dashboard rollups in rollup_dir are rebuilt from the same chunks (see rollups.py).
     """
     
     print("🇸🇬 Downloading Singapore Health Data...")
+    os.makedirs(output_dir, exist_ok=True)
     
     # Singapore Open Data API endpoints
     datasets = {
@@ -41,6 +75,8 @@ def download_singapore_health_data():
     }
     
     # Note: These are example endpoints - you'll need actual resource IDs from data.gov.sg
+    scale = {'years': years, 'facilities': facilities, 'towns': towns, 'seed': seed, 'chunk_rows': chunk_rows,
+             'lake_dir': lake_dir, 'rollup_dir': rollup_dir}
     
     for dataset_name, url in datasets.items():
         try:
@@ -48,95 +84,122 @@ def download_singapore_health_data():
             # For demo purposes, we'll create simulated Singapore data
             # In real implementation, use: response = requests.get(url)
             
-            singapore_data = create_simulated_singapore_data(dataset_name)
-            
-            # Save to CSV
-            filename = f"data/singapore/raw/{dataset_name}.csv"
-            singapore_data.to_csv(filename, index=False)
-            print(f"✅ Saved {dataset_name} to {filename}")
+            filename = os.path.join(output_dir, f"{dataset_name}.csv")
+            rows = write_simulated_singapore_data(dataset_name, filename, **scale)
+            print(f"✅ Saved {dataset_name} to {filename} ({rows:,} rows)")
             
         except Exception as e:
             print(f"❌ Error downloading {dataset_name}: {e}")
             # Create simulated data as fallback
-            singapore_data = create_simulated_singapore_data(dataset_name)
-            filename = f"data/singapore/raw/{dataset_name}_simulated.csv"
-            singapore_data.to_csv(filename, index=False)
+            filename = os.path.join(output_dir, f"{dataset_name}_simulated.csv")
+            write_simulated_singapore_data(dataset_name, filename, **scale)
             print(f"✅ Created simulated {dataset_name} data")
 
-def create_simulated_singapore_data(dataset_type):
-    """Create realistic simulated Singapore health data"""
+def simulate_singapore_data_chunks(dataset_type, years=2, facilities=None, towns=None, seed=42,
+                                   chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Yield simulated Singapore health data as DataFrames of about chunk_rows rows.
+    Daily datasets cover `years` years from 2023-01-01 for `facilities` hospitals or one polyclinic
+    per town (`towns`); each chunk is a block of dates drawn in one go from its own generator
+    (seeded by seed and chunk number), so the same arguments always give the same data.
+    """
     
-    import numpy as np
-    np.random.seed(42)
+    if dataset_type not in DAILY_DATASETS:
+        yield create_simulated_singapore_data(dataset_type, seed=seed)
+        return
     
+    end = pd.Timestamp(SIMULATION_START) + pd.DateOffset(years=years) - pd.Timedelta(days=1)
+    dates = pd.date_range(start=SIMULATION_START, end=end, freq='D')
     if dataset_type == 'hospital_bed_occupancy':
-        # Singapore hospital bed occupancy data
-        dates = pd.date_range(start='2023-01-01', end='2024-12-31', freq='D')
-        hospitals = ['SGH', 'NUH', 'TTSH', 'CGH', 'KTPH', 'AH', 'IMH', 'KKH']
-        
-        data = []
-        for date in dates:
-            for hospital in hospitals:
-                # Simulate seasonal patterns and COVID impact
-                base_occupancy = np.random.normal(0.75, 0.15)  # 75% average occupancy
-                
-                # Seasonal adjustments (monsoon season = more admissions)
-                if date.month in [11, 12, 1, 2]:  # Northeast monsoon
-                    base_occupancy += 0.1
-                
-                # Weekend patterns
-                if date.weekday() >= 5:
-                    base_occupancy -= 0.05
-                    
-                occupancy_rate = max(0.5, min(0.95, base_occupancy))
-                
-                data.append({
-                    'date': date,
-                    'hospital': hospital,
-                    'total_beds': np.random.randint(500, 1500),
-                    'occupied_beds': int(np.random.randint(500, 1500) * occupancy_rate),
-                    'occupancy_rate': round(occupancy_rate, 3),
-                    'elderly_patients_pct': round(np.random.normal(0.35, 0.1), 3)  # 35% elderly
-                })
-        
-        return pd.DataFrame(data)
+        sites = np.array(_scaled_names(HOSPITALS, facilities, 'Hospital'), dtype=object)
+    else:
+        sites = np.array(_scaled_names(POLYCLINICS, towns, 'Polyclinic'), dtype=object)
+    days_per_chunk = max(1, chunk_rows // len(sites))
     
-    elif dataset_type == 'polyclinic_attendance':
-        # Singapore polyclinic attendance data
-        dates = pd.date_range(start='2023-01-01', end='2024-12-31', freq='D')
-        polyclinics = ['Ang Mo Kio', 'Bedok', 'Bukit Batok', 'Clementi', 'Geylang', 
-                      'Hougang', 'Jurong', 'Kallang', 'Marine Parade', 'Pasir Ris',
-                      'Punggol', 'Queenstown', 'Sembawang', 'Sengkang', 'Tampines',
-                      'Toa Payoh', 'Woodlands', 'Yishun']
-        
-        data = []
-        for date in dates:
-            for polyclinic in polyclinics:
-                # Simulate attendance patterns
-                base_attendance = np.random.normal(200, 50)  # Average daily attendance
-                
-                # Weekday vs weekend patterns
-                if date.weekday() >= 5:
-                    base_attendance *= 0.7  # Lower weekend attendance
-                
-                # Seasonal flu patterns
-                if date.month in [6, 7, 8]:  # Mid-year flu season
-                    base_attendance *= 1.2
-                
-                attendance = max(50, int(base_attendance))
-                
-                data.append({
-                    'date': date,
-                    'polyclinic': polyclinic,
-                    'total_attendance': attendance,
-                    'elderly_attendance': int(attendance * np.random.normal(0.4, 0.1)),  # 40% elderly
-                    'chronic_disease_consultations': int(attendance * np.random.normal(0.25, 0.05)),
-                    'medication_refills': int(attendance * np.random.normal(0.6, 0.1))
-                })
+    for chunk, first_day in enumerate(range(0, len(dates), days_per_chunk)):
+        rng = np.random.default_rng([seed, chunk])
+        block = dates[first_day:first_day + days_per_chunk]
+        # One row per (date, site), dates outer
+        date = np.repeat(block.values, len(sites))
+        site = np.tile(sites, len(block))
+        month = np.repeat(block.month.values, len(sites))
+        weekend = np.repeat(block.weekday.values >= 5, len(sites))
+        n = len(date)
         
-        return pd.DataFrame(data)
+        if dataset_type == 'hospital_bed_occupancy':
+            # Simulate seasonal patterns: monsoon season = more admissions, fewer at weekends
+            base_occupancy = rng.normal(0.75, 0.15, n)  # 75% average occupancy
+            base_occupancy += np.where(np.isin(month, [11, 12, 1, 2]), 0.1, 0.0)  # Northeast monsoon
+            base_occupancy -= np.where(weekend, 0.05, 0.0)
+            occupancy_rate = np.clip(base_occupancy, 0.5, 0.95)
+            yield pd.DataFrame({
+                'date': date,
+                'hospital': site,
+                'total_beds': rng.integers(500, 1500, n),
+                'occupied_beds': (rng.integers(500, 1500, n) * occupancy_rate).astype(np.int64),
+                'occupancy_rate': occupancy_rate.round(3),
+                'elderly_patients_pct': rng.normal(0.35, 0.1, n).round(3)  # 35% elderly
+            })
+        else:
+            # Simulate attendance patterns: lower at weekends, mid-year flu season
+            base_attendance = rng.normal(200, 50, n)  # Average daily attendance
+            base_attendance *= np.where(weekend, 0.7, 1.0)
+            base_attendance *= np.where(np.isin(month, [6, 7, 8]), 1.2, 1.0)
+            attendance = np.maximum(50, base_attendance.astype(np.int64))
+            yield pd.DataFrame({
+                'date': date,
+                'polyclinic': site,
+                'total_attendance': attendance,
+                'elderly_attendance': (attendance * rng.normal(0.4, 0.1, n)).astype(np.int64),  # 40% elderly
+                'chronic_disease_consultations': (attendance * rng.normal(0.25, 0.05, n)).astype(np.int64),
+                'medication_refills': (attendance * rng.normal(0.6, 0.1, n)).astype(np.int64)
+            })
+
+def write_simulated_singapore_data(dataset_type, path, years=2, facilities=None, towns=None, seed=42,
+                                   chunk_rows=DEFAULT_CHUNK_ROWS, lake_dir=None, rollup_dir=None):
+    """
+    Stream a simulated dataset to a CSV file chunk by chunk; returns the number of rows written.
+    With lake_dir, daily datasets are written to the Parquet lake from the same chunks, and
+    with rollup_dir the dataset's rollups are rebuilt from them.
+    """
+    
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    lake = LakeWriter(dataset_type, lake_dir) if lake_dir and dataset_type in LAKE_DATASETS else None
+    rollups = Rollups(dataset_type, rollup_dir, rebuild=True) if rollup_dir and dataset_type in ROLLUPS else None
+    rows = 0
+    try:
+        for chunk in simulate_singapore_data_chunks(dataset_type, years, facilities, towns, seed, chunk_rows):
+            chunk.to_csv(tmp_path, mode='w' if rows == 0 else 'a', header=rows == 0, index=False)
+            if lake is not None:
+                lake.write(chunk)
+            if rollups is not None:
+                rollups.update(chunk)
+            rows += len(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if lake is not None:
+            lake.abort()
+        raise
+    finally:
+        # A failed write leaves the previous CSV in place and no partial temporary file behind
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    if lake is not None:
+        lake.close()
+    if rollups is not None:
+        rollups.save(source_signature(dataset_type, path, lake_dir or LAKE_DIR))
+    return rows
+
+def create_simulated_singapore_data(dataset_type, years=2, facilities=None, towns=None, seed=42):
+    """Create realistic simulated Singapore health data (in memory; see write_simulated_singapore_data)"""
     
-    elif dataset_type == 'chronic_disease_prevalence':
+    if dataset_type in DAILY_DATASETS:
+        return pd.concat(list(simulate_singapore_data_chunks(dataset_type, years, facilities, towns, seed)),
+                         ignore_index=True)
+    
+    rng = np.random.default_rng(seed)
+    
+    if dataset_type == 'chronic_disease_prevalence':
         # Singapore chronic disease data by age group and district
         age_groups = ['60-64', '65-69', '70-74', '75-79', '80-84', '85+']
         districts = ['Central', 'East', 'North', 'North-East', 'West']
@@ -176,7 +239,7 @@ def create_simulated_singapore_data(dataset_type):
                         'age_group': age_group,
                         'condition': condition,
                         'prevalence_rate': round(prevalence, 3),
-                        'estimated_cases': int(np.random.normal(1000, 200) * prevalence),
+                        'estimated_cases': int(rng.normal(1000, 200) * prevalence),
                         'year': 2024
                     })
         
@@ -184,94 +247,122 @@ def create_simulated_singapore_data(dataset_type):
     
     return pd.DataFrame()  # Empty dataframe for unknown types
 
-def create_singapore_demographics_data():
+def create_singapore_demographics_data(towns=None, seed=42, output_dir=RAW_DIR):
     """Create Singapore demographics data relevant to senior care"""
     
     print("📊 Creating Singapore Demographics Data...")
     
     # HDB town data with senior population
-    hdb_towns = [
-        'Ang Mo Kio', 'Bedok', 'Bishan', 'Bukit Batok', 'Bukit Merah', 'Bukit Panjang',
-        'Bukit Timah', 'Central Area', 'Choa Chu Kang', 'Clementi', 'Geylang', 'Hougang',
-        'Jurong East', 'Jurong West', 'Kallang/Whampoa', 'Marine Parade', 'Pasir Ris',
-        'Punggol', 'Queenstown', 'Sembawang', 'Sengkang', 'Serangoon', 'Tampines',
-        'Toa Payoh', 'Woodlands', 'Yishun'
-    ]
+    hdb_towns = _scaled_names(HDB_TOWNS, towns, 'Town')
+    n = len(hdb_towns)
+    rng = np.random.default_rng(seed)
     
-    demographic_data = []
+    # Simulate realistic Singapore demographic data
+    total_population = rng.integers(80000, 300000, n)
+    senior_population = (total_population * rng.normal(0.18, 0.05, n)).astype(np.int64)  # ~18% seniors
+    hdb_flats_total = (total_population / 3.2).astype(np.int64)  # ~3.2 people per household
     
-    for town in hdb_towns:
-        # Simulate realistic Singapore demographic data
-        total_population = np.random.randint(80000, 300000)
-        senior_population = int(total_population * np.random.normal(0.18, 0.05))  # ~18% seniors
-        
-        demographic_data.append({
-            'town': town,
-            'total_population': total_population,
-            'senior_population_60plus': senior_population,
-            'senior_percentage': round(senior_population / total_population, 3),
-            'median_age': np.random.normal(42, 5),  # Singapore median age ~42
-            'hdb_flats_total': int(total_population / 3.2),  # ~3.2 people per household
-            'elderly_friendly_flats': int(total_population / 3.2 * np.random.normal(0.15, 0.05)),
-            'healthcare_facilities': np.random.randint(1, 8),
-            'avg_household_income': int(np.random.normal(9000, 2000)),  # SGD monthly
-            'seniors_living_alone_pct': round(np.random.normal(0.12, 0.03), 3)  # 12% live alone
-        })
-    
-    demographics_df = pd.DataFrame(demographic_data)
-    demographics_df.to_csv('data/singapore/raw/singapore_demographics.csv', index=False)
+    demographics_df = pd.DataFrame({
+        'town': hdb_towns,
+        'total_population': total_population,
+        'senior_population_60plus': senior_population,
+        'senior_percentage': (senior_population / total_population).round(3),
+        'median_age': rng.normal(42, 5, n),  # Singapore median age ~42
+        'hdb_flats_total': hdb_flats_total,
+        'elderly_friendly_flats': (total_population / 3.2 * rng.normal(0.15, 0.05, n)).astype(np.int64),
+        'healthcare_facilities': rng.integers(1, 8, n),
+        'avg_household_income': rng.normal(9000, 2000, n).astype(np.int64),  # SGD monthly
+        'seniors_living_alone_pct': rng.normal(0.12, 0.03, n).round(3)  # 12% live alone
+    })
+    os.makedirs(output_dir, exist_ok=True)
+    demographics_df.to_csv(os.path.join(output_dir, 'singapore_demographics.csv'), index=False)
     print("✅ Created Singapore demographics data")
     
     return demographics_df
 
-def integrate_singapore_bot_data():
-    """Integrate Singapore datasets with your bot data"""
+BOT_ACTIVITY_DATA = 'data/bot_activity_data.csv'
+ENHANCED_BOT_DATA = 'data/singapore/processed/singapore_enhanced_bot_data.csv'
+
+def integrate_singapore_bot_data(rebuild=False, seed=42, demographics_path='data/singapore/raw/singapore_demographics.csv'):
+    """
+    Integrate Singapore datasets with your bot data
+    Incremental: only users missing from the processed file are enriched and appended, so re-runs
+    cost O(new users). rebuild=True (or a change in the bot data columns) rewrites the whole file.
+    Returns the newly enriched rows.
+    """
     
     print("🔗 Integrating Singapore data with bot activity...")
     
     # Load your existing bot data
-    if os.path.exists('data/bot_activity_data.csv'):
-        bot_data = pd.read_csv('data/bot_activity_data.csv')
+    if os.path.exists(BOT_ACTIVITY_DATA):
+        bot_data = read_csv_typed(BOT_ACTIVITY_DATA)
     else:
         print("❌ Bot activity data not found. Please run the main data generation first.")
         return
     
     # Load Singapore data
-    demographics = pd.read_csv('data/singapore/raw/singapore_demographics.csv')
+    towns = read_csv_typed(demographics_path, 'singapore_demographics', ['town'])['town'].to_numpy()
     
-    # Add Singapore-specific context to bot users
-    singapore_enhanced_data = []
+    # Users already enriched: one anti-join against the processed file's user_id column
+    header = None
+    new_users = bot_data
+    if not rebuild and os.path.exists(ENHANCED_BOT_DATA):
+        header = pd.read_csv(ENHANCED_BOT_DATA, nrows=0).columns.tolist()
+        if set(bot_data.columns) <= set(header):
+            enriched = read_csv_typed(ENHANCED_BOT_DATA, columns=['user_id'])
+            merged = bot_data.merge(enriched.drop_duplicates(), on='user_id', how='left', indicator=True)
+            new_users = bot_data[(merged['_merge'] == 'left_only').to_numpy()]
+        else:
+            print("⚠️ Bot data columns changed - rebuilding the Singapore-enhanced bot data")
+            header = None
+    new_users = new_users.drop_duplicates('user_id')
+    if new_users.empty:
+        print("✅ Singapore-enhanced bot data is up to date")
+        return new_users
     
-    for _, user_row in bot_data.iterrows():
-        # Assign users to Singapore towns
-        town = np.random.choice(demographics['town'].values)
-        town_data = demographics[demographics['town'] == town].iloc[0]
-        
-        # Add Singapore context
-        enhanced_row = user_row.to_dict()
-        enhanced_row.update({
-            'singapore_town': town,
-            'hdb_flat_type': np.random.choice(['1-room', '2-room', '3-room', '4-room', '5-room'], 
-                                            p=[0.05, 0.15, 0.25, 0.35, 0.2]),
-            'pioneer_generation': np.random.choice([0, 1], p=[0.7, 0.3]),  # 30% pioneer generation
-            'medisave_balance': np.random.normal(25000, 10000),  # SGD
-            'has_family_nearby': np.random.choice([0, 1], p=[0.3, 0.7]),  # 70% have family nearby
-            'preferred_language': np.random.choice(['English', 'Mandarin', 'Malay', 'Tamil'], 
-                                                 p=[0.5, 0.3, 0.15, 0.05]),
-            'healthcare_subsidy_eligible': np.random.choice([0, 1], p=[0.4, 0.6])
-        })
-        
-        singapore_enhanced_data.append(enhanced_row)
+    # Add Singapore context to all new users at once; the generator is keyed by the rows
+    # already enriched, so the same history always gives the same data
+    rng = np.random.default_rng([seed, 0 if header is None else len(enriched)])
+    n = len(new_users)
+    singapore_bot_df = new_users.assign(
+        singapore_town=rng.choice(towns, n),  # Assign users to Singapore towns
+        hdb_flat_type=rng.choice(['1-room', '2-room', '3-room', '4-room', '5-room'], n,
+                                 p=[0.05, 0.15, 0.25, 0.35, 0.2]),
+        pioneer_generation=rng.choice([0, 1], n, p=[0.7, 0.3]),  # 30% pioneer generation
+        medisave_balance=rng.normal(25000, 10000, n),  # SGD
+        has_family_nearby=rng.choice([0, 1], n, p=[0.3, 0.7]),  # 70% have family nearby
+        preferred_language=rng.choice(['English', 'Mandarin', 'Malay', 'Tamil'], n,
+                                      p=[0.5, 0.3, 0.15, 0.05]),
+        healthcare_subsidy_eligible=rng.choice([0, 1], n, p=[0.4, 0.6])
+    )
     
-    singapore_bot_df = pd.DataFrame(singapore_enhanced_data)
-    singapore_bot_df.to_csv('data/singapore/processed/singapore_enhanced_bot_data.csv', index=False)
-    print("✅ Created Singapore-enhanced bot data")
+    if header is None:
+        os.makedirs(os.path.dirname(ENHANCED_BOT_DATA), exist_ok=True)
+        tmp_path = f"{ENHANCED_BOT_DATA}.{os.getpid()}.tmp"
+        singapore_bot_df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, ENHANCED_BOT_DATA)
+        print(f"✅ Created Singapore-enhanced bot data ({n:,} users)")
+    else:
+        # Appended rows follow the file's column order; columns only one side has are reported, not fatal
+        missing = [column for column in header if column not in singapore_bot_df.columns]
+        dropped = [column for column in singapore_bot_df.columns if column not in header]
+        if missing or dropped:
+            print(f"⚠️ Singapore-enhanced bot data columns differ - left empty: {missing or 'none'}, "
+                  f"not stored: {dropped or 'none'} (use --rebuild to rewrite the file)")
+        singapore_bot_df.reindex(columns=header).to_csv(ENHANCED_BOT_DATA, mode='a', header=False, index=False)
+        print(f"✅ Appended {n:,} new users to the Singapore-enhanced bot data")
     
     return singapore_bot_df
 
-def main():
+def main(years=2, facilities=None, towns=None, seed=42, output_dir=RAW_DIR, rebuild=False):
     """Main function to set up Singapore data environment"""
     
+    # Load-test data in another output directory gets its own lake and rollups next to it, and its
+    # simulated towns are not mixed into the real bot users' enhanced data
+    default_output = os.path.abspath(output_dir) == os.path.abspath(RAW_DIR)
+    lake_dir = LAKE_DIR if default_output else os.path.join(output_dir, 'lake')
+    rollup_dir = ROLLUP_DIR if default_output else os.path.join(output_dir, 'rollups')
+    
     print("🇸🇬 Setting up Singapore Senior Care Data Environment...")
     print("=" * 60)
     
@@ -279,13 +370,19 @@ def main():
     setup_singapore_data_environment()
     
     # Step 2: Download/simulate Singapore health data
-    download_singapore_health_data()
+    download_singapore_health_data(years=years, facilities=facilities, towns=towns, seed=seed, output_dir=output_dir,
+                                   lake_dir=lake_dir, rollup_dir=rollup_dir)
     
     # Step 3: Create demographics data
-    create_singapore_demographics_data()
+    create_singapore_demographics_data(towns=towns, seed=seed, output_dir=output_dir)
     
     # Step 4: Integrate with bot data
-    integrate_singapore_bot_data()
+    if default_output:
+        integrate_singapore_bot_data(rebuild=rebuild, seed=seed,
+                                     demographics_path=os.path.join(output_dir, 'singapore_demographics.csv'))
+    else:
+        print(f"ℹ️ Skipping bot data integration for the data in {output_dir} "
+              f"(only {RAW_DIR} enriches the Singapore-enhanced bot data)")
     
     print("\n🎉 Singapore data environment setup complete!")
     print("\n📊 Available datasets:")
@@ -294,6 +391,8 @@ def main():
     print("- Chronic disease prevalence by district")
     print("- Singapore demographics and HDB data")
     print("- Singapore-enhanced bot activity data")
+    print(f"- Partitioned Parquet lake of the daily datasets ({lake_dir})")
+    print(f"- Dashboard rollup tables ({rollup_dir})")
     
     print("\n🚀 Next steps:")
     print("1. Review the generated datasets in data/singapore/")
@@ -302,5 +401,15 @@ def main():
     print("4. Create Singapore-specific visualizations")
 
 if __name__ == "__main__":
-    import numpy as np
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="Set up the Singapore senior care datasets")
+    parser.add_argument('--years', type=int, default=2, help="Years of daily hospital and polyclinic records")
+    parser.add_argument('--facilities', type=int, help="Number of hospitals (default: the 8 real ones)")
+    parser.add_argument('--towns', type=int, help="Number of towns, each with a polyclinic (default: the real ones)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output-dir', default=RAW_DIR,
+                        help="Where the raw datasets go (use another directory for load-test data)")
+    parser.add_argument('--rebuild', action='store_true',
+                        help="Re-enrich every bot user instead of only those new since the last run")
+    args = parser.parse_args()
+    main(args.years, args.facilities, args.towns, args.seed, args.output_dir, args.rebuild)
@@ -4,23 +4,34 @@
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingRegressor, IsolationForest
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.metrics import accuracy_score, classification_report, mean_squared_error, r2_score
-import joblib
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+import os
 import warnings
 warnings.filterwarnings('ignore')
 
-# --- Security Utilities ---
-from security_utils import sanitize_input, encrypt_data, decrypt_data, generate_fernet_key
+from dataset_cache import cached_dataset, frame_digest
+from feature_store import UserFeatureStore
+from model_registry import publish_model, tuned_params
+from drift_monitor import drift_reference
+import model_features
 
-# Load or generate encryption key (for demonstration, use a static key; in production, load from .env)
-FERNET_KEY = generate_fernet_key()
+# Feature definitions and inference featurization live in model_features.py, so the bot and the
+# scoring jobs never import this module. Evaluation metrics and plotting are imported where used.
+
+_fernet_key = None
+
+
+def fernet_key():
+    """Encryption key for model files, generated on first use
+    (for demonstration, a fresh key per process; in production, load from .env)"""
+    global _fernet_key
+    if _fernet_key is None:
+        from security_utils import generate_fernet_key
+        _fernet_key = generate_fernet_key()
+    return _fernet_key
 
 
 # --- Multi-country Medication Adherence Model ---
@@ -33,35 +44,45 @@ class MedicationAdherenceModel:
     COUNTRY_PARAMS = {
         'Singapore': {
             'adherence_rate': 0.7,
-            'feature_mod': lambda f: f,  # No change
+            'feature_mod': lambda f, rng: f,  # No change
         },
         'US': {
             'adherence_rate': 0.55,
-            'feature_mod': lambda f: {**f, 'medication_cost_monthly': np.random.normal(350, 100), 'has_family_nearby': np.random.choice([0,1],p=[0.5,0.5])},
+            'feature_mod': lambda f, rng: {**f, 'medication_cost_monthly': rng.normal(350, 100), 'has_family_nearby': rng.choice([0,1],p=[0.5,0.5])},
         },
         'Japan': {
             'adherence_rate': 0.8,
-            'feature_mod': lambda f: {**f, 'technology_comfort': np.random.choice([3,4,5],p=[0.2,0.4,0.4]), 'preferred_language_encoded': 1},
+            'feature_mod': lambda f, rng: {**f, 'technology_comfort': rng.choice([3,4,5],p=[0.2,0.4,0.4]), 'preferred_language_encoded': 1},
         },
         'UK': {
             'adherence_rate': 0.7,
-            'feature_mod': lambda f: {**f, 'medication_cost_monthly': np.random.normal(50, 20), 'healthcare_subsidy_eligible': 1},
+            'feature_mod': lambda f, rng: {**f, 'medication_cost_monthly': rng.normal(50, 20), 'healthcare_subsidy_eligible': 1},
         },
     }
 
-    def __init__(self, country='Singapore'):
+    FEATURE_COLUMNS = model_features.ADHERENCE_FEATURES
+    # Expected values of the simulated features, used when scoring real users
+    INFERENCE_DEFAULTS = model_features.ADHERENCE_INFERENCE_DEFAULTS
+
+    def __init__(self, country='Singapore', n_jobs=-1, seed=42, params=None):
         self.country = country
-        self.model = RandomForestClassifier(n_estimators=100, random_state=42, class_weight='balanced')
+        self.seed = seed
+        self.model = RandomForestClassifier(n_estimators=100, random_state=42, class_weight='balanced', n_jobs=n_jobs)
+        # Hyperparameters found by model_tuning.py override the defaults
+        self.params = tuned_params(self.registry_name(country)) if params is None else params
+        self.model.set_params(**self.params)
         self.scaler = StandardScaler()
         self.label_encoders = {}
 
-    def _encode_hdb_type(self, hdb_type):
-        hdb_encoding = {'1-room': 1, '2-room': 2, '3-room': 3, '4-room': 4, '5-room': 5}
-        return hdb_encoding.get(hdb_type, 3)
+    @staticmethod
+    def registry_name(country):
+        """Name of a country's adherence model in the model registry"""
+        return 'medication_adherence' if country == 'Singapore' else f'medication_adherence_{country}'
 
-    def _encode_language(self, language):
-        lang_encoding = {'English': 1, 'Mandarin': 2, 'Malay': 3, 'Tamil': 4}
-        return lang_encoding.get(language, 1)
+    @staticmethod
+    def inference_features(store, user_ids=None):
+        """Model input rows for real users from the feature store, in training column order"""
+        return model_features.adherence_features(store, user_ids)
 
     def _calculate_adherence_probability(self, features):
         # Use country-specific base adherence rate
@@ -86,44 +107,49 @@ class MedicationAdherenceModel:
             base_probability -= 0.12
         return max(0.1, min(0.95, base_probability))
 
-    def prepare_adherence_data(self, n_samples=500):
+    def prepare_adherence_data(self, n_samples=500, store=None, seed=None):
         print(f"🌏 Preparing Medication Adherence Data for {self.country}...")
-        # Load Singapore-enhanced bot data as base
-        base_data = pd.read_csv('data/singapore/processed/singapore_enhanced_bot_data.csv')
+        # User profiles come from the shared feature store (callers training several countries pass it in)
+        if store is None:
+            store = UserFeatureStore.load_or_build()
+        params = {'generator': 'adherence-v2', 'features': store.version, 'country': self.country, 'n_samples': n_samples}
+        return cached_dataset('adherence', [], params, seed,
+                              lambda: self._build_adherence_data(n_samples, store, seed))
+
+    def _build_adherence_data(self, n_samples, store, seed):
+        rng = np.random.default_rng(seed)
         features = []
-        data_rows = list(base_data.iterrows())
+        profiles = store.frame().to_dict('records')
         for i in range(n_samples):
-            _, row = data_rows[i % len(data_rows)]
-            # Sanitize all string inputs from external data
-            hdb_flat_type = sanitize_input(str(row.get('hdb_flat_type', '3-room')))
-            preferred_language = sanitize_input(str(row.get('preferred_language', 'English')))
+            profile = profiles[i % len(profiles)]
             feature_row = {
-                'age': row.get('age', 70),
-                'chronic_conditions_count': row.get('chronic_conditions_count', 2),
-                'pioneer_generation': row.get('pioneer_generation', 0),
-                'hdb_flat_type_encoded': self._encode_hdb_type(hdb_flat_type),
-                'has_family_nearby': row.get('has_family_nearby', 1),
-                'medisave_balance': row.get('medisave_balance', 25000),
-                'healthcare_subsidy_eligible': row.get('healthcare_subsidy_eligible', 1),
-                'preferred_language_encoded': self._encode_language(preferred_language),
-                'medications_per_day': row.get('medications_per_day', 3),
-                'polyclinic_distance': np.random.normal(2, 1),
-                'medication_cost_monthly': np.random.normal(150, 50),
-                'cognitive_score': np.random.normal(25, 5),
-                'social_support_score': row.get('has_family_nearby', 1) * 5 + np.random.normal(3, 1),
-                'technology_comfort': np.random.choice([1, 2, 3, 4, 5], p=[0.3, 0.25, 0.2, 0.15, 0.1])
+                'age': profile['age'],
+                'chronic_conditions_count': profile['chronic_conditions_count'],
+                'pioneer_generation': profile['pioneer_generation'],
+                'hdb_flat_type_encoded': profile['hdb_flat_type_encoded'],
+                'has_family_nearby': profile['has_family_nearby'],
+                'medisave_balance': profile['medisave_balance'],
+                'healthcare_subsidy_eligible': profile['healthcare_subsidy_eligible'],
+                'preferred_language_encoded': profile['preferred_language_encoded'],
+                'medications_per_day': profile['medications_per_day'],
+                'polyclinic_distance': rng.normal(2, 1),
+                'medication_cost_monthly': rng.normal(150, 50),
+                'cognitive_score': rng.normal(25, 5),
+                'social_support_score': profile['has_family_nearby'] * 5 + rng.normal(3, 1),
+                'technology_comfort': rng.choice([1, 2, 3, 4, 5], p=[0.3, 0.25, 0.2, 0.15, 0.1])
             }
             # Apply country-specific feature modifications
-            feature_row = self.COUNTRY_PARAMS[self.country]['feature_mod'](feature_row)
+            feature_row = self.COUNTRY_PARAMS[self.country]['feature_mod'](feature_row, rng)
             adherence_probability = self._calculate_adherence_probability(feature_row)
-            feature_row['medication_adherent'] = np.random.choice([0, 1], p=[1-adherence_probability, adherence_probability])
+            feature_row['medication_adherent'] = rng.choice([0, 1], p=[1-adherence_probability, adherence_probability])
             features.append(feature_row)
         return pd.DataFrame(features)
 
-    def train(self, n_samples=500, output_prefix='singapore_models'):
+    def train(self, n_samples=500, output_prefix='singapore_models', store=None):
+        from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
         print(f"🤖 Training Medication Adherence Model for {self.country}...")
-        data = self.prepare_adherence_data(n_samples=n_samples)
-        feature_columns = [col for col in data.columns if col != 'medication_adherent']
+        data = self.prepare_adherence_data(n_samples=n_samples, store=store, seed=self.seed)
+        feature_columns = self.FEATURE_COLUMNS
         X = data[feature_columns]
         y = data['medication_adherent']
         print("Class distribution (all data):")
@@ -141,181 +167,64 @@ class MedicationAdherenceModel:
             'feature': feature_columns,
             'importance': self.model.feature_importances_
         }).sort_values('importance', ascending=False)
-        # Interactive Feature Importance Plot
-        fig1 = px.bar(feature_importance.head(10), x='importance', y='feature', orientation='h',
-                     title=f'Top 10 Features for Medication Adherence ({self.country})', color='importance', color_continuous_scale='Viridis')
-        fig1.update_layout(yaxis={'categoryorder':'total ascending'})
-        fig1.write_html(f'models/{output_prefix}/adherence_feature_importance_{self.country}.html')
         # Evaluate
         y_pred = self.model.predict(X_test_scaled)
         accuracy = accuracy_score(y_test, y_pred)
-        from sklearn.metrics import confusion_matrix
         cm = confusion_matrix(y_test, y_pred)
-        fig2 = px.imshow(
-            cm,
-            text_auto=True,
-            color_continuous_scale='Viridis',
-            labels=dict(x="Predicted", y="Actual", color="Count"),
-            title=f"Confusion Matrix - Medication Adherence ({self.country})"
-        )
-        fig2.update_traces(
-            textfont=dict(color="black", size=32, family="Arial Black, Arial, sans-serif")
-        )
-        for i in range(cm.shape[0]):
-            for j in range(cm.shape[1]):
-                fig2.add_annotation(
-                    x=j,
-                    y=i,
-                    text=str(cm[i, j]),
-                    showarrow=False,
-                    font=dict(color="black", size=32, family="Arial Black, Arial, sans-serif"),
-                    bgcolor="white",
-                    opacity=0.9
-                )
-        fig2.update_layout(
-            xaxis_title="Predicted",
-            yaxis_title="Actual",
-            font=dict(color="black", size=18),
-            coloraxis_colorbar=dict(title="Count")
-        )
-        fig2.write_html(f'models/{output_prefix}/adherence_confusion_matrix_{self.country}.html')
+        self.evaluation = {'y_test': y_test.to_numpy(), 'y_pred': y_pred, 'confusion_matrix': cm}
         print(f"✅ {self.country} Medication Adherence Model Accuracy: {accuracy:.3f}")
         print("\n📊 Classification Report:")
         print(classification_report(y_test, y_pred))
         print("\n🔝 Top Features for Medication Adherence:")
         print(feature_importance.head(10))
-        # Save model
-        # Save model (optionally encrypt model file)
-        model_path = f'models/{output_prefix}/medication_adherence_model_{self.country}.pkl'
-        scaler_path = f'models/{output_prefix}/medication_adherence_scaler_{self.country}.pkl'
-        joblib.dump(self.model, model_path)
-        joblib.dump(self.scaler, scaler_path)
+        # Publish a new model version (optionally encrypt model file)
+        self.version = publish_model(self.registry_name(self.country), self.model, self.scaler, frame_digest(data),
+                                     {'accuracy': accuracy}, model_dir=f'models/{output_prefix}', params=self.params,
+                                     drift_reference=drift_reference(X_train, feature_columns))
         # Example: Encrypt model file (optional, for demonstration)
         # with open(model_path, 'rb') as f:
-        #     encrypted = encrypt_data(f.read(), FERNET_KEY)
+        #     encrypted = encrypt_data(f.read(), fernet_key())
         # with open(model_path + '.enc', 'wb') as f:
         #     f.write(encrypted)
         return accuracy, feature_importance, cm
 
 # --- Multi-country comparison function ---
-def compare_countries_adherence():
+def _threads_per_worker(max_workers):
+    """Forest threads for each of max_workers concurrent trainings, so together they use the cores once"""
+    return max(1, (os.cpu_count() or 1) // max_workers)
+
+def _train_country_adherence(country, store, n_samples, output_prefix, n_jobs=1):
+    """Process-pool worker: train one country's adherence model with n_jobs forest threads"""
+    print(f"\n=== {country} ===")
+    model = MedicationAdherenceModel(country=country, n_jobs=n_jobs)
+    accuracy, feature_importance, cm = model.train(n_samples=n_samples, output_prefix=output_prefix, store=store)
+    return {
+        'accuracy': accuracy,
+        'feature_importance': feature_importance,
+        'confusion_matrix': cm
+    }
+
+def compare_countries_adherence(n_samples=500, max_workers=None, store=None):
     countries = ['Singapore', 'US', 'Japan', 'UK']
-    results = {}
-    for country in countries:
-        print(f"\n=== {country} ===")
-        model = MedicationAdherenceModel(country=country)
-        accuracy, feature_importance, cm = model.train(n_samples=500, output_prefix='singapore_models')
-        results[country] = {
-            'accuracy': accuracy,
-            'feature_importance': feature_importance,
-            'confusion_matrix': cm
+    # Load the user features once and share them with every worker
+    if store is None:
+        store = UserFeatureStore.load_or_build()
+    if max_workers is None:
+        max_workers = min(len(countries), os.cpu_count() or 1)
+    # Each worker gets its share of the cores; n_jobs=-1 in every worker would oversubscribe them
+    n_jobs = _threads_per_worker(max_workers)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            country: pool.submit(_train_country_adherence, country, store, n_samples, 'singapore_models', n_jobs)
+            for country in countries
         }
+        results = {country: future.result() for country, future in futures.items()}
     print("\nCountry Comparison Results:")
     for country in countries:
         print(f"\n{country}:")
         print(f"  Accuracy: {results[country]['accuracy']:.3f}")
         print(f"  Confusion Matrix:\n{results[country]['confusion_matrix']}")
 
-
-    # --- Plotly: All countries confusion matrices in one HTML (2x2, Blues color) ---
-    from plotly.subplots import make_subplots
-    import plotly.graph_objects as go
-    fig_cm = make_subplots(rows=2, cols=2, subplot_titles=countries)
-    zmax = max([results[c]['confusion_matrix'].max() for c in countries])
-    for idx, country in enumerate(countries):
-        cm = results[country]['confusion_matrix']
-        row = idx // 2 + 1
-        col = idx % 2 + 1
-        # Draw heatmap
-        heatmap = go.Heatmap(
-            z=cm,
-            x=['Pred 0', 'Pred 1'],
-            y=['Actual 0', 'Actual 1'],
-            colorscale='Blues',
-            zmin=0,
-            zmax=zmax,
-            showscale=(idx==3),
-            colorbar=dict(title='Count') if idx==3 else None,
-            text=cm,
-            texttemplate="",
-            hovertemplate="Actual %{y}<br>Predicted %{x}<br>Count: %{z}<extra></extra>",
-        )
-        fig_cm.add_trace(heatmap, row=row, col=col)
-        # Add white background, bold, large font annotations for each cell
-        for i in range(cm.shape[0]):
-            for j in range(cm.shape[1]):
-                fig_cm.add_annotation(
-                    x=j,
-                    y=i,
-                    xref=f'x{idx+1}',
-                    yref=f'y{idx+1}',
-                    text=f"<b>{cm[i, j]}</b>",
-                    showarrow=False,
-                    font=dict(color="black", size=28, family="Arial Black, Arial, sans-serif"),
-                    bgcolor="white",
-                    opacity=0.95,
-                    bordercolor="black",
-                    borderwidth=2,
-                    borderpad=4
-                )
-        # Draw all borders of the matrix (rectangle)
-        fig_cm.add_shape(
-            type="rect",
-            xref=f'x{idx+1}',
-            yref=f'y{idx+1}',
-            x0=-0.5, x1=1.5, y0=-0.5, y1=1.5,
-            line=dict(color="black", width=4),
-            fillcolor="rgba(0,0,0,0)",
-            layer="above"
-        )
-        # Draw inner cell borders (vertical and horizontal)
-        fig_cm.add_shape(
-            type="line",
-            xref=f'x{idx+1}',
-            yref=f'y{idx+1}',
-            x0=0.5, x1=0.5, y0=-0.5, y1=1.5,
-            line=dict(color="black", width=2),
-            layer="above"
-        )
-        fig_cm.add_shape(
-            type="line",
-            xref=f'x{idx+1}',
-            yref=f'y{idx+1}',
-            x0=-0.5, x1=1.5, y0=0.5, y1=0.5,
-            line=dict(color="black", width=2),
-            layer="above"
-        )
-    fig_cm.update_layout(
-        title_text="Medication Adherence Confusion Matrices by Country",
-        height=800,
-        width=1000,
-        font=dict(size=16),
-        plot_bgcolor="white"
-    )
-    fig_cm.write_html('models/singapore_models/adherence_confusion_matrix_comparison.html')
-
-    # --- Plotly: All countries top 10 feature importances in one HTML (2x2) ---
-    fig_feat = make_subplots(rows=2, cols=2, subplot_titles=countries, shared_yaxes=True)
-    for idx, country in enumerate(countries):
-        fi = results[country]['feature_importance'].head(10).sort_values('importance', ascending=True)
-        row = idx // 2 + 1
-        col = idx % 2 + 1
-        bar = go.Bar(
-            x=fi['importance'],
-            y=fi['feature'],
-            orientation='h',
-            marker=dict(color=fi['importance'], colorscale='Viridis'),
-            showlegend=False
-        )
-        fig_feat.add_trace(bar, row=row, col=col)
-    fig_feat.update_layout(
-        title_text="Top 10 Feature Importances for Medication Adherence by Country",
-        height=900,
-        width=1200,
-        font=dict(size=16)
-    )
-    fig_feat.write_html('models/singapore_models/adherence_feature_importance_comparison.html')
-
     return results
 
 class SingaporeFallRiskModel:
@@ -324,48 +233,60 @@ class SingaporeFallRiskModel:
     Predicts fall risk score based on health data and environmental factors
     """
     
-    def __init__(self):
+    FEATURE_COLUMNS = model_features.FALL_RISK_FEATURES
+    # Expected values of the simulated features, used when scoring real users
+    INFERENCE_DEFAULTS = model_features.FALL_RISK_INFERENCE_DEFAULTS
+
+    def __init__(self, seed=42, params=None):
         self.model = GradientBoostingRegressor(n_estimators=100, random_state=42)
         self.scaler = StandardScaler()
+        self.seed = seed
+        # Hyperparameters found by model_tuning.py override the defaults
+        self.params = tuned_params('fall_risk') if params is None else params
+        self.model.set_params(**self.params)
         
-    def prepare_singapore_fall_data(self):
+    @staticmethod
+    def inference_features(store, user_ids=None):
+        """Model input rows for real users from the feature store, in training column order"""
+        return model_features.fall_risk_features(store, user_ids)
+
+    def prepare_singapore_fall_data(self, store=None, seed=None):
         """Prepare Singapore-specific fall risk training data"""
         
         print("🇸🇬 Preparing Singapore Fall Risk Data...")
-        
-        # Load data
-        singapore_data = pd.read_csv('data/singapore/processed/singapore_enhanced_bot_data.csv')
-        demographics = pd.read_csv('data/singapore/raw/singapore_demographics.csv')
-        # Sanitize all string inputs from external data
-        singapore_data['singapore_town'] = singapore_data['singapore_town'].apply(lambda x: sanitize_input(str(x)))
-        demographics['town'] = demographics['town'].apply(lambda x: sanitize_input(str(x)))
-        
+        if store is None:
+            store = UserFeatureStore.load_or_build()
+        # The monsoon seasonal factor depends on the current month, so it is part of the cache key
+        month = datetime.now().month
+        params = {'generator': 'fall-v2', 'features': store.version, 'month': month}
+        return cached_dataset('fall', [], params, seed,
+                              lambda: self._build_singapore_fall_data(store, month, seed))
+
+    def _build_singapore_fall_data(self, store, month, seed):
+        rng = np.random.default_rng(seed)
         features = []
         
-        for _, row in singapore_data.iterrows():
-            town = row.get('singapore_town', 'Toa Payoh')
-            town_data = demographics[demographics['town'] == town].iloc[0] if len(demographics[demographics['town'] == town]) > 0 else demographics.iloc[0]
-            
+        for profile in store.frame().to_dict('records'):
             feature_row = {
-                'age': row.get('age', 70),
-                'bmi': np.random.normal(24, 3),  # Singapore BMI average
-                'chronic_conditions_count': row.get('chronic_conditions_count', 2),
-                'medication_count': row.get('medications_per_day', 3),
-                'blood_pressure_systolic': np.random.normal(135, 20),
-                'vision_score': np.random.normal(7, 2),  # 1-10 scale
-                'hearing_score': np.random.normal(8, 1.5),
-                'mobility_aid_use': np.random.choice([0, 1], p=[0.7, 0.3]),
-                'home_hazards_count': np.random.poisson(2),  # Typical HDB hazards
-                'exercise_frequency': np.random.choice([0, 1, 2, 3, 4, 5, 6, 7]),  # days per week
-                'balance_score': np.random.normal(40, 10),  # Berg Balance Scale
-                'cognitive_score': np.random.normal(25, 5),  # MMSE
-                'social_isolation_score': (1 - row.get('has_family_nearby', 1)) * 5 + np.random.normal(2, 1),
-                'previous_falls': np.random.poisson(0.5),  # Falls in past year
-                'fear_of_falling': np.random.choice([1, 2, 3, 4, 5], p=[0.1, 0.2, 0.3, 0.25, 0.15]),
-                'polyclinic_visits_per_year': np.random.poisson(8),
-                'seasonal_factor': 1.2 if datetime.now().month in [11, 12, 1, 2] else 1.0,  # Monsoon season
-                'hdb_floor_level': np.random.randint(1, 15),
-                'lift_availability': np.random.choice([0, 1], p=[0.1, 0.9])  # 90% have lifts
+                'age': profile['age'],
+                'bmi': rng.normal(24, 3),  # Singapore BMI average
+                'chronic_conditions_count': profile['chronic_conditions_count'],
+                'medication_count': profile['medications_per_day'],
+                'blood_pressure_systolic': rng.normal(135, 20),
+                'vision_score': rng.normal(7, 2),  # 1-10 scale
+                'hearing_score': rng.normal(8, 1.5),
+                'mobility_aid_use': rng.choice([0, 1], p=[0.7, 0.3]),
+                'home_hazards_count': rng.poisson(2),  # Typical HDB hazards
+                'exercise_frequency': rng.choice([0, 1, 2, 3, 4, 5, 6, 7]),  # days per week
+                'balance_score': rng.normal(40, 10),  # Berg Balance Scale
+                'cognitive_score': rng.normal(25, 5),  # MMSE
+                'social_isolation_score': (1 - profile['has_family_nearby']) * 5 + rng.normal(2, 1),
+                'previous_falls': rng.poisson(0.5),  # Falls in past year
+                'fear_of_falling': rng.choice([1, 2, 3, 4, 5], p=[0.1, 0.2, 0.3, 0.25, 0.15]),
+                'polyclinic_visits_per_year': rng.poisson(8),
+                'seasonal_factor': 1.2 if month in [11, 12, 1, 2] else 1.0,  # Monsoon season
+                'hdb_floor_level': rng.integers(1, 15),
+                'lift_availability': rng.choice([0, 1], p=[0.1, 0.9])  # 90% have lifts
             }
             
             # Calculate fall risk score (0-100)
@@ -409,16 +330,17 @@ class SingaporeFallRiskModel:
         base_risk += features['social_isolation_score'] * 1.5
         return max(0, min(100, base_risk))
     
-    def train(self):
+    def train(self, store=None):
         """Train the fall risk model"""
+        from sklearn.metrics import mean_squared_error, r2_score
         
         print("🤖 Training Singapore Fall Risk Model...")
         
         # Prepare data
-        data = self.prepare_singapore_fall_data()
+        data = self.prepare_singapore_fall_data(store=store, seed=self.seed)
         
         # Features and target
-        feature_columns = [col for col in data.columns if col != 'fall_risk_score']
+        feature_columns = self.FEATURE_COLUMNS
         X = data[feature_columns]
         y = data['fall_risk_score']
         
@@ -445,26 +367,15 @@ class SingaporeFallRiskModel:
             'feature': feature_columns,
             'importance': self.model.feature_importances_
         }).sort_values('importance', ascending=False)
-
-        # Interactive Feature Importance Plot
-        fig1 = px.bar(feature_importance.head(10), x='importance', y='feature', orientation='h',
-                     title='Top 10 Features for Fall Risk', color='importance', color_continuous_scale='Viridis')
-        fig1.update_layout(yaxis={'categoryorder':'total ascending'})
-        fig1.write_html('models/singapore_models/fall_feature_importance.html')
-
-        # Interactive Predicted vs Actual Plot
-        fig2 = px.scatter(x=y_test, y=y_pred, labels={'x':'Actual Fall Risk Score', 'y':'Predicted Fall Risk Score'},
-                         title='Predicted vs Actual Fall Risk Score', opacity=0.7)
-        fig2.add_shape(type='line', x0=min(y_test), y0=min(y_test), x1=max(y_test), y1=max(y_test),
-                      line=dict(color='red', dash='dash'))
-        fig2.write_html('models/singapore_models/fall_pred_vs_actual.html')
+        self.evaluation = {'y_test': y_test.to_numpy(), 'y_pred': y_pred}
 
         print("\n🔝 Top Features for Fall Risk:")
         print(feature_importance.head(10))
 
-        # Save model
-        joblib.dump(self.model, 'models/singapore_models/fall_risk_model.pkl')
-        joblib.dump(self.scaler, 'models/singapore_models/fall_risk_scaler.pkl')
+        # Publish a new model version
+        self.version = publish_model('fall_risk', self.model, self.scaler, frame_digest(data),
+                                     {'r2': r2, 'rmse': rmse}, params=self.params,
+                                     drift_reference=drift_reference(X_train, feature_columns))
 
         return r2, feature_importance
 
@@ -474,105 +385,141 @@ class SingaporeHealthAnomalyModel:
     Detects unusual health patterns that may indicate emergencies or health deterioration
     """
     
-    def __init__(self):
-        self.model = IsolationForest(contamination=0.1, random_state=42)
+    ANOMALY_FEATURES = model_features.ANOMALY_FEATURES
+    ANOMALY_TYPES = ['medical_emergency', 'behavioral_change', 'environmental_stress']
+
+    def __init__(self, seed=42, params=None):
+        self.model = IsolationForest(contamination=0.1, random_state=42, n_jobs=-1)
         self.scaler = StandardScaler()
+        self.seed = seed
+        # Hyperparameters found by model_tuning.py override the defaults
+        self.params = tuned_params('health_anomaly') if params is None else params
+        self.model.set_params(**self.params)
         
-    def prepare_singapore_anomaly_data(self):
-        """Prepare Singapore health pattern data for anomaly detection"""
+    @staticmethod
+    def inference_features(store, user_ids, daily_records):
+        """
+        Model input rows for real users: age from the feature store, everything else from
+        daily_records (a DataFrame or {feature: array} aligned with user_ids)
+        """
+        return model_features.anomaly_features(store, user_ids, daily_records)
+
+    def prepare_singapore_anomaly_data(self, n_users=None, n_days=30, anomaly_rate=0.1, seed=None, store=None):
+        """Prepare Singapore health pattern data for anomaly detection
+
+        Daily records are drawn as one (users x days x features) float32 block;
+        anomalies are injected afterwards through boolean masks per anomaly type.
+        n_users defaults to the number of bot users; larger populations reuse the
+        bot user profiles with a numeric suffix on the user_id.
+        """
         print("🇸🇬 Preparing Singapore Health Anomaly Data...")
-        # Load Singapore data
-        singapore_data = pd.read_csv('data/singapore/processed/singapore_enhanced_bot_data.csv')
-        # Sanitize user_id and other string fields
-        singapore_data['user_id'] = singapore_data['user_id'].apply(lambda x: sanitize_input(str(x)) if 'user_id' in singapore_data.columns else x)
-        features = []
-        for _, row in singapore_data.iterrows():
-            # Generate daily health patterns
-            for day in range(30):  # 30 days of data per user
-                feature_row = {
-                    'user_id': row.get('user_id', f"user_{len(features)}"),
-                    'day': day,
-                    'age': row.get('age', 70),
-                    'steps_daily': max(0, np.random.normal(3000, 1500)),  # Singapore senior average
-                    'heart_rate_avg': np.random.normal(75, 10),
-                    'blood_pressure_systolic': np.random.normal(135, 15),
-                    'blood_pressure_diastolic': np.random.normal(85, 10),
-                    'sleep_hours': max(4, min(12, np.random.normal(7, 1.5))),
-                    'medication_taken_on_time': np.random.choice([0, 1], p=[0.2, 0.8]),
-                    'meals_per_day': max(1, np.random.poisson(3)),
-                    'water_intake_liters': max(0.5, np.random.normal(1.8, 0.5)),
-                    'bathroom_visits': max(2, np.random.poisson(8)),
-                    'emergency_button_pressed': np.random.choice([0, 1], p=[0.95, 0.05]),
-                    'family_contact_frequency': np.random.poisson(2),  # calls per day
-                    'mood_score': np.random.choice([1, 2, 3, 4, 5], p=[0.1, 0.15, 0.4, 0.25, 0.1]),
-                    'confusion_episodes': np.random.poisson(0.1),
-                    'temperature_celsius': np.random.normal(36.5, 0.3),
-                    'indoor_activity_hours': max(0, min(16, np.random.normal(8, 3))),
-                    'outdoor_activity_hours': max(0, min(8, np.random.normal(2, 1))),
-                    'app_usage_minutes': max(0, np.random.normal(45, 20)),  # Bot usage
-                    'missed_appointments': np.random.choice([0, 1], p=[0.9, 0.1]),
-                    'weight_kg': np.random.normal(65, 10),
-                    'humidity_comfort': np.random.normal(0.6, 0.1),  # Singapore humidity adaptation
-                    'air_quality_aqi': np.random.normal(50, 20)  # Singapore AQI
-                }
-                # Introduce anomalies (10% of data)
-                if np.random.random() < 0.1:
-                    feature_row = self._introduce_singapore_anomaly(feature_row)
-                    feature_row['is_anomaly'] = 1
-                else:
-                    feature_row['is_anomaly'] = 0
-                features.append(feature_row)
-        return pd.DataFrame(features)
-    
-    def _introduce_singapore_anomaly(self, normal_data):
-        """Introduce realistic health anomalies"""
-        
-        anomaly_type = np.random.choice(['medical_emergency', 'behavioral_change', 'environmental_stress'])
-        
-        if anomaly_type == 'medical_emergency':
-            # Simulate stroke, heart attack, severe hypotension
-            normal_data['heart_rate_avg'] = np.random.choice([
-                np.random.normal(45, 5),    # Bradycardia
-                np.random.normal(120, 10)   # Tachycardia
-            ])
-            normal_data['blood_pressure_systolic'] = np.random.choice([
-                np.random.normal(90, 10),   # Hypotension
-                np.random.normal(180, 15)   # Hypertension crisis
-            ])
-            normal_data['confusion_episodes'] = np.random.poisson(3)
-            normal_data['emergency_button_pressed'] = 1
-            
-        elif anomaly_type == 'behavioral_change':
-            # Depression, cognitive decline, medication non-adherence
-            normal_data['steps_daily'] = max(0, np.random.normal(500, 200))  # Severe reduction
-            normal_data['sleep_hours'] = np.random.choice([
-                np.random.normal(3, 1),     # Insomnia
-                np.random.normal(12, 1)     # Hypersomnia
-            ])
-            normal_data['medication_taken_on_time'] = 0
-            normal_data['mood_score'] = np.random.choice([1, 2], p=[0.7, 0.3])
-            normal_data['family_contact_frequency'] = 0
-            
-        elif anomaly_type == 'environmental_stress':
-            # Heat stroke, air pollution, dehydration (Singapore-specific)
-            normal_data['temperature_celsius'] = np.random.normal(38.5, 0.5)  # Fever
-            normal_data['water_intake_liters'] = max(0.2, np.random.normal(0.8, 0.3))  # Dehydration
-            normal_data['air_quality_aqi'] = np.random.normal(150, 30)  # Poor air quality
-            normal_data['indoor_activity_hours'] = 14  # Staying indoors due to heat/haze
-            normal_data['outdoor_activity_hours'] = 0
-        
-        return normal_data
-    
-    def train(self):
+        if store is None:
+            store = UserFeatureStore.load_or_build()
+        params = {'generator': 'anomaly-v2', 'features': store.version, 'n_users': n_users, 'n_days': n_days,
+                  'anomaly_rate': anomaly_rate}
+        return cached_dataset('anomaly', [], params, seed,
+                              lambda: self._build_singapore_anomaly_data(store, n_users, n_days, anomaly_rate, seed))
+
+    def _build_singapore_anomaly_data(self, store, n_users, n_days, anomaly_rate, seed):
+        if n_users is None:
+            n_users = len(store)
+        rng = np.random.default_rng(seed)
+        profile_idx = np.arange(n_users) % len(store)
+        base_ids = store.user_ids.tolist()
+        repeat = np.arange(n_users) // len(store)
+        user_ids = [base_ids[i] if r == 0 else f"{base_ids[i]}_{r}" for i, r in zip(profile_idx, repeat)]
+        ages = store.column('age')
+
+        shape = (n_users, n_days)
+        col = {name: i for i, name in enumerate(self.ANOMALY_FEATURES)}
+        values = np.empty(shape + (len(self.ANOMALY_FEATURES),), dtype=np.float32)
+        values[..., col['age']] = ages[profile_idx][:, None]
+        values[..., col['steps_daily']] = np.maximum(0, rng.normal(3000, 1500, shape))  # Singapore senior average
+        values[..., col['heart_rate_avg']] = rng.normal(75, 10, shape)
+        values[..., col['blood_pressure_systolic']] = rng.normal(135, 15, shape)
+        values[..., col['blood_pressure_diastolic']] = rng.normal(85, 10, shape)
+        values[..., col['sleep_hours']] = np.clip(rng.normal(7, 1.5, shape), 4, 12)
+        values[..., col['medication_taken_on_time']] = rng.random(shape) < 0.8
+        values[..., col['meals_per_day']] = np.maximum(1, rng.poisson(3, shape))
+        values[..., col['water_intake_liters']] = np.maximum(0.5, rng.normal(1.8, 0.5, shape))
+        values[..., col['bathroom_visits']] = np.maximum(2, rng.poisson(8, shape))
+        values[..., col['emergency_button_pressed']] = rng.random(shape) < 0.05
+        values[..., col['family_contact_frequency']] = rng.poisson(2, shape)  # calls per day
+        values[..., col['mood_score']] = rng.choice([1, 2, 3, 4, 5], size=shape, p=[0.1, 0.15, 0.4, 0.25, 0.1])
+        values[..., col['confusion_episodes']] = rng.poisson(0.1, shape)
+        values[..., col['temperature_celsius']] = rng.normal(36.5, 0.3, shape)
+        values[..., col['indoor_activity_hours']] = np.clip(rng.normal(8, 3, shape), 0, 16)
+        values[..., col['outdoor_activity_hours']] = np.clip(rng.normal(2, 1, shape), 0, 8)
+        values[..., col['app_usage_minutes']] = np.maximum(0, rng.normal(45, 20, shape))  # Bot usage
+        values[..., col['missed_appointments']] = rng.random(shape) < 0.1
+        values[..., col['weight_kg']] = rng.normal(65, 10, shape)
+        values[..., col['humidity_comfort']] = rng.normal(0.6, 0.1, shape)  # Singapore humidity adaptation
+        values[..., col['air_quality_aqi']] = rng.normal(50, 20, shape)  # Singapore AQI
+
+        # Introduce anomalies (10% of data by default)
+        is_anomaly = rng.random(shape) < anomaly_rate
+        anomaly_type = rng.integers(0, len(self.ANOMALY_TYPES), shape)
+        self._inject_singapore_anomalies(values, is_anomaly, anomaly_type, rng)
+
+        data = pd.DataFrame(values.reshape(-1, len(self.ANOMALY_FEATURES)), columns=self.ANOMALY_FEATURES, copy=False)
+        data.insert(0, 'user_id', pd.Categorical(np.repeat(np.asarray(user_ids, dtype=object), n_days)))
+        data.insert(1, 'day', np.tile(np.arange(n_days, dtype=np.int16), n_users))
+        data['is_anomaly'] = is_anomaly.ravel().astype(np.int8)
+        return data
+
+    def _inject_singapore_anomalies(self, values, is_anomaly, anomaly_type, rng):
+        """Introduce realistic health anomalies in place, one boolean mask per anomaly type"""
+        col = {name: i for i, name in enumerate(self.ANOMALY_FEATURES)}
+
+        # Simulate stroke, heart attack, severe hypotension
+        mask = is_anomaly & (anomaly_type == self.ANOMALY_TYPES.index('medical_emergency'))
+        n = int(mask.sum())
+        values[mask, col['heart_rate_avg']] = np.where(
+            rng.random(n) < 0.5,
+            rng.normal(45, 5, n),     # Bradycardia
+            rng.normal(120, 10, n)    # Tachycardia
+        )
+        values[mask, col['blood_pressure_systolic']] = np.where(
+            rng.random(n) < 0.5,
+            rng.normal(90, 10, n),    # Hypotension
+            rng.normal(180, 15, n)    # Hypertension crisis
+        )
+        values[mask, col['confusion_episodes']] = rng.poisson(3, n)
+        values[mask, col['emergency_button_pressed']] = 1
+
+        # Depression, cognitive decline, medication non-adherence
+        mask = is_anomaly & (anomaly_type == self.ANOMALY_TYPES.index('behavioral_change'))
+        n = int(mask.sum())
+        values[mask, col['steps_daily']] = np.maximum(0, rng.normal(500, 200, n))  # Severe reduction
+        values[mask, col['sleep_hours']] = np.where(
+            rng.random(n) < 0.5,
+            rng.normal(3, 1, n),      # Insomnia
+            rng.normal(12, 1, n)      # Hypersomnia
+        )
+        values[mask, col['medication_taken_on_time']] = 0
+        values[mask, col['mood_score']] = rng.choice([1, 2], size=n, p=[0.7, 0.3])
+        values[mask, col['family_contact_frequency']] = 0
+
+        # Heat stroke, air pollution, dehydration (Singapore-specific)
+        mask = is_anomaly & (anomaly_type == self.ANOMALY_TYPES.index('environmental_stress'))
+        n = int(mask.sum())
+        values[mask, col['temperature_celsius']] = rng.normal(38.5, 0.5, n)  # Fever
+        values[mask, col['water_intake_liters']] = np.maximum(0.2, rng.normal(0.8, 0.3, n))  # Dehydration
+        values[mask, col['air_quality_aqi']] = rng.normal(150, 30, n)  # Poor air quality
+        values[mask, col['indoor_activity_hours']] = 14  # Staying indoors due to heat/haze
+        values[mask, col['outdoor_activity_hours']] = 0
+
+    def train(self, n_users=None, n_days=30, store=None):
         """Train the anomaly detection model"""
+        from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
         
         print("🤖 Training Singapore Health Anomaly Model...")
         
         # Prepare data
-        data = self.prepare_singapore_anomaly_data()
+        data = self.prepare_singapore_anomaly_data(n_users=n_users, n_days=n_days, seed=self.seed, store=store)
         
         # Features (exclude target and identifiers)
-        feature_columns = [col for col in data.columns if col not in ['is_anomaly', 'user_id', 'day']]
+        feature_columns = self.ANOMALY_FEATURES
         X = data[feature_columns]
         y = data['is_anomaly']
         
@@ -593,81 +540,71 @@ class SingaporeHealthAnomalyModel:
 
         accuracy = accuracy_score(y_test, y_pred_binary)
 
-        # Interactive Confusion Matrix
-        from sklearn.metrics import confusion_matrix
         cm = confusion_matrix(y_test, y_pred_binary)
-        fig1 = px.imshow(
-            cm,
-            text_auto=True,
-            color_continuous_scale='Viridis',
-            labels=dict(x="Predicted", y="Actual", color="Count"),
-            title="Confusion Matrix - Health Anomaly Detection"
-        )
-        fig1.update_traces(
-            textfont=dict(color="black", size=32, family="Arial Black, Arial, sans-serif")
-        )
-        # Add white background annotations for each cell
-        for i in range(cm.shape[0]):
-            for j in range(cm.shape[1]):
-                fig1.add_annotation(
-                    x=j,
-                    y=i,
-                    text=str(cm[i, j]),
-                    showarrow=False,
-                    font=dict(color="black", size=32, family="Arial Black, Arial, sans-serif"),
-                    bgcolor="white",
-                    opacity=0.9
-                )
-        fig1.update_layout(
-            xaxis_title="Predicted",
-            yaxis_title="Actual",
-            font=dict(color="black", size=18),
-            coloraxis_colorbar=dict(title="Count")
-        )
-        fig1.write_html('models/singapore_models/anomaly_confusion_matrix.html')
+        self.evaluation = {'y_test': y_test.to_numpy(), 'y_pred': y_pred_binary, 'confusion_matrix': cm}
 
         print(f"✅ Anomaly Detection Model Accuracy: {accuracy:.3f}")
         print("\n📊 Classification Report:")
         print(classification_report(y_test, y_pred_binary))
 
-        # Save model
-        joblib.dump(self.model, 'models/singapore_models/health_anomaly_model.pkl')
-        joblib.dump(self.scaler, 'models/singapore_models/health_anomaly_scaler.pkl')
+        # Publish a new model version
+        self.version = publish_model('health_anomaly', self.model, self.scaler, frame_digest(data),
+                                     {'accuracy': accuracy}, params=self.params,
+                                     drift_reference=drift_reference(X_train, feature_columns))
 
         return accuracy
 
-def main():
-    """Train all three Singapore ML models"""
+def main(render_plots=True):
+    """Train all three Singapore ML models
+
+    With render_plots=False (headless/nightly retraining) no figures are built
+    and plotly is never imported.
+    """
     
     print("🇸🇬 Training Singapore Senior Care ML Models")
     print("=" * 60)
     
     # Ensure directories exist
-    import os
     os.makedirs('models/singapore_models', exist_ok=True)
     
     results = {}
+    # Per-user features are derived once and shared by all three models
+    store = UserFeatureStore.load_or_build()
+    renderer = None
+    if render_plots:
+        import singapore_model_plots as plots
+        renderer = plots.ModelPlotRenderer('models/singapore_models')
     
     # Model 1: Medication Adherence (Multi-country)
     print("\n1️⃣ MEDICATION ADHERENCE PREDICTION (Multi-country)")
     print("-" * 40)
     # Run multi-country comparison and print results
-    adherence_results = compare_countries_adherence()
+    adherence_results = compare_countries_adherence(store=store)
     # For summary, use Singapore's results
     results['adherence_accuracy'] = adherence_results['Singapore']['accuracy']
     results['adherence_features'] = adherence_results['Singapore']['feature_importance']
+    if renderer:
+        for country, country_results in adherence_results.items():
+            renderer.submit(plots.render_adherence_plots, country,
+                            country_results['feature_importance'], country_results['confusion_matrix'])
+        renderer.submit(plots.render_adherence_comparison, adherence_results)
     
     # Model 2: Fall Risk Assessment
     print("\n2️⃣ FALL RISK ASSESSMENT")
     print("-" * 40)
     fall_model = SingaporeFallRiskModel()
-    results['fall_r2'], results['fall_features'] = fall_model.train()
+    results['fall_r2'], results['fall_features'] = fall_model.train(store=store)
+    if renderer:
+        renderer.submit(plots.render_fall_plots, results['fall_features'],
+                        fall_model.evaluation['y_test'], fall_model.evaluation['y_pred'])
     
     # Model 3: Health Anomaly Detection
     print("\n3️⃣ HEALTH ANOMALY DETECTION")
     print("-" * 40)
     anomaly_model = SingaporeHealthAnomalyModel()
-    results['anomaly_accuracy'] = anomaly_model.train()
+    results['anomaly_accuracy'] = anomaly_model.train(store=store)
+    if renderer:
+        renderer.submit(plots.render_anomaly_plots, anomaly_model.evaluation['confusion_matrix'])
     
     # Summary
     print("\n🎉 ALL MODELS TRAINED SUCCESSFULLY!")
@@ -677,15 +614,18 @@ def main():
     print(f"   • Fall Risk Assessment: {results['fall_r2']:.3f} R² score")
     print(f"   • Health Anomaly Detection: {results['anomaly_accuracy']:.1%} accuracy")
 
-    print(f"\n💾 Models saved to: models/singapore_models/")
+    print(f"\n💾 Models published to: models/singapore_models/registry/ (python model_registry.py list)")
     print(f"🚀 Ready for deployment in your Singapore senior care bot!")
 
-    print("\n📈 Interactive visualizations saved as HTML in models/singapore_models/:")
-    print("   - adherence_feature_importance.html (Medication Adherence Features)")
-    print("   - adherence_confusion_matrix.html (Medication Adherence Confusion Matrix)")
-    print("   - fall_feature_importance.html (Fall Risk Features)")
-    print("   - fall_pred_vs_actual.html (Fall Risk Predicted vs Actual)")
-    print("   - anomaly_confusion_matrix.html (Health Anomaly Confusion Matrix)")
+    if renderer:
+        renderer.close()
+        print("\n📈 Interactive visualizations saved as HTML in models/singapore_models/ (sharing plotly.min.js):")
+        print("   - adherence_feature_importance_<country>.html (Medication Adherence Features)")
+        print("   - adherence_confusion_matrix_<country>.html (Medication Adherence Confusion Matrix)")
+        print("   - adherence_*_comparison.html (Country Comparison)")
+        print("   - fall_feature_importance.html (Fall Risk Features)")
+        print("   - fall_pred_vs_actual.html (Fall Risk Predicted vs Actual)")
+        print("   - anomaly_confusion_matrix.html (Health Anomaly Confusion Matrix)")
 
     print("\n📝 Conclusion:")
     print("This project demonstrates a robust AI-driven analytics pipeline for Singapore senior care, integrating multiple datasets, advanced ML models, and interactive visualizations. The system provides actionable insights for healthcare decision-makers and sets a foundation for future enhancements, such as real-time monitoring and deployment with real-world data.")
@@ -693,4 +633,8 @@ def main():
     return results
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="Train the Singapore senior care ML models")
+    parser.add_argument('--no-plots', action='store_true', help="Headless retraining: skip figure rendering")
+    args = parser.parse_args()
+    main(render_plots=not args.no_plots)
@@ -0,0 +1,204 @@
+# Singapore Senior Care ML Model Plots
+# Interactive Plotly figures for the trained models, rendered separately from training
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+DEFAULT_OUTPUT_DIR = 'models/singapore_models'
+
+
+def _write_html(fig, path):
+    """Write a figure that loads the shared plotly.min.js next to it instead of embedding the bundle"""
+    fig.write_html(path, include_plotlyjs='directory')
+
+
+def _confusion_matrix_figure(cm, title):
+    fig = px.imshow(
+        cm,
+        text_auto=True,
+        color_continuous_scale='Viridis',
+        labels=dict(x="Predicted", y="Actual", color="Count"),
+        title=title
+    )
+    fig.update_traces(
+        textfont=dict(color="black", size=32, family="Arial Black, Arial, sans-serif")
+    )
+    # Add white background annotations for each cell
+    for i in range(cm.shape[0]):
+        for j in range(cm.shape[1]):
+            fig.add_annotation(
+                x=j,
+                y=i,
+                text=str(cm[i, j]),
+                showarrow=False,
+                font=dict(color="black", size=32, family="Arial Black, Arial, sans-serif"),
+                bgcolor="white",
+                opacity=0.9
+            )
+    fig.update_layout(
+        xaxis_title="Predicted",
+        yaxis_title="Actual",
+        font=dict(color="black", size=18),
+        coloraxis_colorbar=dict(title="Count")
+    )
+    return fig
+
+
+def _feature_importance_figure(feature_importance, title):
+    fig = px.bar(feature_importance.head(10), x='importance', y='feature', orientation='h',
+                 title=title, color='importance', color_continuous_scale='Viridis')
+    fig.update_layout(yaxis={'categoryorder':'total ascending'})
+    return fig
+
+
+def render_adherence_plots(country, feature_importance, cm, output_dir=DEFAULT_OUTPUT_DIR):
+    """Feature importance and confusion matrix for one country's adherence model"""
+    fig1 = _feature_importance_figure(feature_importance, f'Top 10 Features for Medication Adherence ({country})')
+    _write_html(fig1, os.path.join(output_dir, f'adherence_feature_importance_{country}.html'))
+    fig2 = _confusion_matrix_figure(cm, f"Confusion Matrix - Medication Adherence ({country})")
+    _write_html(fig2, os.path.join(output_dir, f'adherence_confusion_matrix_{country}.html'))
+
+
+def render_adherence_comparison(results, output_dir=DEFAULT_OUTPUT_DIR):
+    """2x2 comparison figures across countries from compare_countries_adherence() results"""
+    countries = list(results)
+    # --- Plotly: All countries confusion matrices in one HTML (2x2, Blues color) ---
+    fig_cm = make_subplots(rows=2, cols=2, subplot_titles=countries)
+    zmax = max([results[c]['confusion_matrix'].max() for c in countries])
+    for idx, country in enumerate(countries):
+        cm = results[country]['confusion_matrix']
+        row = idx // 2 + 1
+        col = idx % 2 + 1
+        # Draw heatmap
+        heatmap = go.Heatmap(
+            z=cm,
+            x=['Pred 0', 'Pred 1'],
+            y=['Actual 0', 'Actual 1'],
+            colorscale='Blues',
+            zmin=0,
+            zmax=zmax,
+            showscale=(idx==3),
+            colorbar=dict(title='Count') if idx==3 else None,
+            text=cm,
+            texttemplate="",
+            hovertemplate="Actual %{y}<br>Predicted %{x}<br>Count: %{z}<extra></extra>",
+        )
+        fig_cm.add_trace(heatmap, row=row, col=col)
+        # Add white background, bold, large font annotations for each cell
+        for i in range(cm.shape[0]):
+            for j in range(cm.shape[1]):
+                fig_cm.add_annotation(
+                    x=j,
+                    y=i,
+                    xref=f'x{idx+1}',
+                    yref=f'y{idx+1}',
+                    text=f"<b>{cm[i, j]}</b>",
+                    showarrow=False,
+                    font=dict(color="black", size=28, family="Arial Black, Arial, sans-serif"),
+                    bgcolor="white",
+                    opacity=0.95,
+                    bordercolor="black",
+                    borderwidth=2,
+                    borderpad=4
+                )
+        # Draw all borders of the matrix (rectangle)
+        fig_cm.add_shape(
+            type="rect",
+            xref=f'x{idx+1}',
+            yref=f'y{idx+1}',
+            x0=-0.5, x1=1.5, y0=-0.5, y1=1.5,
+            line=dict(color="black", width=4),
+            fillcolor="rgba(0,0,0,0)",
+            layer="above"
+        )
+        # Draw inner cell borders (vertical and horizontal)
+        fig_cm.add_shape(
+            type="line",
+            xref=f'x{idx+1}',
+            yref=f'y{idx+1}',
+            x0=0.5, x1=0.5, y0=-0.5, y1=1.5,
+            line=dict(color="black", width=2),
+            layer="above"
+        )
+        fig_cm.add_shape(
+            type="line",
+            xref=f'x{idx+1}',
+            yref=f'y{idx+1}',
+            x0=-0.5, x1=1.5, y0=0.5, y1=0.5,
+            line=dict(color="black", width=2),
+            layer="above"
+        )
+    fig_cm.update_layout(
+        title_text="Medication Adherence Confusion Matrices by Country",
+        height=800,
+        width=1000,
+        font=dict(size=16),
+        plot_bgcolor="white"
+    )
+    _write_html(fig_cm, os.path.join(output_dir, 'adherence_confusion_matrix_comparison.html'))
+
+    # --- Plotly: All countries top 10 feature importances in one HTML (2x2) ---
+    fig_feat = make_subplots(rows=2, cols=2, subplot_titles=countries, shared_yaxes=True)
+    for idx, country in enumerate(countries):
+        fi = results[country]['feature_importance'].head(10).sort_values('importance', ascending=True)
+        row = idx // 2 + 1
+        col = idx % 2 + 1
+        bar = go.Bar(
+            x=fi['importance'],
+            y=fi['feature'],
+            orientation='h',
+            marker=dict(color=fi['importance'], colorscale='Viridis'),
+            showlegend=False
+        )
+        fig_feat.add_trace(bar, row=row, col=col)
+    fig_feat.update_layout(
+        title_text="Top 10 Feature Importances for Medication Adherence by Country",
+        height=900,
+        width=1200,
+        font=dict(size=16)
+    )
+    _write_html(fig_feat, os.path.join(output_dir, 'adherence_feature_importance_comparison.html'))
+
+
+def render_fall_plots(feature_importance, y_test, y_pred, output_dir=DEFAULT_OUTPUT_DIR):
+    """Feature importance and predicted-vs-actual scatter for the fall risk model"""
+    fig1 = _feature_importance_figure(feature_importance, 'Top 10 Features for Fall Risk')
+    _write_html(fig1, os.path.join(output_dir, 'fall_feature_importance.html'))
+
+    fig2 = px.scatter(x=y_test, y=y_pred, labels={'x':'Actual Fall Risk Score', 'y':'Predicted Fall Risk Score'},
+                      title='Predicted vs Actual Fall Risk Score', opacity=0.7)
+    fig2.add_shape(type='line', x0=min(y_test), y0=min(y_test), x1=max(y_test), y1=max(y_test),
+                   line=dict(color='red', dash='dash'))
+    _write_html(fig2, os.path.join(output_dir, 'fall_pred_vs_actual.html'))
+
+
+def render_anomaly_plots(cm, output_dir=DEFAULT_OUTPUT_DIR):
+    """Confusion matrix for the health anomaly model"""
+    fig1 = _confusion_matrix_figure(cm, "Confusion Matrix - Health Anomaly Detection")
+    _write_html(fig1, os.path.join(output_dir, 'anomaly_confusion_matrix.html'))
+
+
+class ModelPlotRenderer:
+    """
+    Renders model figures on a background worker so training can carry on.
+    Call submit() as each model finishes and close() once to wait for the files.
+    """
+
+    def __init__(self, output_dir=DEFAULT_OUTPUT_DIR, max_workers=1):
+        self.output_dir = output_dir
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='model-plots')
+        self._futures = []
+
+    def submit(self, render_fn, *args):
+        future = self._pool.submit(render_fn, *args, output_dir=self.output_dir)
+        self._futures.append(future)
+        return future
+
+    def close(self):
+        """Wait for all queued figures; re-raises the first rendering error"""
+        self._pool.shutdown(wait=True)
+        for future in self._futures:
+            future.result()
@@ -1,14 +1,70 @@
 # Singapore Senior Care Interactive Visualizations
 # Two interactive dashboards for the capstone project
 
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
+# streamlit and plotly are imported inside the methods that draw, so the data loading and
+# aggregation code can be imported by scripts and jobs without the UI stack
+
+import os
 import pandas as pd
 import numpy as np
-import streamlit as st
 from datetime import datetime, timedelta
 import json
+from csv_ingest import read_csv_typed
+from bot_events import bot_activity, log_fingerprint
+from data_lake import LAKE_DIR, lake_info, load_lake
+from downsampling import MAX_POINTS_PER_TRACE, downsample
+from rollups import ROLLUP_DIR, Rollups, load_rollups
+
+# Streamlit reruns the whole script on every widget change. Data loads and figures are cached
+# across reruns (st.cache_data), keyed by the fingerprints of their input files and the filter
+# selections; each cache keeps its most recently used entries up to the limits below.
+DATA_CACHE_ENTRIES = 16
+FIGURE_CACHE_ENTRIES = 64
+_caches = {}
+
+
+def file_fingerprint(*paths):
+    """(path, size, mtime) of each input file - changes when a file is rewritten, created or removed"""
+    fingerprint = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            fingerprint.append((path, stat.st_size, stat.st_mtime_ns))
+        except FileNotFoundError:
+            fingerprint.append((path, None))
+    return tuple(fingerprint)
+
+
+def _load_data(key, _build):
+    return _build()
+
+
+def _build_figure(key, _build):
+    return _build()
+
+
+def _cached(function, max_entries, key, build):
+    """build() through the Streamlit cache of function under key; called directly outside a Streamlit app"""
+    try:
+        import streamlit as st
+        from streamlit import runtime
+    except ImportError:
+        return build()
+    if not runtime.exists():
+        return build()
+    if function not in _caches:
+        _caches[function] = st.cache_data(max_entries=max_entries, show_spinner=False)(function)
+    return _caches[function](key, build)
+
+
+def cached_data(key, build):
+    """A data load cached across reruns; key must identify its inputs (see file_fingerprint)"""
+    return _cached(_load_data, DATA_CACHE_ENTRIES, key, build)
+
+
+def cached_figure(key, build):
+    """A Plotly figure cached across reruns; key must identify its inputs and filter selections"""
+    return _cached(_build_figure, FIGURE_CACHE_ENTRIES, key, build)
 
 class SingaporeHealthDashboard:
     """
@@ -16,26 +72,94 @@ class SingaporeHealthDashboard:
     Real-time monitoring of senior health patterns across Singapore
     """
     
-    def __init__(self):
+    def __init__(self, lake_dir=LAKE_DIR, rollup_dir=ROLLUP_DIR):
         self.singapore_districts = ['Central', 'East', 'North', 'North-East', 'West']
         self.health_conditions = ['Diabetes', 'Hypertension', 'Heart Disease', 'Stroke', 'Kidney Disease']
-        
-    def load_singapore_data(self):
-        """Load Singapore health and demographics data"""
+        self.lake_dir = lake_dir
+        self.rollup_dir = rollup_dir
+        
+    def load_daily_data(self, dataset, start=None, end=None, columns=None):
+        """
+        A daily dataset between start and end (inclusive), read from the Parquet lake when it has
+        been built, else from the raw CSV
+        """
+        if lake_info(dataset, self.lake_dir) is not None:
+            return load_lake(dataset, columns, start, end, lake_dir=self.lake_dir)
+        data = read_csv_typed(f'data/singapore/raw/{dataset}.csv', dataset, columns)
+        if start is not None:
+            data = data[data['date'] >= pd.Timestamp(start)]
+        if end is not None:
+            data = data[data['date'] <= pd.Timestamp(end)]
+        return data
+    
+    def input_fingerprint(self, *datasets):
+        """Fingerprint of everything the dashboard reads for the datasets: rollups, lake and raw CSVs"""
+        paths = []
+        for dataset in datasets:
+            paths += [os.path.join(self.rollup_dir, dataset, '_rollups.json'),
+                      os.path.join(self.lake_dir, dataset, '_lake.json'),
+                      f'data/singapore/raw/{dataset}.csv']
+        return file_fingerprint(*paths)
+    
+    def load_rollups(self, dataset, start=None, end=None):
+        """
+        Saved rollup tables of a dataset (see rollups.py), or - before they have been built -
+        rollups computed in memory from the raw data between start and end
+        """
+        rollups = load_rollups(dataset, self.rollup_dir)
+        if rollups is None:
+            rollups = Rollups(dataset, self.rollup_dir, rebuild=True)
+            if dataset == 'chronic_disease_prevalence':
+                rollups.update(read_csv_typed('data/singapore/raw/chronic_disease_prevalence.csv'))
+            else:
+                rollups.update(self.load_daily_data(dataset, start, end))
+        return rollups
+    
+    def available_date_range(self):
+        """First and last day of the daily datasets (from the rollups or the lake), or None"""
+        ranges = []
+        for dataset in ['polyclinic_attendance', 'hospital_bed_occupancy']:
+            rollups = load_rollups(dataset, self.rollup_dir)
+            info = lake_info(dataset, self.lake_dir)
+            if rollups is not None:
+                days = rollups.table('daily', ['date'])['date']
+                ranges.append((days.min(), days.max()))
+            elif info is not None and info['start'] is not None:
+                ranges.append((pd.Timestamp(info['start']), pd.Timestamp(info['end'])))
+            else:
+                return None
+        return min(first for first, _ in ranges).date(), max(last for _, last in ranges).date()
+        
+    def load_singapore_data(self, start=None, end=None):
+        """Load Singapore demographics data and the rollups of the health datasets"""
         try:
             # Load the datasets we created
-            demographics = pd.read_csv('data/singapore/raw/singapore_demographics.csv')
-            chronic_disease = pd.read_csv('data/singapore/raw/chronic_disease_prevalence.csv')
-            polyclinic = pd.read_csv('data/singapore/raw/polyclinic_attendance.csv')
-            hospital = pd.read_csv('data/singapore/raw/hospital_bed_occupancy.csv')
+            demographics = read_csv_typed('data/singapore/raw/singapore_demographics.csv')
+            chronic_disease = self.load_rollups('chronic_disease_prevalence')
+            polyclinic = self.load_rollups('polyclinic_attendance', start, end)
+            hospital = self.load_rollups('hospital_bed_occupancy', start, end)
             
             return demographics, chronic_disease, polyclinic, hospital
         except FileNotFoundError:
+            import streamlit as st
             st.error("Please run singapore_data_setup.py first to generate the datasets!")
             return None, None, None, None
     
+    def utilization_series(self, polyclinic_rollups, hospital_rollups, start=None, end=None, districts=None,
+                           resolution='monthly'):
+        """
+        Polyclinic and hospital series per month (or per day, with resolution='daily') and the
+        polyclinic year x month grid, read from the rollups
+        """
+        grain, key = ('daily', 'date') if resolution == 'daily' else ('monthly', 'month')
+        polyclinic_series = polyclinic_rollups.table(grain, [key], start, end, district=districts)
+        hospital_series = hospital_rollups.table(grain, [key], start, end, district=districts)
+        seasonal = polyclinic_rollups.table('seasonal', ['year', 'month_of_year'], start, end, district=districts)
+        return polyclinic_series, hospital_series, seasonal
+    
     def create_singapore_map_visualization(self, demographics_data):
         """Create interactive map of Singapore with senior population density"""
+        import plotly.express as px
         
         # Singapore coordinates for major towns (simplified)
         singapore_coords = {
@@ -68,8 +192,9 @@ class SingaporeHealthDashboard:
         }
         
         # Add coordinates to demographics data
-        demographics_data['lat'] = demographics_data['town'].map(lambda x: singapore_coords.get(x, [1.35, 103.82])[0])
-        demographics_data['lon'] = demographics_data['town'].map(lambda x: singapore_coords.get(x, [1.35, 103.82])[1])
+        # (town is categorical, so the mapped coordinates are cast back to numbers)
+        demographics_data['lat'] = demographics_data['town'].map(lambda x: singapore_coords.get(x, [1.35, 103.82])[0]).astype(float)
+        demographics_data['lon'] = demographics_data['town'].map(lambda x: singapore_coords.get(x, [1.35, 103.82])[1]).astype(float)
         
         # Create scatter map
         fig = px.scatter_mapbox(
@@ -103,11 +228,13 @@ class SingaporeHealthDashboard:
         
         return fig
     
-    def create_health_conditions_chart(self, chronic_disease_data):
-        """Create chronic disease prevalence chart by district"""
+    def create_health_conditions_chart(self, district_summary):
+        """Create chronic disease prevalence chart by district (from the by_district rollup table)"""
+        import plotly.express as px
         
-        # Aggregate data by district and condition
-        district_summary = chronic_disease_data.groupby(['district', 'condition'])['prevalence_rate'].mean().reset_index()
+        if 'age_group' in district_summary:
+            # Raw prevalence rows: aggregate by district and condition
+            district_summary = district_summary.groupby(['district', 'condition'], observed=True)['prevalence_rate'].mean().reset_index()
         
         fig = px.bar(
             district_summary,
@@ -134,26 +261,23 @@ class SingaporeHealthDashboard:
         
         return fig
     
-    def create_healthcare_utilization_chart(self, polyclinic_data, hospital_data):
-        """Create healthcare utilization trends"""
-        
-        # Convert date columns
-        polyclinic_data['date'] = pd.to_datetime(polyclinic_data['date'])
-        hospital_data['date'] = pd.to_datetime(hospital_data['date'])
-        
-        # Monthly aggregation
-        polyclinic_monthly = polyclinic_data.groupby(polyclinic_data['date'].dt.to_period('M')).agg({
-            'total_attendance': 'sum',
-            'elderly_attendance': 'sum'
-        }).reset_index()
-        polyclinic_monthly['date'] = polyclinic_monthly['date'].dt.to_timestamp()
-        polyclinic_monthly['elderly_percentage'] = polyclinic_monthly['elderly_attendance'] / polyclinic_monthly['total_attendance']
-        
-        hospital_monthly = hospital_data.groupby(hospital_data['date'].dt.to_period('M')).agg({
-            'occupancy_rate': 'mean',
-            'elderly_patients_pct': 'mean'
-        }).reset_index()
-        hospital_monthly['date'] = hospital_monthly['date'].dt.to_timestamp()
+    def create_healthcare_utilization_chart(self, polyclinic_series, hospital_series, seasonal_data,
+                                            max_points=MAX_POINTS_PER_TRACE):
+        """
+        Create healthcare utilization trends from the rollups (see utilization_series). The series
+        are monthly or daily; each trace is reduced to at most max_points points (see downsampling.py),
+        so a long daily history keeps its peaks without sending every day to the browser.
+        """
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+        
+        x = 'date' if 'date' in polyclinic_series else 'month'
+        polyclinic_series = polyclinic_series.assign(
+            elderly_percentage=polyclinic_series['elderly_attendance'] / polyclinic_series['total_attendance'])
+        
+        def trace(series, column, name, color):
+            points = downsample(series, x, column, max_points)
+            return go.Scatter(x=points[x], y=points[column], name=name, line=dict(color=color))
         
         # Create subplot
         fig = make_subplots(
@@ -169,68 +293,23 @@ class SingaporeHealthDashboard:
         )
         
         # Polyclinic trends
-        fig.add_trace(
-            go.Scatter(
-                x=polyclinic_monthly['date'],
-                y=polyclinic_monthly['total_attendance'],
-                name='Total Attendance',
-                line=dict(color='blue')
-            ),
-            row=1, col=1
-        )
-        
-        fig.add_trace(
-            go.Scatter(
-                x=polyclinic_monthly['date'],
-                y=polyclinic_monthly['elderly_attendance'],
-                name='Elderly Attendance',
-                line=dict(color='red')
-            ),
-            row=1, col=1
-        )
+        fig.add_trace(trace(polyclinic_series, 'total_attendance', 'Total Attendance', 'blue'), row=1, col=1)
+        fig.add_trace(trace(polyclinic_series, 'elderly_attendance', 'Elderly Attendance', 'red'), row=1, col=1)
         
         # Hospital occupancy
-        fig.add_trace(
-            go.Scatter(
-                x=hospital_monthly['date'],
-                y=hospital_monthly['occupancy_rate'],
-                name='Occupancy Rate',
-                line=dict(color='green')
-            ),
-            row=1, col=2
-        )
+        fig.add_trace(trace(hospital_series, 'occupancy_rate', 'Occupancy Rate', 'green'), row=1, col=2)
         
         # Elderly utilization percentage
-        fig.add_trace(
-            go.Scatter(
-                x=polyclinic_monthly['date'],
-                y=polyclinic_monthly['elderly_percentage'],
-                name='Polyclinic Elderly %',
-                line=dict(color='orange')
-            ),
-            row=2, col=1
-        )
-        
-        fig.add_trace(
-            go.Scatter(
-                x=hospital_monthly['date'],
-                y=hospital_monthly['elderly_patients_pct'],
-                name='Hospital Elderly %',
-                line=dict(color='purple')
-            ),
-            row=2, col=1
-        )
+        fig.add_trace(trace(polyclinic_series, 'elderly_percentage', 'Polyclinic Elderly %', 'orange'), row=2, col=1)
+        fig.add_trace(trace(hospital_series, 'elderly_patients_pct', 'Hospital Elderly %', 'purple'), row=2, col=1)
         
         # Seasonal heatmap
-        polyclinic_data['month'] = polyclinic_data['date'].dt.month
-        polyclinic_data['year'] = polyclinic_data['date'].dt.year
-        seasonal_data = polyclinic_data.groupby(['year', 'month'])['elderly_attendance'].sum().reset_index()
-        seasonal_pivot = seasonal_data.pivot(index='year', columns='month', values='elderly_attendance')
+        seasonal_pivot = seasonal_data.pivot(index='year', columns='month_of_year', values='elderly_attendance')
         
         fig.add_trace(
             go.Heatmap(
                 z=seasonal_pivot.values,
-                x=[f'Month {i}' for i in range(1, 13)],
+                x=[f'Month {i}' for i in seasonal_pivot.columns],
                 y=seasonal_pivot.index,
                 colorscale='YlOrRd',
                 name='Seasonal Pattern'
@@ -249,18 +328,13 @@ class SingaporeHealthDashboard:
     
     def create_dashboard(self):
         """Create the complete Singapore health dashboard"""
+        import streamlit as st
         
         st.set_page_config(page_title="Singapore Senior Health Dashboard", layout="wide")
         
         st.title("🇸🇬 Singapore Senior Care Health Dashboard")
         st.markdown("### Real-time monitoring of senior health patterns across Singapore")
         
-        # Load data
-        demographics, chronic_disease, polyclinic, hospital = self.load_singapore_data()
-        
-        if demographics is None:
-            return
-        
         # Sidebar filters
         st.sidebar.header("🔍 Filters")
         selected_districts = st.sidebar.multiselect(
@@ -275,6 +349,27 @@ class SingaporeHealthDashboard:
             default=self.health_conditions
         )
         
+        # Daily data is read for the selected dates only
+        start = end = None
+        daily_inputs = self.input_fingerprint('polyclinic_attendance', 'hospital_bed_occupancy')
+        date_range = cached_data(('date_range', daily_inputs), self.available_date_range)
+        if date_range is not None:
+            selected_dates = st.sidebar.date_input("Date Range", value=date_range,
+                                                   min_value=date_range[0], max_value=date_range[1])
+            if len(selected_dates) == 2:
+                start, end = selected_dates
+        # Daily trends over a long range are downsampled; a narrower range shows every day
+        resolution = st.sidebar.radio("Trend Resolution", ['Monthly', 'Daily'], horizontal=True).lower()
+        
+        # Load data (cached until an input file changes; the dates matter only before rollups.py has run)
+        inputs = file_fingerprint('data/singapore/raw/singapore_demographics.csv') + \
+            self.input_fingerprint('chronic_disease_prevalence', 'polyclinic_attendance', 'hospital_bed_occupancy')
+        demographics, chronic_disease, polyclinic, hospital = cached_data(
+            ('health_data', inputs, start, end), lambda: self.load_singapore_data(start, end))
+        
+        if demographics is None:
+            return
+        
         # Key metrics
         st.header("📊 Key Metrics")
         col1, col2, col3, col4 = st.columns(4)
@@ -295,21 +390,26 @@ class SingaporeHealthDashboard:
             total_healthcare = demographics['healthcare_facilities'].sum()
             st.metric("Healthcare Facilities", f"{total_healthcare}")
         
-        # Visualizations
+        # Visualizations (each figure is cached for its inputs and the filters it depends on)
+        districts_key, conditions_key = tuple(sorted(selected_districts)), tuple(sorted(selected_conditions))
         st.header("🗺️ Geographic Distribution")
-        map_fig = self.create_singapore_map_visualization(demographics)
+        map_fig = cached_figure(('map', inputs), lambda: self.create_singapore_map_visualization(demographics))
         st.plotly_chart(map_fig, use_container_width=True)
         
         st.header("🏥 Health Conditions")
-        filtered_chronic = chronic_disease[
-            (chronic_disease['district'].isin(selected_districts)) &
-            (chronic_disease['condition'].isin(selected_conditions))
-        ]
-        conditions_fig = self.create_health_conditions_chart(filtered_chronic)
+        conditions_fig = cached_figure(
+            ('conditions', inputs, districts_key, conditions_key),
+            lambda: self.create_health_conditions_chart(chronic_disease.table(
+                'by_district', district=selected_districts, condition=selected_conditions)))
         st.plotly_chart(conditions_fig, use_container_width=True)
         
         st.header("📈 Healthcare Utilization")
-        utilization_fig = self.create_healthcare_utilization_chart(polyclinic, hospital)
+        # With every district selected, facilities outside the five (simulated extras) stay in
+        districts = None if set(selected_districts) == set(self.singapore_districts) else selected_districts
+        utilization_fig = cached_figure(
+            ('utilization', inputs, start, end, districts_key, resolution),
+            lambda: self.create_healthcare_utilization_chart(
+                *self.utilization_series(polyclinic, hospital, start, end, districts, resolution)))
         st.plotly_chart(utilization_fig, use_container_width=True)
 
 class SingaporeBotAnalyticsDashboard:
@@ -321,73 +421,48 @@ class SingaporeBotAnalyticsDashboard:
     def __init__(self):
         self.load_bot_data()
         
-    def load_bot_data(self):
-        """Load bot activity and model prediction data"""
+    def load_bot_data(self, days=90):
+        """Load the bot users and the last `days` days of bot activity (cached until the data or the event log changes)"""
+        self.inputs = (file_fingerprint('data/singapore/processed/singapore_enhanced_bot_data.csv'),
+                       log_fingerprint(), datetime.now().date(), days)
         try:
-            self.singapore_data = pd.read_csv('data/singapore/processed/singapore_enhanced_bot_data.csv')
-            # Create time series data for bot activity
-            self.create_bot_activity_data()
+            self.singapore_data, self.bot_activity, self.handler_usage = cached_data(
+                ('bot_data', self.inputs), lambda: self._read_bot_data(days))
         except FileNotFoundError:
+            import streamlit as st
             st.error("Please run the data setup scripts first!")
     
-    def create_bot_activity_data(self):
-        """Generate bot activity time series data"""
-        
-        # Generate daily bot interactions for the past 3 months
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=90)
-        dates = pd.date_range(start=start_date, end=end_date, freq='D')
-        
-        activity_data = []
-        
-        for date in dates:
-            daily_stats = {
-                'date': date,
-                'total_users': len(self.singapore_data) + np.random.randint(-50, 50),
-                'active_users': np.random.randint(150, 400),
-                'medication_reminders_sent': np.random.randint(800, 1500),
-                'medication_confirmations': np.random.randint(600, 1200),
-                'family_notifications': np.random.randint(50, 150),
-                'emergency_alerts': np.random.randint(0, 5),
-                'health_check_ins': np.random.randint(200, 500),
-                'fall_risk_alerts': np.random.randint(5, 20),
-                'anomaly_detections': np.random.randint(10, 40),
-                'polyclinic_appointments_booked': np.random.randint(20, 80),
-                'user_satisfaction_score': np.random.normal(4.2, 0.3),  # 1-5 scale
-                'response_time_seconds': np.random.normal(2.5, 0.8),
-                'system_uptime_pct': np.random.normal(0.995, 0.01)  # 99.5% uptime
-            }
-            
-            # Weekend patterns
-            if date.weekday() >= 5:
-                daily_stats['active_users'] *= 0.8
-                daily_stats['medication_reminders_sent'] *= 0.9
-                daily_stats['polyclinic_appointments_booked'] *= 0.3
-            
-            # Holiday/special events (Singapore national holidays)
-            singapore_holidays = ['2024-01-01', '2024-02-10', '2024-02-12', '2024-03-29', 
-                                '2024-04-10', '2024-05-01', '2024-05-22', '2024-06-17', 
-                                '2024-08-09', '2024-10-31', '2024-12-25']
-            
-            if date.strftime('%Y-%m-%d') in singapore_holidays:
-                daily_stats['active_users'] *= 0.6
-                daily_stats['family_notifications'] *= 1.5  # More family contact on holidays
-            
-            activity_data.append(daily_stats)
-        
-        self.bot_activity = pd.DataFrame(activity_data)
+    def _read_bot_data(self, days):
+        singapore_data = read_csv_typed('data/singapore/processed/singapore_enhanced_bot_data.csv')
+        return (singapore_data,) + self.load_bot_activity(days)
+    
+    def load_bot_activity(self, days=90):
+        """
+        Daily bot metrics and calls per handler over the last `days` days, from the rollups of the
+        bot's event log (see bot_events.py; days logged since the last refresh are folded in first)
+        """
+        daily, handlers = bot_activity(start=datetime.now().date() - timedelta(days=days - 1))
+        daily = daily.assign(
+            adherence_rate=daily['medications_taken'] / (daily['medications_taken'] + daily['medications_missed']),
+            emergency_alerts=daily['fall_alerts'] + daily['location_shares'],
+            handler_success_rate=1 - daily['handler_errors'] / daily['handler_calls'],
+        )
+        usage = handlers.groupby('handler')['calls'].sum().sort_values(ascending=False)
+        return daily, usage
     
     def create_bot_performance_overview(self):
         """Create bot performance overview charts"""
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
         
         fig = make_subplots(
             rows=2, cols=3,
             subplot_titles=(
                 'Daily Active Users',
                 'Medication Adherence',
-                'Emergency Response',
-                'User Satisfaction',
-                'System Performance',
+                'Emergency Alerts',
+                'Response Time (ms)',
+                'Handler Success Rate',
                 'Bot Feature Usage'
             ),
             specs=[[{"secondary_y": False}, {"secondary_y": False}, {"secondary_y": False}],
@@ -401,17 +476,12 @@ class SingaporeBotAnalyticsDashboard:
                 y=self.bot_activity['active_users'],
                 name='Active Users',
                 line=dict(color='blue'),
-                fill='tonexty'
+                fill='tozeroy'
             ),
             row=1, col=1
         )
         
-        # Medication adherence rate
-        self.bot_activity['adherence_rate'] = (
-            self.bot_activity['medication_confirmations'] / 
-            self.bot_activity['medication_reminders_sent']
-        )
-        
+        # Medication adherence: share of Taken among Taken / Missed answers
         fig.add_trace(
             go.Scatter(
                 x=self.bot_activity['date'],
@@ -426,50 +496,62 @@ class SingaporeBotAnalyticsDashboard:
         fig.add_trace(
             go.Bar(
                 x=self.bot_activity['date'],
-                y=self.bot_activity['emergency_alerts'],
-                name='Emergency Alerts',
+                y=self.bot_activity['fall_alerts'],
+                name='Fall Alerts',
                 marker_color='red'
             ),
             row=1, col=3
         )
         
-        # User satisfaction over time
+        fig.add_trace(
+            go.Bar(
+                x=self.bot_activity['date'],
+                y=self.bot_activity['location_shares'],
+                name='Location Shares',
+                marker_color='darkorange'
+            ),
+            row=1, col=3
+        )
+        
+        # Handler latency
         fig.add_trace(
             go.Scatter(
                 x=self.bot_activity['date'],
-                y=self.bot_activity['user_satisfaction_score'],
-                name='Satisfaction Score',
+                y=self.bot_activity['latency_p95_ms'],
+                name='p95 Response Time',
                 line=dict(color='orange'),
                 mode='lines+markers'
             ),
             row=2, col=1
         )
         
-        # System uptime
         fig.add_trace(
             go.Scatter(
                 x=self.bot_activity['date'],
-                y=self.bot_activity['system_uptime_pct'],
-                name='System Uptime',
+                y=self.bot_activity['latency_mean_ms'],
+                name='Mean Response Time',
+                line=dict(color='gold')
+            ),
+            row=2, col=1
+        )
+        
+        # Share of handler calls that completed without an error
+        fig.add_trace(
+            go.Scatter(
+                x=self.bot_activity['date'],
+                y=self.bot_activity['handler_success_rate'],
+                name='Handler Success Rate',
                 line=dict(color='purple'),
-                fill='tonexty'
+                fill='tozeroy'
             ),
             row=2, col=2
         )
         
-        # Feature usage pie chart
-        feature_usage = {
-            'Medication Reminders': self.bot_activity['medication_reminders_sent'].sum(),
-            'Health Check-ins': self.bot_activity['health_check_ins'].sum(),
-            'Family Notifications': self.bot_activity['family_notifications'].sum(),
-            'Appointment Booking': self.bot_activity['polyclinic_appointments_booked'].sum(),
-            'Emergency Alerts': self.bot_activity['emergency_alerts'].sum()
-        }
-        
+        # Feature usage pie chart: calls per handler
         fig.add_trace(
             go.Pie(
-                labels=list(feature_usage.keys()),
-                values=list(feature_usage.values()),
+                labels=list(self.handler_usage.index),
+                values=list(self.handler_usage.values),
                 name="Feature Usage"
             ),
             row=2, col=3
@@ -479,13 +561,16 @@ class SingaporeBotAnalyticsDashboard:
             height=800,
             title_text="🤖 Singapore Senior Care Bot Analytics Dashboard",
             title_font_size=18,
-            showlegend=True
+            showlegend=True,
+            barmode='stack'
         )
         
         return fig
     
     def create_user_demographics_analysis(self):
         """Analyze user demographics and usage patterns"""
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
         
         fig = make_subplots(
             rows=2, cols=2,
@@ -556,6 +641,8 @@ class SingaporeBotAnalyticsDashboard:
     
     def create_ml_model_performance(self):
         """Display ML model performance metrics"""
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
         
         # Simulate model performance data
         model_metrics = {
@@ -672,49 +759,57 @@ class SingaporeBotAnalyticsDashboard:
     
     def create_dashboard(self):
         """Create the complete bot analytics dashboard"""
+        import streamlit as st
         
         st.title("🤖 Singapore Senior Care Bot Analytics")
         st.markdown("### Performance monitoring and user engagement analytics")
         
-        # Key metrics
-        st.header("📊 Today's Key Metrics")
-        col1, col2, col3, col4, col5 = st.columns(5)
-        
-        latest_data = self.bot_activity.iloc[-1]
-        
-        with col1:
-            st.metric("Active Users", f"{int(latest_data['active_users'])}")
-        
-        with col2:
-            adherence_rate = latest_data['medication_confirmations'] / latest_data['medication_reminders_sent']
-            st.metric("Adherence Rate", f"{adherence_rate:.1%}")
-        
-        with col3:
-            st.metric("Emergency Alerts", f"{int(latest_data['emergency_alerts'])}")
-        
-        with col4:
-            st.metric("Satisfaction Score", f"{latest_data['user_satisfaction_score']:.1f}/5.0")
-        
-        with col5:
-            st.metric("System Uptime", f"{latest_data['system_uptime_pct']:.1%}")
-        
-        # Main performance dashboard
-        st.header("📈 Bot Performance Overview")
-        performance_fig = self.create_bot_performance_overview()
-        st.plotly_chart(performance_fig, use_container_width=True)
+        if not len(self.bot_activity):
+            st.info("No bot events have been logged yet. Run bot.py, or `python bot_events.py --simulate 90` "
+                    "for demo traffic.")
+        else:
+            # Key metrics
+            st.header("📊 Today's Key Metrics")
+            col1, col2, col3, col4, col5 = st.columns(5)
+            
+            latest_data = self.bot_activity.iloc[-1]
+            
+            with col1:
+                st.metric("Active Users", f"{int(latest_data['active_users'])}")
+            
+            with col2:
+                adherence_rate = latest_data['adherence_rate']
+                st.metric("Adherence Rate", f"{adherence_rate:.1%}" if pd.notna(adherence_rate) else "–")
+            
+            with col3:
+                st.metric("Emergency Alerts", f"{int(latest_data['emergency_alerts'])}")
+            
+            with col4:
+                latency = latest_data['latency_p95_ms']
+                st.metric("p95 Response Time", f"{latency:.0f} ms" if pd.notna(latency) else "–")
+            
+            with col5:
+                success_rate = latest_data['handler_success_rate']
+                st.metric("Handler Success", f"{success_rate:.1%}" if pd.notna(success_rate) else "–")
+            
+            # Main performance dashboard
+            st.header("📈 Bot Performance Overview")
+            performance_fig = cached_figure(('bot_performance', self.inputs), self.create_bot_performance_overview)
+            st.plotly_chart(performance_fig, use_container_width=True)
         
         # User demographics
         st.header("👥 User Demographics & Usage Patterns")
-        demographics_fig = self.create_user_demographics_analysis()
+        demographics_fig = cached_figure(('bot_demographics', self.inputs), self.create_user_demographics_analysis)
         st.plotly_chart(demographics_fig, use_container_width=True)
         
         # ML model performance
         st.header("🧠 ML Model Performance")
-        ml_fig = self.create_ml_model_performance()
+        ml_fig = cached_figure(('ml_performance', self.inputs), self.create_ml_model_performance)
         st.plotly_chart(ml_fig, use_container_width=True)
 
 def main():
     """Main function to run the dashboards"""
+    import streamlit as st
     
     st.sidebar.title("🇸🇬 Singapore Senior Care")
     dashboard_choice = st.sidebar.selectbox(
@@ -0,0 +1,212 @@
+"""
+streaming_anomaly.py
+
+Streaming health anomaly scoring for the Singapore Senior Care Bot.
+Daily vitals and activity records (steps, heart rate, blood pressure, sleep, ...) are scored the
+moment they arrive by combining two signals:
+  - the global SingaporeHealthAnomalyModel IsolationForest, which knows what is unusual for
+    Singapore seniors in general, and
+  - a personal baseline per user: running mean and variance of every feature (Welford's
+    algorithm), so a record far from the user's own normal is flagged even if it would be
+    ordinary for someone else.
+Baselines take O(1) memory per user and feature and are updated in place, so history is never
+reprocessed; they are saved to disk so a restart resumes where the stream left off.
+Deviating values are held out of the baseline in a separate running summary. When a feature
+keeps deviating for adapt_after records in a row, the change is taken as lasting (a new
+medication, less mobility after a fall, ...) and the held values become the user's new baseline.
+
+    python streaming_anomaly.py RECORDS.csv   # replay a file of daily records in time order
+"""
+
+import logging
+import os
+import numpy as np
+from model_registry import ModelRegistry
+from feature_store import UserFeatureStore, USER_FEATURES
+from model_features import DAILY_FEATURES
+
+logger = logging.getLogger(__name__)
+
+BASELINE_PATH = 'data/singapore/streaming/anomaly_baselines.npz'
+
+
+class PersonalBaselines:
+    """
+    Running per-user statistics of the daily features.
+    count[i, j], mean[i, j] and m2[i, j] (sum of squared deviations) describe feature
+    DAILY_FEATURES[j] for user user_ids[i]; held_count, held_mean and held_m2 do the same for the
+    current run of deviating values. Arrays grow by doubling as users are added.
+    """
+
+    ARRAYS = ('count', 'mean', 'm2', 'held_count', 'held_mean', 'held_m2')
+
+    def __init__(self, user_ids=(), **arrays):
+        n_features = len(DAILY_FEATURES)
+        self.user_ids = list(user_ids)
+        self._row = {user_id: i for i, user_id in enumerate(self.user_ids)}
+        capacity = max(16, len(self.user_ids))
+        for name in self.ARRAYS:
+            dtype = np.int32 if name.endswith('count') else np.float64
+            array = np.zeros((capacity, n_features), dtype=dtype)
+            if arrays.get(name) is not None:
+                array[:len(arrays[name])] = arrays[name]
+            setattr(self, name, array)
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def row(self, user_id):
+        """Row of user_id, adding an empty baseline for new users"""
+        row = self._row.get(user_id)
+        if row is None:
+            row = len(self.user_ids)
+            if row == len(self.count):
+                for name in self.ARRAYS:
+                    array = getattr(self, name)
+                    setattr(self, name, np.concatenate([array, np.zeros_like(array)]))
+            self.user_ids.append(user_id)
+            self._row[user_id] = row
+        return row
+
+    @staticmethod
+    def _welford(count, mean, m2, row, x):
+        present = ~np.isnan(x)
+        count[row, present] += 1
+        delta = x[present] - mean[row, present]
+        mean[row, present] += delta / count[row, present]
+        m2[row, present] += delta * (x[present] - mean[row, present])
+
+    def update(self, row, x):
+        """Welford update with one record; NaN (missing) features are skipped"""
+        self._welford(self.count, self.mean, self.m2, row, x)
+
+    def hold(self, row, x, deviating, adapt_after):
+        """
+        Track runs of deviating values: deviating features of x are added to the held summary, a
+        normal value ends the run. Features held for adapt_after records in a row replace their
+        baseline with the held values; returns the indices of those features.
+        """
+        ended = ~deviating & ~np.isnan(x)
+        for array in (self.held_count, self.held_mean, self.held_m2):
+            array[row, ended] = 0
+        self._welford(self.held_count, self.held_mean, self.held_m2, row, np.where(deviating, x, np.nan))
+        adopted = np.flatnonzero(self.held_count[row] >= adapt_after)
+        for base, held in ((self.count, self.held_count), (self.mean, self.held_mean), (self.m2, self.held_m2)):
+            base[row, adopted] = held[row, adopted]
+            held[row, adopted] = 0
+        return adopted
+
+    def std(self, row):
+        """Sample standard deviation per feature (NaN until a feature has two records)"""
+        count = self.count[row]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(count > 1, np.sqrt(self.m2[row] / (count - 1)), np.nan)
+
+    def save(self, path=BASELINE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        n = len(self.user_ids)
+        np.savez(tmp_path, user_ids=np.asarray(self.user_ids, dtype=str), features=np.asarray(DAILY_FEATURES),
+                 **{name: getattr(self, name)[:n] for name in self.ARRAYS})
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path=BASELINE_PATH):
+        """Saved baselines, or empty ones if none exist (or the feature list changed)"""
+        if not os.path.exists(path):
+            return cls()
+        with np.load(path, allow_pickle=False) as data:
+            if data['features'].tolist() != DAILY_FEATURES:
+                logger.warning("Anomaly baselines in %s use another feature list - starting fresh", path)
+                return cls()
+            # Files saved before deviating runs were tracked have no held_* arrays; those start empty
+            return cls(data['user_ids'].tolist(), **{name: data[name] for name in cls.ARRAYS if name in data.files})
+
+
+class StreamingAnomalyScorer:
+    """Scores one daily record at a time against the global model and the user's own baseline"""
+
+    def __init__(self, registry=None, store=None, baselines=None, z_threshold=3.5, min_history=7, adapt_after=7):
+        self.registry = registry if registry is not None else ModelRegistry(names=['health_anomaly']).load()
+        self.store = store if store is not None else UserFeatureStore.load_or_build()
+        self.baselines = baselines if baselines is not None else PersonalBaselines.load()
+        self.z_threshold = z_threshold
+        self.min_history = min_history
+        self.adapt_after = adapt_after
+        self._age = self.store.columns.index('age')
+
+    def _daily_vector(self, record):
+        return np.array([record.get(name, np.nan) for name in DAILY_FEATURES], dtype=np.float64)
+
+    def score(self, user_id, record):
+        """
+        Score a daily record (dict of feature values) and fold its non-deviating values into the user's baseline.
+        Returns the global IsolationForest score (higher is more unusual), the features that
+        deviate more than z_threshold standard deviations from the user's own history, and
+        whether the record is flagged as an anomaly by either signal.
+        """
+        x = self._daily_vector(record)
+        row = self.baselines.row(user_id)
+
+        # Personal deviation, once a feature has enough history to trust its spread
+        mean, std = self.baselines.mean[row], self.baselines.std(row)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            z = (x - mean) / std
+        trusted = (self.baselines.count[row] >= self.min_history) & (std > 0) & ~np.isnan(x)
+        deviating = trusted & (np.abs(z) >= self.z_threshold)
+        deviations = {DAILY_FEATURES[j]: float(z[j]) for j in np.flatnonzero(deviating)}
+
+        # Global score; missing features fall back to the user's mean, else the training mean
+        global_score, global_flag = None, False
+        loaded = self.registry.get('health_anomaly')
+        if loaded is not None:
+            vector = self.store.vector(user_id)
+            age = USER_FEATURES['age'] if vector is None else vector[self._age]
+            model_row = np.concatenate([[age], x])
+            fallback = np.where(self.baselines.count[row] > 0, mean, loaded.mean[1:])
+            model_row[1:] = np.where(np.isnan(x), fallback, x)
+            X = loaded.transform(model_row[np.newaxis, :])
+            raw_score = loaded.model.score_samples(X)[0]
+            global_score = float(-raw_score)
+            global_flag = bool(raw_score < loaded.model.offset_)
+
+        # Deviating values are kept out of the baseline, so a few anomalies do not become the user's
+        # normal; globally unusual records still update it (they may be this user's normal). A
+        # deviation that lasts adapt_after records is a new normal and replaces the baseline.
+        self.baselines.update(row, np.where(deviating, np.nan, x))
+        adopted = self.baselines.hold(row, x, deviating, self.adapt_after)
+        if len(adopted):
+            logger.info("New baseline for %s after a lasting change in %s", user_id,
+                        ', '.join(DAILY_FEATURES[j] for j in adopted))
+        return {
+            'global_score': global_score,
+            'global_flag': global_flag,
+            'deviations': deviations,
+            'is_anomaly': global_flag or bool(deviations),
+        }
+
+    def save(self, path=BASELINE_PATH):
+        return self.baselines.save(path)
+
+
+if __name__ == "__main__":
+    import argparse
+    import pandas as pd
+    parser = argparse.ArgumentParser(description="Replay daily health records through the streaming anomaly scorer")
+    parser.add_argument('records', help="CSV of daily records with a user_id column, in time order")
+    parser.add_argument('--baselines', default=BASELINE_PATH)
+    args = parser.parse_args()
+
+    scorer = StreamingAnomalyScorer(baselines=PersonalBaselines.load(args.baselines))
+    flagged = 0
+    records = pd.read_csv(args.records)
+    for record in records.to_dict('records'):
+        user_id = str(record.pop('user_id'))
+        result = scorer.score(user_id, record)
+        if result['is_anomaly']:
+            flagged += 1
+            score = 'n/a' if result['global_score'] is None else f"{result['global_score']:.3f}"
+            print(f"🚨 {user_id}: global={score} deviations={result['deviations']}")
+    scorer.save(args.baselines)
+    print(f"✅ Scored {len(records):,} records, {flagged:,} flagged; baselines saved to {args.baselines}")
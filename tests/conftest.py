@@ -0,0 +1,59 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+# The project is a set of flat top-level modules; make them importable from the tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def population(tmp_path_factory):
+    """A small feature store, daily records for most of its users, and a registry with the three served models"""
+    from sklearn.ensemble import GradientBoostingRegressor, IsolationForest, RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+    from drift_monitor import drift_reference
+    from feature_store import UserFeatureStore
+    from model_features import (ADHERENCE_FEATURES, ANOMALY_FEATURES, DAILY_FEATURES, FALL_RISK_FEATURES,
+                                adherence_features, anomaly_features, fall_risk_features)
+    from model_registry import publish_model
+
+    directory = tmp_path_factory.mktemp('population')
+    rng = np.random.default_rng(0)
+    n = 120
+    source = directory / 'singapore_enhanced_bot_data.csv'
+    pd.DataFrame({
+        'user_id': [f"user_{i:03d}" for i in range(n)],
+        'age': rng.integers(60, 95, n),
+        'chronic_conditions_count': rng.integers(0, 5, n),
+        'medications_per_day': rng.integers(1, 8, n),
+        'pioneer_generation': rng.integers(0, 2, n),
+        'hdb_flat_type': rng.choice(['2-room', '3-room', '4-room'], n),
+        'has_family_nearby': rng.integers(0, 2, n),
+        'medisave_balance': rng.normal(25000, 8000, n),
+        'preferred_language': rng.choice(['English', 'Mandarin'], n),
+    }).to_csv(source, index=False)
+    store = UserFeatureStore.build(str(source))
+    daily = pd.DataFrame(rng.normal(50, 10, (n, len(DAILY_FEATURES))), columns=DAILY_FEATURES)
+    daily['user_id'] = store.user_ids
+    daily = daily.iloc[:100]  # the last users have no daily record
+
+    model_dir = str(directory / 'models')
+    for name, features, X, model, y in [
+        ('medication_adherence', ADHERENCE_FEATURES, adherence_features(store),
+         RandomForestClassifier(n_estimators=10, random_state=0), lambda X: (X[:, 0] < 78).astype(int)),
+        ('fall_risk', FALL_RISK_FEATURES, fall_risk_features(store),
+         GradientBoostingRegressor(n_estimators=20, random_state=0), lambda X: X[:, 0] - 40),
+        ('health_anomaly', ANOMALY_FEATURES,
+         anomaly_features(store, store.user_ids[:100].tolist(), daily.set_index('user_id')),
+         IsolationForest(n_estimators=20, random_state=0), None),
+    ]:
+        scaler = StandardScaler().fit(X)
+        if y is None:
+            model.fit(scaler.transform(X))
+        else:
+            model.fit(scaler.transform(X), y(X))
+        publish_model(name, model, scaler, f"{name:0<16}", {}, model_dir=model_dir,
+                      drift_reference=drift_reference(X, features))
+    return store, daily, model_dir
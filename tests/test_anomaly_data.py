@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+import singapore_ml_models
+from singapore_ml_models import SingaporeHealthAnomalyModel
+
+
+@pytest.fixture
+def anomaly_data(population, monkeypatch):
+    store = population[0]
+    monkeypatch.setattr(singapore_ml_models, 'cached_dataset', lambda name, inputs, params, seed, build_fn: build_fn())
+
+    def generate(**kwargs):
+        model = SingaporeHealthAnomalyModel(params={})
+        return model.prepare_singapore_anomaly_data(store=store, seed=7, **kwargs)
+    return store, generate
+
+
+def test_layout_and_reproducibility(anomaly_data):
+    store, generate = anomaly_data
+    data = generate(n_days=10)
+    assert len(data) == len(store) * 10
+    assert data.columns.tolist() == ['user_id', 'day'] + SingaporeHealthAnomalyModel.ANOMALY_FEATURES + ['is_anomaly']
+    assert data['day'].tolist()[:11] == list(range(10)) + [0]
+    assert data['user_id'].iloc[10] == store.user_ids[1]
+    ages = data.groupby('user_id', observed=True)['age'].first()
+    assert np.array_equal(ages.loc[store.user_ids].to_numpy(), store.column('age'))
+    assert data.equals(generate(n_days=10))
+
+
+def test_larger_populations_reuse_profiles_with_suffixed_ids(anomaly_data):
+    store, generate = anomaly_data
+    data = generate(n_users=len(store) * 2 + 3, n_days=2)
+    user_ids = data['user_id'].astype(str).unique()
+    assert len(user_ids) == len(store) * 2 + 3
+    assert f"{store.user_ids[0]}_1" in user_ids and f"{store.user_ids[2]}_2" in user_ids
+
+
+def test_injected_anomalies_stand_out(anomaly_data):
+    _, generate = anomaly_data
+    data = generate(n_users=600, n_days=30, anomaly_rate=0.1)
+    anomalies, normal = data[data['is_anomaly'] == 1], data[data['is_anomaly'] == 0]
+    assert 0.08 < data['is_anomaly'].mean() < 0.12
+    assert normal['emergency_button_pressed'].mean() < 0.07 < anomalies['emergency_button_pressed'].mean()
+    assert anomalies['temperature_celsius'].max() > 38 > normal['temperature_celsius'].max()
+    assert (data['steps_daily'] >= 0).all() and (data['water_intake_liters'] >= 0.2).all()
@@ -0,0 +1,82 @@
+import os
+import shutil
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.preprocessing import StandardScaler
+import batch_scoring
+from batch_scoring import RiskTable, RiskTableReader, score_population
+from inference_service import RiskInferenceService
+from model_features import fall_risk_features
+from model_registry import ModelRegistry, publish_model, read_manifest
+
+
+@pytest.mark.parametrize('chunk_size, workers', [(1000, None), (25, 1), (25, 2)])
+def test_batch_scores_match_live_inference(population, chunk_size, workers):
+    store, daily, model_dir = population
+    table, drift = score_population(store, daily, model_dir, chunk_size=chunk_size, max_workers=workers)
+    service = RiskInferenceService(ModelRegistry(model_dir).load(), store)
+    for user_id in store.user_ids[::7]:
+        scores, live = table.get(user_id), service.user_risk(user_id)
+        assert scores['adherence_risk'] == pytest.approx(live['adherence_risk'], abs=1e-6)
+        assert scores['fall_risk'] == pytest.approx(live['fall_risk'], rel=1e-6)
+    assert table.get('user_001')['anomaly_flag'] in (True, False)
+    assert table.get('user_110')['anomaly_score'] is None
+    assert set(drift) == {'medication_adherence', 'fall_risk', 'health_anomaly'}
+    assert drift['health_anomaly']['rows'] == 100
+
+
+def test_saved_table_and_reader(population, tmp_path):
+    store, daily, model_dir = population
+    table, _ = score_population(store, daily, model_dir, max_workers=1)
+    path = table.save(str(tmp_path))
+    loaded = RiskTable.load(path)
+    assert loaded.versions == table.versions
+    assert loaded.get('user_005') == table.get('user_005')
+    assert loaded.get('user_404') is None
+
+    reader = RiskTableReader(str(tmp_path))
+    assert reader.get('user_005') == table.get('user_005')
+    assert RiskTableReader(str(tmp_path / 'empty')).get('user_005') is None
+
+
+@pytest.fixture
+def publish_mid_run(population, tmp_path, monkeypatch):
+    """A copy of the population registry, and a hook that publishes a new fall risk version once the run has started"""
+    store, daily, model_dir = population
+    model_dir = str(shutil.copytree(model_dir, tmp_path / 'models'))
+    published = []
+
+    def publish(after_publish=None):
+        real_features = batch_scoring.adherence_features
+
+        def features_then_publish(store_):
+            X = fall_risk_features(store)
+            scaler = StandardScaler().fit(X)
+            model = GradientBoostingRegressor(n_estimators=5, random_state=1).fit(scaler.transform(X), X[:, 0])
+            published.append(publish_model('fall_risk', model, scaler, 'f' * 16, {}, model_dir=model_dir))
+            if after_publish is not None:
+                after_publish()
+            return real_features(store_)
+
+        monkeypatch.setattr(batch_scoring, 'adherence_features', features_then_publish)
+
+    return store, daily, model_dir, publish, published
+
+
+def test_workers_score_with_the_versions_the_run_started_with(publish_mid_run):
+    store, daily, model_dir, publish, published = publish_mid_run
+    before, _ = score_population(store, daily, model_dir, max_workers=1)
+    publish()
+    table, _ = score_population(store, daily, model_dir, chunk_size=25, max_workers=2)
+    assert published and table.versions['fall_risk'] == before.versions['fall_risk'] != published[0]
+    assert np.array_equal(table.scores['fall_risk'], before.scores['fall_risk'])
+
+
+def test_run_fails_when_a_worker_cannot_load_its_version(publish_mid_run):
+    store, daily, model_dir, publish, _ = publish_mid_run
+    entry = read_manifest(model_dir)['models']['fall_risk']
+    active = next(v for v in entry['versions'] if v['version'] == entry['active'])
+    publish(lambda: shutil.rmtree(os.path.join(model_dir, 'registry', active['path'])))
+    with pytest.raises(ValueError, match='fall_risk'):
+        score_population(store, daily, model_dir, chunk_size=25, max_workers=2)
@@ -0,0 +1,113 @@
+import asyncio
+import glob
+import json
+import os
+import threading
+import types
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import pytest
+import bot_events
+from bot_events import EventLog, load_event_rollups, read_events, refresh_event_rollups, timed
+from rollups import rollup_lock
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    return str(tmp_path / 'events'), str(tmp_path / 'rollups')
+
+
+def write_day(log_dir, day, records):
+    path = os.path.join(log_dir, f"date={day}", 'events.jsonl')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+
+def handler_event(user, name='remind', ms=10.0, ok=1):
+    return {'ts': 0.0, 'ev': 'handler', 'user': str(user), 'name': name, 'ms': ms, 'ok': ok}
+
+
+def test_refreshing_today_only_does_not_duplicate_rows(dirs):
+    log_dir, rollup_dir = dirs
+    log = EventLog(log_dir)
+    for refresh in range(3):
+        log.emit('handler', 1, name='remind', ms=5.0, ok=1)
+        daily, handlers = refresh_event_rollups(log_dir=log_dir, rollup_dir=rollup_dir)
+        assert len(daily) == 1
+        assert len(handlers) == 1
+        assert handlers['calls'].iloc[0] == refresh + 1
+    log.close()
+
+
+def test_finished_days_are_kept_and_today_is_redone(dirs):
+    log_dir, rollup_dir = dirs
+    today = pd.Timestamp.now().strftime('%Y-%m-%d')
+    write_day(log_dir, '2024-01-01', [handler_event(1), handler_event(2), {'ts': 0.0, 'ev': 'medication_taken', 'user': '1'}])
+    write_day(log_dir, today, [handler_event(3)])
+    daily, _ = refresh_event_rollups(log_dir=log_dir, rollup_dir=rollup_dir)
+    assert list(daily['handler_calls']) == [2, 1]
+    with open(os.path.join(rollup_dir, '_rollups.json')) as f:
+        assert json.load(f)['watermark'] == '2024-01-01'
+
+    write_day(log_dir, today, [handler_event(4, ok=0)])
+    daily, handlers = refresh_event_rollups(log_dir=log_dir, rollup_dir=rollup_dir)
+    assert list(daily['handler_calls']) == [2, 2]
+    assert list(daily['handler_errors']) == [0, 1]
+    assert list(daily['active_users']) == [2, 2]
+    assert daily['medications_taken'].iloc[0] == 1
+    assert handlers.groupby('date')['calls'].sum().tolist() == [2, 2]
+
+
+def test_truncated_line_is_skipped(dirs):
+    log_dir, _ = dirs
+    write_day(log_dir, '2024-01-01', [handler_event(1)])
+    path = os.path.join(log_dir, 'date=2024-01-01', 'events.jsonl')
+    with open(path, 'a') as f:
+        f.write('{"ts":1.0,"ev":"hand')
+    events = read_events(path)
+    assert len(events) == 1
+    assert events['user'].iloc[0] == '1'
+
+
+def test_timed_logs_latency_and_failures(dirs, monkeypatch):
+    log_dir, _ = dirs
+    monkeypatch.setattr(bot_events, '_event_log', EventLog(log_dir))
+
+    async def works(update, context):
+        return 'done'
+
+    async def fails(update, context):
+        raise RuntimeError('boom')
+
+    update = types.SimpleNamespace(effective_user=types.SimpleNamespace(id=42))
+    assert asyncio.run(timed(works)(update, None)) == 'done'
+    with pytest.raises(RuntimeError):
+        asyncio.run(timed(fails)(update, None))
+
+    (day, path), = bot_events.log_partitions(log_dir)
+    events = read_events(path)
+    assert events['name'].tolist() == ['works', 'fails']
+    assert events['ok'].tolist() == [1, 0]
+    assert events['user'].tolist() == ['42', '42']
+
+
+def test_sessions_refreshing_together_share_one_snapshot(dirs):
+    log_dir, rollup_dir = dirs
+    write_day(log_dir, '2024-01-01', [handler_event(1), handler_event(2)])
+    refresh_event_rollups(log_dir=log_dir, rollup_dir=rollup_dir)
+    write_day(log_dir, '2024-01-02', [handler_event(3)])
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: refresh_event_rollups(log_dir=log_dir, rollup_dir=rollup_dir), range(8)))
+    assert all(daily['handler_calls'].tolist() == [2, 1] for daily, _ in results)
+    assert glob.glob(os.path.join(rollup_dir, '*.tmp')) == []
+
+    # A reader never sees the tables between a refresh's writes
+    loaded = threading.Event()
+    with rollup_lock(rollup_dir):
+        reader = threading.Thread(target=lambda: load_event_rollups(rollup_dir) and loaded.set())
+        reader.start()
+        assert not loaded.wait(0.3)
+    reader.join(10)
+    assert loaded.is_set()
@@ -0,0 +1,27 @@
+import singapore_ml_models
+from singapore_ml_models import _threads_per_worker, _train_country_adherence
+
+
+def test_cores_are_split_between_workers(monkeypatch):
+    monkeypatch.setattr(singapore_ml_models.os, 'cpu_count', lambda: 8)
+    assert _threads_per_worker(4) == 2
+    assert _threads_per_worker(3) == 2
+    assert _threads_per_worker(16) == 1
+    monkeypatch.setattr(singapore_ml_models.os, 'cpu_count', lambda: None)
+    assert _threads_per_worker(4) == 1
+
+
+def test_worker_trains_with_its_thread_share(monkeypatch):
+    built = {}
+
+    class FakeModel:
+        def __init__(self, country, n_jobs):
+            built.update(country=country, n_jobs=n_jobs)
+
+        def train(self, **kwargs):
+            return 0.9, {}, [[1]]
+
+    monkeypatch.setattr(singapore_ml_models, 'MedicationAdherenceModel', FakeModel)
+    result = _train_country_adherence('Japan', None, 10, 'out', n_jobs=2)
+    assert built == {'country': 'Japan', 'n_jobs': 2}
+    assert result['accuracy'] == 0.9
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+from csv_ingest import StreamingAggregate, aggregate_csv, iter_csv_chunks, read_csv_typed
+from singapore_data_setup import create_simulated_singapore_data
+
+AGGREGATIONS = {
+    'attendance': ('total_attendance', 'sum'),
+    'days': ('total_attendance', 'count'),
+    'lowest': ('elderly_attendance', 'min'),
+    'highest': ('elderly_attendance', 'max'),
+    'mean_refills': ('medication_refills', 'mean'),
+}
+
+
+@pytest.fixture(scope='module')
+def attendance_csv(tmp_path_factory):
+    path = tmp_path_factory.mktemp('raw') / 'polyclinic_attendance.csv'
+    create_simulated_singapore_data('polyclinic_attendance', years=1).to_csv(path, index=False)
+    return path
+
+
+def _full_read(path):
+    frame = pd.read_csv(path, parse_dates=['date'])
+    frame['month'] = frame['date'].dt.to_period('M')
+    return (frame.groupby(['polyclinic', 'month'])
+            .agg(**{name: pd.NamedAgg(column, how) for name, (column, how) in AGGREGATIONS.items()})
+            .reset_index())
+
+
+def _assert_same(result, expected):
+    result = result.assign(polyclinic=result['polyclinic'].astype(str))
+    assert result[['polyclinic', 'month']].equals(expected[['polyclinic', 'month']])
+    for name in AGGREGATIONS:
+        np.testing.assert_allclose(result[name].to_numpy(dtype=float), expected[name].to_numpy(dtype=float),
+                                   rtol=1e-12, err_msg=name)
+
+
+def test_typed_read_uses_declared_dtypes(attendance_csv):
+    frame = read_csv_typed(attendance_csv, columns=['date', 'polyclinic', 'total_attendance', 'not_a_column'])
+    assert frame.columns.tolist() == ['date', 'polyclinic', 'total_attendance']
+    assert isinstance(frame['polyclinic'].dtype, pd.CategoricalDtype)
+    assert frame['total_attendance'].dtype == np.int32
+    assert np.issubdtype(frame['date'].dtype, np.datetime64)
+    assert sum(len(chunk) for chunk in iter_csv_chunks(attendance_csv, chunk_rows=1000)) == len(frame)
+
+
+@pytest.mark.parametrize('chunk_rows', [137, 1000, 10_000_000])
+def test_chunked_aggregate_matches_full_read(attendance_csv, chunk_rows):
+    result = aggregate_csv(attendance_csv, ['polyclinic', 'month'], AGGREGATIONS,
+                           derive={'month': lambda chunk: chunk['date'].dt.to_period('M')}, chunk_rows=chunk_rows)
+    _assert_same(result, _full_read(attendance_csv))
+
+
+def test_merge_state_and_regroup(attendance_csv):
+    frame = read_csv_typed(attendance_csv)
+    frame['month'] = frame['date'].dt.to_period('M')
+    first, second = StreamingAggregate(['polyclinic', 'month'], AGGREGATIONS), \
+        StreamingAggregate(['polyclinic', 'month'], AGGREGATIONS)
+    first.update(frame.iloc[:2500])
+    second.update(frame.iloc[2500:])
+    resumed = StreamingAggregate.from_state(['polyclinic', 'month'], AGGREGATIONS, first.state_frame(), first.rows)
+    resumed.merge(second)
+    assert resumed.rows == len(frame)
+    _assert_same(resumed.result(), _full_read(attendance_csv))
+
+    monthly = resumed.regroup(['month']).result()
+    expected = frame.groupby('month')['total_attendance'].sum()
+    assert monthly['attendance'].tolist() == expected.tolist()
+    assert monthly['mean_refills'].tolist() == pytest.approx(frame.groupby('month')['medication_refills'].mean().tolist())
+
+
+def test_unknown_aggregation_is_rejected():
+    with pytest.raises(ValueError):
+        StreamingAggregate(['polyclinic'], {'median': ('total_attendance', 'median')})
+
+
+def test_float_sums_do_not_depend_on_chunking(tmp_path):
+    path = tmp_path / 'hospital_bed_occupancy.csv'
+    create_simulated_singapore_data('hospital_bed_occupancy', years=3).to_csv(path, index=False)
+    aggregations = {'rate': ('occupancy_rate', 'mean'), 'pct': ('elderly_patients_pct', 'sum')}
+    whole = aggregate_csv(path, ['hospital'], aggregations, chunk_rows=10_000_000)
+    chunked = aggregate_csv(path, ['hospital'], aggregations, chunk_rows=97)
+    np.testing.assert_allclose(chunked[['rate', 'pct']], whole[['rate', 'pct']], rtol=1e-12)
+    assert chunked['pct'].dtype == np.float64
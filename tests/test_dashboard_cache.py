@@ -0,0 +1,67 @@
+import os
+import sys
+import pytest
+from singapore_visualizations import cached_data, file_fingerprint
+
+
+def _dashboard_app():
+    # Runs as a Streamlit script: counts how often each build actually runs
+    import os
+    import streamlit as st
+    from singapore_visualizations import cached_data, cached_figure, file_fingerprint
+    source, counter = os.environ['CACHE_TEST_SOURCE'], os.environ['CACHE_TEST_COUNTER']
+
+    def build(kind):
+        def run():
+            with open(counter, 'a') as f:
+                f.write(kind + '\n')
+            with open(source) as f:
+                return f.read()
+        return run
+
+    text = cached_data(('text', file_fingerprint(source)), build('data'))
+    district = st.session_state.get('district', 'East')
+    cached_figure(('figure', file_fingerprint(source), district), build('figure'))
+    st.write(text)
+
+
+def test_fingerprint_follows_file_changes(tmp_path):
+    path = tmp_path / 'data.csv'
+    missing = file_fingerprint(str(path))
+    path.write_text('a\n1\n')
+    created = file_fingerprint(str(path))
+    path.write_text('a\n1\n2\n')
+    assert len({missing, created, file_fingerprint(str(path))}) == 3
+
+
+def test_outside_streamlit_builds_every_time():
+    calls = []
+    assert cached_data('key', lambda: calls.append(1) or 'value') == 'value'
+    cached_data('key', lambda: calls.append(1) or 'value')
+    assert len(calls) == 2
+
+
+def test_reruns_reuse_cached_loads_and_figures(tmp_path, monkeypatch):
+    testing = pytest.importorskip('streamlit.testing.v1')
+    source, counter = tmp_path / 'data.csv', tmp_path / 'builds.txt'
+    source.write_text('first')
+    monkeypatch.setenv('CACHE_TEST_SOURCE', str(source))
+    monkeypatch.setenv('CACHE_TEST_COUNTER', str(counter))
+    monkeypatch.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    # AppTest leaves its temporary script as __main__, which spawned worker processes in later tests would import
+    monkeypatch.setitem(sys.modules, '__main__', sys.modules['__main__'])
+
+    app = testing.AppTest.from_function(_dashboard_app)
+    app.run()
+    app.run()
+    assert not app.exception
+    assert counter.read_text().split() == ['data', 'figure']
+
+    # A new filter selection builds only its figure; a rewritten file reloads the data
+    app.session_state['district'] = 'West'
+    app.run()
+    assert counter.read_text().split() == ['data', 'figure', 'figure']
+    source.write_text('second, longer')
+    app.run()
+    assert counter.read_text().split() == ['data', 'figure', 'figure', 'data', 'figure']
+    assert app.markdown[0].value == 'second, longer'
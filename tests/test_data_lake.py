@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+from data_lake import LakeWriter, convert_csv_to_lake, iter_lake, lake_info, load_lake
+from singapore_data_setup import create_simulated_singapore_data
+
+
+@pytest.fixture(scope='module')
+def attendance():
+    return create_simulated_singapore_data('polyclinic_attendance', years=1)
+
+
+def _write(frame, lake_dir, chunk_rows=300):
+    writer = LakeWriter('polyclinic_attendance', str(lake_dir))
+    for start in range(0, len(frame), chunk_rows):
+        writer.write(frame.iloc[start:start + chunk_rows])
+    return writer.close()
+
+
+def test_round_trip_keeps_rows_in_csv_order(tmp_path, attendance):
+    info = _write(attendance, tmp_path)
+    assert info['rows'] == len(attendance)
+    assert info['start'] == f"{pd.Timestamp(attendance['date'].min()):%Y-%m-%d}"
+    assert info == lake_info('polyclinic_attendance', str(tmp_path))
+
+    lake = load_lake('polyclinic_attendance', lake_dir=str(tmp_path))
+    assert lake.columns.tolist() == attendance.columns.tolist()
+    assert isinstance(lake['polyclinic'].dtype, pd.CategoricalDtype)
+    assert lake['polyclinic'].astype(str).tolist() == attendance['polyclinic'].astype(str).tolist()
+    assert (lake['date'].to_numpy() == pd.to_datetime(attendance['date']).to_numpy()).all()
+    assert np.array_equal(lake['total_attendance'].to_numpy(), attendance['total_attendance'].to_numpy())
+
+
+def test_filters_match_pandas(tmp_path, attendance):
+    _write(attendance, tmp_path)
+    dates = pd.to_datetime(attendance['date'])
+    facility = attendance['polyclinic'].iloc[0]
+    expected = attendance[(dates >= '2023-03-15') & (dates <= '2023-05-02') & (attendance['polyclinic'] == facility)]
+    lake = load_lake('polyclinic_attendance', columns=['date', 'total_attendance'], start='2023-03-15',
+                     end='2023-05-02', facilities=[facility], lake_dir=str(tmp_path))
+    assert lake.columns.tolist() == ['date', 'total_attendance']
+    assert lake['total_attendance'].tolist() == expected['total_attendance'].tolist()
+
+    batches = list(iter_lake('polyclinic_attendance', start='2023-03-15', lake_dir=str(tmp_path), batch_rows=100))
+    assert sum(len(batch) for batch in batches) == int((dates >= '2023-03-15').sum())
+
+
+def test_rewrite_replaces_and_abort_keeps_previous(tmp_path, attendance):
+    _write(attendance, tmp_path)
+    _write(attendance.iloc[:40], tmp_path)
+    assert len(load_lake('polyclinic_attendance', lake_dir=str(tmp_path))) == 40
+
+    writer = LakeWriter('polyclinic_attendance', str(tmp_path))
+    writer.write(attendance)
+    writer.abort()
+    assert len(load_lake('polyclinic_attendance', lake_dir=str(tmp_path))) == 40
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['polyclinic_attendance']
+
+
+def test_convert_csv(tmp_path, attendance):
+    csv_path = tmp_path / 'polyclinic_attendance.csv'
+    attendance.to_csv(csv_path, index=False)
+    info = convert_csv_to_lake('polyclinic_attendance', str(csv_path), str(tmp_path / 'lake'), chunk_rows=500)
+    assert info['rows'] == len(attendance)
+    lake = load_lake('polyclinic_attendance', lake_dir=str(tmp_path / 'lake'))
+    assert lake['elderly_attendance'].tolist() == attendance['elderly_attendance'].tolist()
@@ -0,0 +1,49 @@
+import os
+import pandas as pd
+from dataset_cache import cached_dataset, frame_digest
+
+
+def _builder(calls, value=1):
+    def build():
+        calls.append(value)
+        return pd.DataFrame({'x': [value, value + 1], 'label': ['a', 'b']})
+    return build
+
+
+def test_identical_requests_are_built_once(tmp_path):
+    source = tmp_path / 'input.csv'
+    source.write_text('a,b\n1,2\n')
+    calls = []
+    first = cached_dataset('demo', [str(source)], {'n': 2}, 42, _builder(calls), str(tmp_path / 'cache'))
+    second = cached_dataset('demo', [str(source)], {'n': 2}, 42, _builder(calls), str(tmp_path / 'cache'))
+    assert calls == [1]
+    assert second.equals(first)
+    assert [name for name in os.listdir(tmp_path / 'cache') if name.endswith('.tmp')] == []
+
+
+def test_inputs_params_and_seed_are_part_of_the_key(tmp_path):
+    source = tmp_path / 'input.csv'
+    source.write_text('a,b\n1,2\n')
+    cache_dir, calls = str(tmp_path / 'cache'), []
+    cached_dataset('demo', [str(source)], {'n': 2}, 42, _builder(calls), cache_dir)
+    cached_dataset('demo', [str(source)], {'n': 3}, 42, _builder(calls), cache_dir)
+    cached_dataset('demo', [str(source)], {'n': 2}, 7, _builder(calls), cache_dir)
+    source.write_text('a,b\n1,30\n')
+    cached_dataset('demo', [str(source)], {'n': 2}, 42, _builder(calls), cache_dir)
+    assert len(calls) == 4
+    assert len(os.listdir(cache_dir)) == 4
+
+
+def test_unseeded_datasets_are_not_cached(tmp_path):
+    calls = []
+    cached_dataset('demo', [], {}, None, _builder(calls), str(tmp_path / 'cache'))
+    cached_dataset('demo', [], {}, None, _builder(calls), str(tmp_path / 'cache'))
+    assert len(calls) == 2
+    assert not (tmp_path / 'cache').exists()
+
+
+def test_frame_digest_follows_content():
+    frame = pd.DataFrame({'x': [1, 2], 'y': ['a', 'b']})
+    assert frame_digest(frame) == frame_digest(frame.copy())
+    assert frame_digest(frame) != frame_digest(frame.assign(x=[1, 3]))
+    assert frame_digest(frame) != frame_digest(frame.rename(columns={'y': 'z'}))
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+from downsampling import downsample, lttb
+
+
+def _reference_lttb(x, y, threshold):
+    """Straightforward LTTB (Steinarsson), one bucket at a time"""
+    n = len(x)
+    every = (n - 2) / (threshold - 2)
+    keep, a = [0], 0
+    for i in range(threshold - 2):
+        lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+        next_lo, next_hi = hi, min(int((i + 2) * every) + 1, n)
+        if i == threshold - 3:
+            next_lo, next_hi = n - 1, n
+        avg_x, avg_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        areas = [abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a])) for j in range(lo, hi)]
+        a = lo + int(np.argmax(areas))
+        keep.append(a)
+    return np.array(keep + [n - 1])
+
+
+def test_matches_reference_implementation():
+    rng = np.random.default_rng(0)
+    for n, threshold in [(1000, 100), (3653, 500), (101, 7), (50, 49)]:
+        x = np.arange(n, dtype=float)
+        y = np.cumsum(rng.normal(size=n))
+        assert np.array_equal(lttb(x, y, threshold), _reference_lttb(x, y, threshold)), (n, threshold)
+
+
+def test_indices_keep_endpoints_and_order():
+    rng = np.random.default_rng(1)
+    x = np.sort(rng.uniform(0, 100, 5000))
+    y = rng.normal(size=5000)
+    keep = lttb(x, y, 300)
+    assert len(keep) == 300
+    assert keep[0] == 0 and keep[-1] == 4999
+    assert np.all(np.diff(keep) > 0)
+
+
+def test_short_series_and_tiny_thresholds_are_kept_whole():
+    assert np.array_equal(lttb(np.arange(10), np.zeros(10), 10), np.arange(10))
+    assert np.array_equal(lttb(np.arange(10), np.zeros(10), 50), np.arange(10))
+    assert np.array_equal(lttb(np.arange(10), np.zeros(10), 2), np.arange(10))
+
+
+def test_downsample_keeps_extremes_of_dated_frames():
+    days = pd.date_range('2015-01-01', periods=3653, freq='D')
+    values = 1000 + 200 * np.sin(np.arange(len(days)) * 2 * np.pi / 365)
+    values[1234], values[2345] = 5000, -3000
+    values[100], values[200] = np.nan, np.inf
+    frame = pd.DataFrame({'date': days, 'value': values})
+    reduced = downsample(frame, 'date', 'value', 400)
+    assert len(reduced) == 400
+    assert reduced['value'].max() == 5000 and reduced['value'].min() == -3000
+    assert np.isfinite(reduced['value']).all()
+    assert reduced['date'].iloc[0] == days[0] and reduced['date'].iloc[-1] == days[-1]
+    assert reduced['date'].is_monotonic_increasing
@@ -0,0 +1,78 @@
+import numpy as np
+import singapore_ml_models
+from drift_monitor import SIGNIFICANT_PSI, FeatureSketch, drift_reference
+from model_features import (ADHERENCE_FEATURES, FALL_RISK_FEATURES, FALL_RISK_INFERENCE_DEFAULTS, IMPUTED_FEATURES,
+                            adherence_features, fall_risk_features)
+
+
+def sketch_of(reference, X, parts=1):
+    sketch = FeatureSketch(reference)
+    for batch in np.array_split(X, parts):
+        sketch.update(batch)
+    return sketch
+
+
+def test_psi_is_small_for_the_training_distribution_and_large_after_a_shift():
+    rng = np.random.default_rng(0)
+    train = rng.normal(size=(20_000, 2))
+    reference = drift_reference(train, ['stable', 'moved'])
+    live = rng.normal(size=(20_000, 2))
+    live[:, 1] += 1.5
+    report = sketch_of(reference, live).report()
+    assert report['psi']['stable'] < 0.01
+    assert report['psi']['moved'] > SIGNIFICANT_PSI
+    assert report['drifted'] == ['moved']
+    assert report['max_psi'] == report['psi']['moved']
+
+
+def test_batches_and_merged_sketches_count_like_one_pass():
+    rng = np.random.default_rng(1)
+    reference = drift_reference(rng.normal(size=(5_000, 3)), ['a', 'b', 'c'])
+    live = rng.normal(size=(3_000, 3))
+    whole = sketch_of(reference, live)
+    first, second = sketch_of(reference, live[:1_000], parts=3), sketch_of(reference, live[1_000:])
+    first.merge(second)
+    assert np.array_equal(first.counts, whole.counts)
+    assert first.psi() == whole.psi()
+
+
+def test_missing_values_are_counted_not_binned():
+    reference = drift_reference(np.arange(100, dtype=float).reshape(-1, 1), ['x'])
+    sketch = sketch_of(reference, np.array([[1.0], [np.nan], [50.0]]))
+    assert sketch.report()['missing'] == {'x': 1}
+    assert sketch.counts.sum() == 2
+
+
+def test_imputed_features_judged_only_when_derived_like_training():
+    imputed = IMPUTED_FEATURES['fall_risk']
+    for derived in ['medication_count', 'seasonal_factor']:
+        assert callable(FALL_RISK_INFERENCE_DEFAULTS[derived])
+        assert derived not in imputed
+    assert 'bmi' in imputed
+    assert 'social_isolation_score' in imputed
+    assert 'social_support_score' in IMPUTED_FEATURES['medication_adherence']
+
+    rng = np.random.default_rng(2)
+    reference = drift_reference(rng.normal(size=(5_000, 2)), ['bmi', 'medication_count'])
+    live = np.column_stack([np.full(5_000, 24.0), rng.normal(3, 1, 5_000)])
+    report = sketch_of(reference, live).report(imputed)
+    assert report['imputed'] == ['bmi']
+    assert report['drifted'] == ['medication_count']
+
+
+def test_live_inputs_match_the_training_generator(population, monkeypatch):
+    # Live rows of the very users the models were trained on must not read as drifted
+    store = population[0]
+    monkeypatch.setattr(singapore_ml_models, 'cached_dataset', lambda name, inputs, params, seed, build_fn: build_fn())
+    for name, features, training, live in [
+        ('fall_risk', FALL_RISK_FEATURES,
+         singapore_ml_models.SingaporeFallRiskModel().prepare_singapore_fall_data(store, seed=0),
+         fall_risk_features(store)),
+        ('medication_adherence', ADHERENCE_FEATURES,
+         singapore_ml_models.MedicationAdherenceModel('Singapore').prepare_adherence_data(1200, store, seed=0),
+         adherence_features(store)),
+    ]:
+        reference = drift_reference(training[features].to_numpy(dtype=float), features)
+        report = sketch_of(reference, live).report(IMPUTED_FEATURES[name])
+        assert report['drifted'] == [], (name, {f: report['psi'][f] for f in report['drifted']})
+        assert report['max_psi'] < 0.05
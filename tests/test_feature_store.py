@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+from feature_store import USER_FEATURES, UserFeatureStore
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'singapore_enhanced_bot_data.csv'
+    pd.DataFrame({
+        'user_id': ['user_001', 'user_002', 'user_003'],
+        'age': [72, None, 81],
+        'chronic_conditions_count': [2, 1, 3],
+        'medications_per_day': [3, 2, 4],
+        'hdb_flat_type': ['4-room', 'penthouse', None],
+        'preferred_language': ['Malay', 'Tamil', 'Klingon'],
+        'medisave_balance': [12000.5, 30000, None],
+    }).to_csv(path, index=False)
+    return str(path)
+
+
+def test_build_encodes_and_fills_defaults(source):
+    store = UserFeatureStore.build(source)
+    assert store.columns == list(USER_FEATURES)
+    assert store.values.dtype == np.float32 and store.values.flags.f_contiguous
+    assert store.vector('user_001')[store.columns.index('hdb_flat_type_encoded')] == 4
+    assert store.column('hdb_flat_type_encoded').tolist() == [4, 3, 3]
+    assert store.column('preferred_language_encoded').tolist() == [3, 4, 1]
+    assert store.column('age').tolist() == [72, USER_FEATURES['age'], 81]
+    # Columns missing from the source take their default for every user
+    assert store.column('pioneer_generation').tolist() == [USER_FEATURES['pioneer_generation']] * 3
+    assert store.vector('user_404') is None and 'user_404' not in store
+
+
+def test_versioned_save_and_load(source, tmp_path):
+    built = UserFeatureStore.load_or_build(source, str(tmp_path / 'features'))
+    loaded = UserFeatureStore.load_or_build(source, str(tmp_path / 'features'))
+    assert loaded.version == built.version
+    assert np.array_equal(loaded.values, built.values)
+    assert loaded.user_ids.tolist() == built.user_ids.tolist()
+
+    pd.read_csv(source).assign(age=90).to_csv(source, index=False)
+    rebuilt = UserFeatureStore.load_or_build(source, str(tmp_path / 'features'))
+    assert rebuilt.version != built.version
+    assert rebuilt.column('age').tolist() == [90, 90, 90]
+
+
+def test_model_matrix_orders_columns_and_applies_defaults(source):
+    store = UserFeatureStore.build(source)
+    matrix = store.model_matrix(['medications_per_day', 'constant', 'derived', 'age'], ['user_003', 'user_001'],
+                                defaults={'constant': 7, 'derived': lambda f: f['age'] * 2})
+    assert matrix.tolist() == [[4, 7, 162, 81], [3, 7, 144, 72]]
+    with pytest.raises(KeyError):
+        store.rows(['user_404'])
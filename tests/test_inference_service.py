@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from inference_service import RiskInferenceService, _forest_proba
+from model_features import adherence_features
+from model_registry import LoadedModel, ModelRegistry
+
+
+class PickledRegistry:
+    """The registry's models without their tree arrays, scored by the sklearn estimators"""
+
+    def __init__(self, registry):
+        self.models = {name: LoadedModel(name, loaded.scaler, model=loaded.model, version=loaded.version)
+                       for name, loaded in registry._models.items()}
+
+    def get(self, name):
+        return self.models.get(name)
+
+
+class PreferredOnline:
+    def preferred(self):
+        return True
+
+    def adherent_proba(self, X):
+        return np.full(len(X), 0.25)
+
+
+@pytest.fixture
+def service(population):
+    store, _, model_dir = population
+    return RiskInferenceService(ModelRegistry(model_dir).load(), store)
+
+
+def test_scores_known_users_only(service):
+    risk = service.user_risk('user_003')
+    assert 0.0 <= risk['adherence_risk'] <= 1.0
+    assert 0.0 <= risk['fall_risk'] <= 100.0
+    assert service.user_risk('user_404') is None
+    assert service.fall_risk('user_404') is None
+
+
+def test_fast_tier_falls_back_to_the_ensembles_without_students(service):
+    assert service.user_risk('user_003', 'fast') == service.user_risk('user_003', 'accurate')
+    with pytest.raises(ValueError):
+        service.user_risk('user_003', 'fastest')
+
+
+def test_tree_arrays_and_pickles_give_the_same_scores(population, service):
+    store, _, _ = population
+    pickled = RiskInferenceService(PickledRegistry(service.registry), store)
+    for user_id in store.user_ids[:20]:
+        assert pickled.adherence_risk(user_id) == pytest.approx(service.adherence_risk(user_id), abs=1e-12)
+        assert pickled.fall_risk(user_id) == pytest.approx(service.fall_risk(user_id), rel=1e-12)
+
+
+def test_unvalidated_tree_walk_matches_sklearn(population, service):
+    store, _, _ = population
+    loaded = service.registry.get('medication_adherence')
+    X = loaded.transform(adherence_features(store, store.user_ids[:20].tolist()))
+    assert np.allclose(_forest_proba(loaded.model, X), loaded.model.predict_proba(X), atol=1e-12)
+
+
+def test_missing_models_disable_their_scores(population, tmp_path):
+    store, _, _ = population
+    service = RiskInferenceService(ModelRegistry(str(tmp_path)).load(), store)
+    assert service.user_risk('user_003') == {'adherence_risk': None, 'fall_risk': None}
+
+
+def test_preferred_online_model_serves_the_accurate_tier(service):
+    fast = service.adherence_risk('user_003', 'fast')
+    service.online = PreferredOnline()
+    assert service.adherence_risk('user_003') == pytest.approx(0.75)
+    assert service.adherence_risk('user_003', 'fast') == fast
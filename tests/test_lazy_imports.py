@@ -0,0 +1,25 @@
+import os
+import subprocess
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ('sklearn', 'scipy', 'matplotlib', 'seaborn', 'plotly', 'cryptography', 'streamlit')
+
+
+def _heavy_modules_after_import(module):
+    code = (f"import sys, {module}; "
+            f"print(','.join(name for name in {HEAVY!r} if name in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return [name for name in result.stdout.strip().split(',') if name]
+
+
+@pytest.mark.parametrize('module', ['inference_service', 'batch_scoring', 'streaming_anomaly', 'online_adherence',
+                                    'model_registry', 'drift_monitor', 'singapore_visualizations'])
+def test_serving_modules_import_without_heavy_dependencies(module):
+    assert _heavy_modules_after_import(module) == []
+
+
+def test_training_module_leaves_plotting_and_crypto_for_later():
+    heavy = _heavy_modules_after_import('singapore_ml_models')
+    assert not {'matplotlib', 'seaborn', 'plotly', 'cryptography'} & set(heavy)
@@ -0,0 +1,39 @@
+import json
+import ml_benchmark
+
+
+def test_small_run_times_every_stage_and_compares(tmp_path, capsys):
+    records = ml_benchmark.run_benchmark(scales=[200], models=['fall_risk', 'anomaly'], render_plots=False)
+    stages = [(record['model'], record['stage']) for record in records]
+    assert stages == [('data', 'csv_load'), ('data', 'sanitize'), ('data', 'feature_store')] + [
+        (model, stage) for model in ('fall_risk', 'anomaly')
+        for stage in ('feature_generation', 'scaling', 'fit', 'predict', 'serialization')]
+    assert all(record['rows'] == 200 and record['seconds'] >= 0 and record['peak_rss_mb'] > 0 for record in records)
+
+    path = ml_benchmark.save_results(records, str(tmp_path / 'run.json'))
+    with open(path) as f:
+        saved = json.load(f)
+    assert saved['results'] == records and saved['meta']['tracemalloc'] is False
+
+    ml_benchmark.compare(path, records)
+    output = capsys.readouterr().out
+    assert 'fall_risk' in output and 'serialization' in output
+
+
+def test_imports_and_measures_without_posix_resource(monkeypatch):
+    import builtins
+    import math
+    import sys
+    # Windows has neither /proc nor the resource module
+    monkeypatch.setitem(sys.modules, 'resource', None)
+    monkeypatch.delitem(sys.modules, 'ml_benchmark')
+    import ml_benchmark as windows_benchmark
+    real_open = builtins.open
+
+    def no_proc(path, *args, **kwargs):
+        if str(path).startswith('/proc'):
+            raise OSError("no /proc")
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, 'open', no_proc)
+    assert math.isnan(windows_benchmark._current_rss_mb())
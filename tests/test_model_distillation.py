@@ -0,0 +1,51 @@
+import shutil
+import numpy as np
+import pytest
+import model_distillation
+import singapore_ml_models
+from inference_service import RiskInferenceService
+from model_registry import ModelRegistry, read_manifest
+
+
+@pytest.fixture
+def registry_copy(population, tmp_path, monkeypatch):
+    store, _, model_dir = population
+    shutil.copytree(model_dir, tmp_path / 'models')
+    monkeypatch.setattr(singapore_ml_models, 'cached_dataset', lambda name, inputs, params, seed, build_fn: build_fn())
+    monkeypatch.setattr(model_distillation, 'TRANSFER_ROWS', 5_000)
+    monkeypatch.setattr(model_distillation, 'FIDELITY_ROWS', 1_000)
+    monkeypatch.setattr(model_distillation, 'CANDIDATE_DEPTHS', [2, 4])
+    return store, str(tmp_path / 'models')
+
+
+def test_student_is_published_next_to_its_teacher(registry_copy):
+    store, model_dir = registry_copy
+    registry = ModelRegistry(model_dir, names=['fall_risk', 'fall_risk_fast']).load()
+    version, report = model_distillation.distill('fall_risk', depth=4, store=store, registry=registry)
+
+    assert set(report) == {'teacher', 'depth 2', 'depth 4'}
+    assert report['depth 4']['n_nodes'] < report['teacher']['n_nodes']
+    assert report['depth 4']['fidelity'] > report['depth 2']['fidelity'] > 0.5
+
+    entry = read_manifest(model_dir)['models']['fall_risk_fast']
+    assert entry['active'] == version
+    assert entry['versions'][-1]['teacher'] == {'name': 'fall_risk', 'version': registry.get('fall_risk').version}
+    assert entry['versions'][-1]['params'] == {'max_depth': 4, 'min_samples_leaf': 5}
+
+    registry.refresh()
+    student = registry.get('fall_risk_fast')
+    assert student.version == version and student.trees.kind == 'tree_regressor'
+    service = RiskInferenceService(registry, store)
+    fast, accurate = service.fall_risk('user_003', 'fast'), service.fall_risk('user_003', 'accurate')
+    assert fast != accurate and abs(fast - accurate) < 25
+
+
+def test_adherence_student_regresses_the_forest_probability(registry_copy):
+    store, model_dir = registry_copy
+    registry = ModelRegistry(model_dir, names=['medication_adherence', 'medication_adherence_fast']).load()
+    _, report = model_distillation.distill('medication_adherence', depth=4, store=store, registry=registry)
+    assert 0.5 < report['depth 4']['fidelity'] <= 1.0
+    registry.refresh()
+    service = RiskInferenceService(registry, store)
+    risks = [service.adherence_risk(user_id, 'fast') for user_id in store.user_ids[:20]]
+    assert np.all((np.array(risks) >= 0) & (np.array(risks) <= 1))
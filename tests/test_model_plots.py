@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+import singapore_model_plots as plots
+
+
+def _importance():
+    return pd.DataFrame({'feature': [f"feature_{i}" for i in range(12)], 'importance': np.linspace(1, 0.1, 12)})
+
+
+def test_renderer_writes_figures_sharing_one_plotly_bundle(tmp_path):
+    renderer = plots.ModelPlotRenderer(str(tmp_path))
+    renderer.submit(plots.render_adherence_plots, 'Singapore', _importance(), np.array([[40, 5], [7, 48]]))
+    renderer.submit(plots.render_fall_plots, _importance(), np.arange(20.0), np.arange(20.0) + 1)
+    renderer.submit(plots.render_anomaly_plots, np.array([[90, 3], [4, 9]]))
+    renderer.close()
+
+    pages = sorted(path.name for path in tmp_path.glob('*.html'))
+    assert pages == ['adherence_confusion_matrix_Singapore.html', 'adherence_feature_importance_Singapore.html',
+                     'anomaly_confusion_matrix.html', 'fall_feature_importance.html', 'fall_pred_vs_actual.html']
+    assert (tmp_path / 'plotly.min.js').exists()
+    # Pages reference the bundle instead of embedding it
+    for page in tmp_path.glob('*.html'):
+        assert 'src="plotly.min.js"' in page.read_text()
+        assert page.stat().st_size < 100_000
+
+
+def test_rendering_errors_surface_on_close(tmp_path):
+    renderer = plots.ModelPlotRenderer(str(tmp_path))
+    renderer.submit(plots.render_anomaly_plots, None)
+    with pytest.raises(Exception):
+        renderer.close()
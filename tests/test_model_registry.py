@@ -0,0 +1,173 @@
+import threading
+import time
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+import model_registry
+from model_registry import ModelRegistry, publish_model, read_manifest, rollback
+
+
+def _fitted(seed):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(200, 4))
+    y = (X[:, 0] + rng.normal(0, 0.5, 200) > 0).astype(int)
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=5, max_depth=4, random_state=seed).fit(scaler.transform(X), y)
+    return model, scaler
+
+
+def _publish(model_dir, seed, **kwargs):
+    model, scaler = _fitted(seed)
+    return publish_model('fall_risk', model, scaler, f"{seed:08d}hash", {'accuracy': 0.9},
+                         model_dir=str(model_dir), **kwargs)
+
+
+def test_publish_activates_and_exports_trees(tmp_path):
+    first = _publish(tmp_path, 1)
+    second = _publish(tmp_path, 2)
+    entry = read_manifest(str(tmp_path))['models']['fall_risk']
+    assert [v['version'] for v in entry['versions']] == [first, second]
+    assert entry['active'] == second
+
+    loaded = ModelRegistry(str(tmp_path), names=['fall_risk']).load().get('fall_risk')
+    assert loaded.version == second
+    assert loaded.trees is not None
+
+
+def test_publish_without_activate_keeps_serving_version(tmp_path):
+    first = _publish(tmp_path, 1)
+    _publish(tmp_path, 2, activate=False)
+    assert read_manifest(str(tmp_path))['models']['fall_risk']['active'] == first
+
+
+def test_rollback_steps_back_one_version(tmp_path):
+    first = _publish(tmp_path, 1)
+    _publish(tmp_path, 2)
+    assert rollback('fall_risk', str(tmp_path)) == first
+    assert read_manifest(str(tmp_path))['models']['fall_risk']['active'] == first
+    with pytest.raises(ValueError):
+        rollback('fall_risk', str(tmp_path))
+    with pytest.raises(ValueError):
+        rollback('health_anomaly', str(tmp_path))
+
+
+def test_rollback_reads_manifest_under_lock(tmp_path, monkeypatch):
+    _publish(tmp_path, 1)
+    _publish(tmp_path, 2)
+    held = []
+    real_lock = model_registry._manifest_lock
+    real_read = model_registry.read_manifest
+
+    class TrackedLock:
+        def __init__(self, model_dir):
+            self.lock = real_lock(model_dir)
+
+        def __enter__(self):
+            held.append(True)
+            return self.lock.__enter__()
+
+        def __exit__(self, *exc):
+            held.pop()
+            return self.lock.__exit__(*exc)
+
+    def read_while_locked(model_dir=model_registry.MODEL_DIR):
+        assert held, "manifest read outside the lock"
+        return real_read(model_dir)
+
+    monkeypatch.setattr(model_registry, '_manifest_lock', TrackedLock)
+    monkeypatch.setattr(model_registry, 'read_manifest', read_while_locked)
+    rollback('fall_risk', str(tmp_path))
+
+
+def test_hot_reload_runs_in_background(tmp_path):
+    first = _publish(tmp_path, 1)
+    registry = ModelRegistry(str(tmp_path), names=['fall_risk'], check_interval=0).load()
+    assert registry.get('fall_risk').version == first
+
+    second = _publish(tmp_path, 2)
+    registry.get('fall_risk')
+    registry.wait_for_refresh(10)
+    assert registry.get('fall_risk').version == second
+    registry.wait_for_refresh(10)
+
+    rollback('fall_risk', str(tmp_path))
+    registry.get('fall_risk')
+    registry.wait_for_refresh(10)
+    assert registry.get('fall_risk').version == first
+
+
+def test_get_does_not_wait_for_reload(tmp_path, monkeypatch):
+    first = _publish(tmp_path, 1)
+    registry = ModelRegistry(str(tmp_path), names=['fall_risk'], check_interval=0).load()
+    release = threading.Event()
+    real_refresh = registry.refresh
+
+    def slow_refresh(force=False):
+        release.wait(10)
+        real_refresh(force)
+
+    monkeypatch.setattr(registry, 'refresh', slow_refresh)
+    second = _publish(tmp_path, 2)
+    started = time.perf_counter()
+    assert registry.get('fall_risk').version == first
+    assert registry.get('fall_risk').version == first  # a second call does not start another reload
+    assert time.perf_counter() - started < 1
+    release.set()
+    registry.wait_for_refresh(10)
+    assert registry.get('fall_risk').version == second
+
+
+def test_invalid_candidate_keeps_current_version(tmp_path):
+    first = _publish(tmp_path, 1)
+    registry = ModelRegistry(str(tmp_path), names=['fall_risk']).load()
+    _publish(tmp_path, 2)
+    manifest = read_manifest(str(tmp_path))
+    manifest['models']['fall_risk']['versions'][-1]['n_features'] = 99
+    model_registry._write_manifest(manifest, str(tmp_path))
+    registry.refresh()
+    assert registry.get('fall_risk').version == first
+
+
+def _publish_student(model_dir, teacher_version):
+    from sklearn.tree import DecisionTreeRegressor
+    rng = np.random.default_rng(3)
+    X = rng.normal(size=(100, 4))
+    scaler = StandardScaler().fit(X)
+    student = DecisionTreeRegressor(max_depth=3, random_state=0).fit(scaler.transform(X), X[:, 0])
+    return publish_model('fall_risk_fast', student, scaler, '00000003hash', {'r2': 0.9}, model_dir=str(model_dir),
+                         teacher=('fall_risk', teacher_version))
+
+
+def test_student_serves_only_with_its_teacher_version(tmp_path):
+    first = _publish(tmp_path, 1)
+    student = _publish_student(tmp_path, first)
+    names = ['fall_risk', 'fall_risk_fast']
+    registry = ModelRegistry(str(tmp_path), names=names).load()
+    assert registry.get('fall_risk_fast').version == student
+    assert model_registry.student_mismatch('fall_risk_fast', read_manifest(str(tmp_path))) is None
+
+    # Retraining the teacher retires the student until it is distilled again
+    second = _publish(tmp_path, 2)
+    assert 'run model_distillation.py' in model_registry.student_mismatch('fall_risk_fast', read_manifest(str(tmp_path)))
+    registry.refresh()
+    assert registry.get('fall_risk').version == second
+    assert registry.get('fall_risk_fast') is None
+    assert ModelRegistry(str(tmp_path), names=names).load().get('fall_risk_fast') is None
+
+    # Rolling the teacher back brings the matching student back
+    rollback('fall_risk', str(tmp_path))
+    registry.refresh()
+    assert registry.get('fall_risk_fast').version == student
+
+
+def test_load_versions_pins_exact_versions(tmp_path):
+    first = _publish(tmp_path, 1)
+    _publish(tmp_path, 2)
+    registry = ModelRegistry(str(tmp_path), names=['fall_risk'], check_interval=0).load_versions({'fall_risk': first})
+    _publish(tmp_path, 3)
+    assert registry.get('fall_risk').version == first
+    registry.wait_for_refresh(10)
+    assert registry.get('fall_risk').version == first
+    with pytest.raises(ValueError, match='not in'):
+        ModelRegistry(str(tmp_path), names=['fall_risk']).load_versions({'fall_risk': 'missing'})
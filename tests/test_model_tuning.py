@@ -0,0 +1,45 @@
+import functools
+import pytest
+import model_registry
+import model_tuning
+import singapore_ml_models
+from feature_store import UserFeatureStore
+
+
+@pytest.fixture
+def tuning(tmp_path, monkeypatch):
+    source = tmp_path / 'singapore_enhanced_bot_data.csv'
+    source.write_text('user_id,age,chronic_conditions_count,medications_per_day,has_family_nearby\n'
+                      + ''.join(f"user_{i:03d},{60 + i % 35},{i % 5},{1 + i % 7},{i % 2}\n" for i in range(80)))
+    model_dir = str(tmp_path / 'models')
+    # Datasets are built in memory and tuning results go to a scratch registry
+    monkeypatch.setattr(singapore_ml_models, 'cached_dataset',
+                        lambda name, inputs, params, seed, build_fn: build_fn())
+    monkeypatch.setattr(model_tuning, 'record_tuning', functools.partial(model_registry.record_tuning,
+                                                                         model_dir=model_dir))
+    monkeypatch.setattr(singapore_ml_models, 'tuned_params',
+                        functools.partial(model_registry.tuned_params, model_dir=model_dir))
+    return UserFeatureStore.build(str(source)), model_dir
+
+
+def test_best_configuration_is_recorded_and_used_by_training(tuning):
+    store, model_dir = tuning
+    params, score = model_tuning.tune_model('fall_risk', n_candidates=6, n_jobs=1, store=store)
+    assert set(params) <= set(model_tuning.SEARCH_SPACES['fall_risk'])
+    for param, value in params.items():
+        assert value in model_tuning.SEARCH_SPACES['fall_risk'][param]
+
+    tuned = model_registry.read_manifest(model_dir)['models']['fall_risk']['tuned']
+    assert tuned['params'] == params and tuned['score'] == pytest.approx(score)
+    assert tuned['scoring'] == 'r2' and tuned['rounds'] >= 1
+
+    model = singapore_ml_models.SingaporeFallRiskModel()
+    assert {param: model.model.get_params()[param] for param in params} == params
+    # Explicit params (e.g. from the tuner itself) bypass the recorded ones
+    assert singapore_ml_models.SingaporeFallRiskModel(params={}).model.get_params()['n_estimators'] == 100
+
+
+def test_unknown_model_is_rejected(tuning):
+    store, _ = tuning
+    with pytest.raises(ValueError):
+        model_tuning.tune_model('no_such_model', store=store)
@@ -0,0 +1,110 @@
+import asyncio
+import json
+import sys
+import types
+import numpy as np
+import pytest
+import bot_utils
+import online_adherence
+from online_adherence import OnlineAdherenceLearner, OnlineAdherenceModel
+
+
+class FakeRegistry:
+    def get(self, name):
+        return None
+
+
+class FakeService:
+    def __init__(self, user_ids):
+        self.store = set(user_ids)
+        self.registry = FakeRegistry()
+
+
+def _features(store, user_ids):
+    return np.array([[int(user_ids[0][-1]), 1.0, 2.0]], dtype=np.float32)
+
+
+@pytest.fixture(autouse=True)
+def profiles(tmp_path, monkeypatch):
+    path = tmp_path / 'user_profiles.json'
+    path.write_text(json.dumps({'7808456068': 'user_1'}))
+    monkeypatch.setattr(bot_utils, 'USER_PROFILES_FILE', str(path))
+    monkeypatch.setattr(bot_utils, 'MEDICATION_LOG_FILE', str(tmp_path / 'medication_log.jsonl'))
+    monkeypatch.setattr(online_adherence, 'adherence_features', _features)
+
+
+@pytest.fixture
+def remind_module(monkeypatch):
+    # The handlers only need the telegram names for their annotations and keyboards
+    telegram = types.ModuleType('telegram')
+    telegram.Update = telegram.InlineKeyboardButton = telegram.InlineKeyboardMarkup = object
+    telegram_ext = types.ModuleType('telegram.ext')
+    telegram_ext.ContextTypes = types.SimpleNamespace(DEFAULT_TYPE=object)
+    monkeypatch.setitem(sys.modules, 'telegram', telegram)
+    monkeypatch.setitem(sys.modules, 'telegram.ext', telegram_ext)
+    monkeypatch.delitem(sys.modules, 'remind', raising=False)
+    import remind
+    monkeypatch.setattr(remind, 'load_user_medications', lambda: {'7808456068': {'med_1': {'name': 'Metformin'}}})
+    monkeypatch.setattr(remind, 'log_event', lambda *args, **kwargs: None)
+    return remind
+
+
+class FakeQuery:
+    def __init__(self, telegram_id, data):
+        self.from_user = types.SimpleNamespace(id=telegram_id)
+        self.data = data
+        self.replies = []
+
+    async def answer(self):
+        pass
+
+    async def edit_message_text(self, text):
+        self.replies.append(text)
+
+
+def test_pending_answers_survive_restart(tmp_path):
+    path = str(tmp_path / 'online.pkl')
+    service = FakeService(['user_1', 'user_2'])
+    learner = OnlineAdherenceLearner(service, OnlineAdherenceModel(batch_size=8), path)
+    for i in range(5):
+        learner.record_outcome(f"user_{i % 2 + 1}", i % 2)
+    learner.record_outcome('unknown', 1)
+    assert learner.model.pending == 5
+
+    restarted = OnlineAdherenceLearner(service, path=path)
+    assert restarted.model.pending == 5
+    assert not restarted.model.fitted
+    for i in range(3):
+        restarted.record_outcome('user_1', 1)
+    assert restarted.model.pending == 0
+    assert restarted.model.n_seen == 8
+    assert OnlineAdherenceModel.load_or_create(path).n_seen == 8
+
+
+def test_observe_learns_in_batches():
+    model = OnlineAdherenceModel(batch_size=4)
+    X = np.array([[0.0, 1.0], [1.0, 0.0]])
+    assert not model.observe(X, [0, 1])
+    assert model.observe(X, [0, 1])
+    assert model.n_seen == 4 and model.pending == 0
+    assert model.adherent_proba(X).shape == (2,)
+
+
+def test_answers_from_linked_telegram_users_are_learned(tmp_path, remind_module):
+    learner = OnlineAdherenceLearner(FakeService(['user_1']), OnlineAdherenceModel(batch_size=2), str(tmp_path / 'online.pkl'))
+    context = types.SimpleNamespace(bot_data={'online_adherence': learner})
+    for data in ('med_taken_med_1', 'med_missed_med_1'):
+        query = FakeQuery(7808456068, data)
+        asyncio.run(remind_module.med_outcome_callback(types.SimpleNamespace(callback_query=query), context))
+    assert learner.model.n_seen == 2
+    assert 'marked as missed' in query.replies[-1]
+
+
+def test_rebuild_replays_the_log_through_profile_links(tmp_path):
+    bot_utils.log_medication_outcome('7808456068', 'med_1', 'Metformin', True)
+    bot_utils.log_medication_outcome('7808456068', 'med_1', 'Metformin', False)
+    bot_utils.log_medication_outcome('999', 'med_1', 'Metformin', True)  # no linked profile
+    path = str(tmp_path / 'online.pkl')
+    model = online_adherence.rebuild_from_log(FakeService(['user_1']), path)
+    assert model.n_seen == 2
+    assert OnlineAdherenceModel.load_or_create(path).n_seen == 2
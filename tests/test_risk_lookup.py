@@ -0,0 +1,81 @@
+import asyncio
+import json
+import sys
+import types
+import numpy as np
+import pytest
+import bot_utils
+from bot_utils import resolve_profile_id
+from feature_store import UserFeatureStore
+
+
+@pytest.fixture
+def profiles(tmp_path, monkeypatch):
+    path = tmp_path / 'user_profiles.json'
+    path.write_text(json.dumps({'7808456068': 'user_001'}))
+    monkeypatch.setattr(bot_utils, 'USER_PROFILES_FILE', str(path))
+    return path
+
+
+@pytest.fixture
+def risk_handler(monkeypatch):
+    # The handler only needs the telegram names for its annotations
+    telegram = types.ModuleType('telegram')
+    telegram.Update = object
+    telegram_ext = types.ModuleType('telegram.ext')
+    telegram_ext.ContextTypes = types.SimpleNamespace(DEFAULT_TYPE=object)
+    monkeypatch.setitem(sys.modules, 'telegram', telegram)
+    monkeypatch.setitem(sys.modules, 'telegram.ext', telegram_ext)
+    monkeypatch.delitem(sys.modules, 'risk', raising=False)
+    import risk
+    return risk.risk
+
+
+def test_linked_telegram_ids_resolve_to_profiles(profiles):
+    assert resolve_profile_id(7808456068) == 'user_001'
+    assert resolve_profile_id('7808456068') == 'user_001'
+    assert resolve_profile_id(12345) == '12345'
+
+
+def test_missing_profiles_file_keeps_telegram_ids(tmp_path, monkeypatch):
+    monkeypatch.setattr(bot_utils, 'USER_PROFILES_FILE', str(tmp_path / 'missing.json'))
+    assert resolve_profile_id(7808456068) == '7808456068'
+
+
+class StoreBackedService:
+    """Answers like RiskInferenceService: scores for users in the feature store, None otherwise"""
+
+    def __init__(self, store):
+        self.store = store
+        self.asked = []
+
+    def user_risk(self, user_id, tier='accurate'):
+        self.asked.append(user_id)
+        if user_id not in self.store:
+            return None
+        return {'fall_risk': 42.0, 'adherence_risk': 0.25}
+
+
+def ask_risk(handler, telegram_id, service):
+    replies = []
+
+    async def reply_text(text):
+        replies.append(text)
+
+    update = types.SimpleNamespace(effective_user=types.SimpleNamespace(id=telegram_id),
+                                   message=types.SimpleNamespace(reply_text=reply_text))
+    context = types.SimpleNamespace(bot_data={'inference': service})
+    asyncio.run(handler(update, context))
+    return replies[0]
+
+
+def test_risk_scores_linked_telegram_user_from_the_feature_store(profiles, risk_handler):
+    store = UserFeatureStore(['user_001', 'user_002'], ['age'], np.array([[72.0], [80.0]]), 'test')
+    service = StoreBackedService(store)
+    reply = ask_risk(risk_handler, 7808456068, service)
+    assert service.asked == ['user_001']
+    assert 'Fall risk score: 42/100' in reply
+
+    reply = ask_risk(risk_handler, 555, service)
+    assert service.asked[-1] == '555'
+    assert 'No health profile' in reply
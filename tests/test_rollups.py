@@ -0,0 +1,125 @@
+import glob
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import pytest
+from data_lake import convert_csv_to_lake
+from rollups import Rollups, load_rollups, refresh_rollups, rollup_lock
+from singapore_data_setup import create_simulated_singapore_data
+
+
+@pytest.fixture(scope='module')
+def occupancy():
+    frame = create_simulated_singapore_data('hospital_bed_occupancy', years=1)
+    frame['date'] = pd.to_datetime(frame['date'])
+    return frame
+
+
+def _dirs(tmp_path, name):
+    raw, lake, rollup = tmp_path / name / 'raw', tmp_path / name / 'lake', tmp_path / name / 'rollups'
+    raw.mkdir(parents=True)
+    return str(raw), str(lake), str(rollup)
+
+
+def _write(frame, raw, lake=None):
+    frame.to_csv(f"{raw}/hospital_bed_occupancy.csv", index=False)
+    if lake is not None:
+        convert_csv_to_lake('hospital_bed_occupancy', f"{raw}/hospital_bed_occupancy.csv", lake)
+
+
+def _assert_tables_equal(left, right):
+    for grain in left.grains:
+        a, b = left.table(grain), right.table(grain)
+        assert a.columns.tolist() == b.columns.tolist()
+        for column in a.columns:
+            if pd.api.types.is_numeric_dtype(a[column]):
+                np.testing.assert_allclose(a[column].to_numpy(dtype=float), b[column].to_numpy(dtype=float),
+                                           rtol=1e-9, err_msg=f"{grain}.{column}")
+            else:
+                assert a[column].astype(str).tolist() == b[column].astype(str).tolist(), f"{grain}.{column}"
+
+
+@pytest.mark.parametrize('use_lake', [False, True])
+def test_incremental_refresh_equals_rebuild(tmp_path, occupancy, use_lake):
+    raw, lake, rollup = _dirs(tmp_path, 'incremental')
+    lake = lake if use_lake else str(tmp_path / 'no-lake')
+    cutoff = pd.Timestamp('2023-06-15')
+    _write(occupancy[occupancy['date'] <= cutoff], raw, lake if use_lake else None)
+    first = refresh_rollups('hospital_bed_occupancy', raw_dir=raw, lake_dir=lake, rollup_dir=rollup)
+    assert first.watermark == cutoff
+
+    _write(occupancy, raw, lake if use_lake else None)
+    incremental = refresh_rollups('hospital_bed_occupancy', raw_dir=raw, lake_dir=lake, rollup_dir=rollup)
+    assert incremental.watermark == occupancy['date'].max()
+    assert incremental.aggregates['daily'].rows == len(occupancy)
+
+    raw2, _, rollup2 = _dirs(tmp_path, 'rebuild')
+    _write(occupancy, raw2)
+    rebuilt = refresh_rollups('hospital_bed_occupancy', rebuild=True, raw_dir=raw2, lake_dir=str(tmp_path / 'none'),
+                              rollup_dir=rollup2)
+    _assert_tables_equal(load_rollups('hospital_bed_occupancy', rollup), rebuilt)
+
+
+def test_refresh_skips_days_up_to_the_watermark(tmp_path, occupancy):
+    raw, lake, rollup = _dirs(tmp_path, 'watermark')
+    _write(occupancy, raw)
+    refresh_rollups('hospital_bed_occupancy', raw_dir=raw, lake_dir=lake, rollup_dir=rollup)
+    again = Rollups('hospital_bed_occupancy', rollup)
+    assert again.update(occupancy) == 0
+    assert again.aggregates['daily'].rows == len(occupancy)
+
+
+def test_tables_match_pandas(tmp_path, occupancy):
+    raw, lake, rollup = _dirs(tmp_path, 'tables')
+    _write(occupancy, raw)
+    rollups = refresh_rollups('hospital_bed_occupancy', raw_dir=raw, lake_dir=lake, rollup_dir=rollup)
+
+    monthly = rollups.table('monthly', by=['month'], start='2023-03-10', end='2023-05-31', hospital=['SGH', 'NUH'])
+    rows = occupancy[occupancy['hospital'].isin(['SGH', 'NUH']) & (occupancy['date'] >= '2023-03-01')
+                     & (occupancy['date'] <= '2023-05-31')]
+    expected = rows.groupby(rows['date'].dt.to_period('M'))
+    assert monthly['occupied_beds'].tolist() == expected['occupied_beds'].sum().tolist()
+    np.testing.assert_allclose(monthly['occupancy_rate'], expected['occupancy_rate'].mean(), rtol=1e-6)
+
+    daily = rollups.table('daily', start='2023-02-01', end='2023-02-07')
+    assert daily['date'].min() == pd.Timestamp('2023-02-01') and daily['date'].max() == pd.Timestamp('2023-02-07')
+
+
+def test_undated_rollups_rebuild_when_the_csv_changes(tmp_path):
+    raw, lake, rollup = _dirs(tmp_path, 'chronic')
+    prevalence = create_simulated_singapore_data('chronic_disease_prevalence')
+    prevalence.to_csv(f"{raw}/chronic_disease_prevalence.csv", index=False)
+    first = refresh_rollups('chronic_disease_prevalence', raw_dir=raw, lake_dir=lake, rollup_dir=rollup)
+    total = first.table('by_district')['estimated_cases'].sum()
+    assert total == prevalence['estimated_cases'].sum()
+
+    prevalence.assign(estimated_cases=prevalence['estimated_cases'] * 2).to_csv(
+        f"{raw}/chronic_disease_prevalence.csv", index=False)
+    second = refresh_rollups('chronic_disease_prevalence', raw_dir=raw, lake_dir=lake, rollup_dir=rollup)
+    assert second.table('by_district')['estimated_cases'].sum() == 2 * total
+
+
+def test_concurrent_refreshes_from_dashboard_threads(tmp_path, occupancy):
+    raw, lake, rollup = _dirs(tmp_path, 'threads')
+    _write(occupancy, raw)
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(lambda _: refresh_rollups('hospital_bed_occupancy', raw_dir=raw, lake_dir=lake,
+                                                          rollup_dir=rollup), range(4)))
+    assert all(result.aggregates['daily'].rows == len(occupancy) for result in results)
+    assert load_rollups('hospital_bed_occupancy', rollup).aggregates['daily'].rows == len(occupancy)
+    assert glob.glob(f"{rollup}/**/*.tmp", recursive=True) == []
+
+
+def test_loading_waits_for_a_refresh_in_progress(tmp_path, occupancy):
+    raw, lake, rollup = _dirs(tmp_path, 'snapshot')
+    _write(occupancy, raw)
+    refresh_rollups('hospital_bed_occupancy', raw_dir=raw, lake_dir=lake, rollup_dir=rollup)
+    loaded = threading.Event()
+    with rollup_lock(f"{rollup}/hospital_bed_occupancy"):
+        with rollup_lock(f"{rollup}/hospital_bed_occupancy"):  # re-entrant within a thread
+            reader = threading.Thread(target=lambda: load_rollups('hospital_bed_occupancy', rollup) and loaded.set())
+            reader.start()
+            assert not loaded.wait(0.3)
+    reader.join(10)
+    assert loaded.is_set()
@@ -0,0 +1,84 @@
+import os
+import pandas as pd
+import pytest
+import singapore_data_setup
+from singapore_data_setup import integrate_singapore_bot_data, write_simulated_singapore_data
+
+
+def test_write_streams_all_chunks(tmp_path):
+    path = tmp_path / 'polyclinic_attendance.csv'
+    rows = write_simulated_singapore_data('polyclinic_attendance', str(path), years=1, facilities=3, chunk_rows=200)
+    frame = pd.read_csv(path)
+    assert len(frame) == rows
+    expected = singapore_data_setup.create_simulated_singapore_data('polyclinic_attendance', years=1, facilities=3)
+    assert len(frame) == len(expected) and frame.columns.tolist() == expected.columns.tolist()
+    assert os.listdir(tmp_path) == ['polyclinic_attendance.csv']
+
+
+def test_failed_write_removes_temporary_csv(tmp_path, monkeypatch):
+    path = tmp_path / 'polyclinic_attendance.csv'
+    path.write_text('previous\n')
+    real_chunks = singapore_data_setup.simulate_singapore_data_chunks
+
+    def failing_chunks(*args):
+        chunks = real_chunks(*args)
+        yield next(chunks)
+        raise OSError("disk full")
+
+    monkeypatch.setattr(singapore_data_setup, 'simulate_singapore_data_chunks', failing_chunks)
+    with pytest.raises(OSError):
+        write_simulated_singapore_data('polyclinic_attendance', str(path), years=1, facilities=3, chunk_rows=200)
+    assert os.listdir(tmp_path) == ['polyclinic_attendance.csv']
+    assert path.read_text() == 'previous\n'
+
+
+@pytest.fixture
+def bot_files(tmp_path, monkeypatch):
+    bot_path, enhanced_path = tmp_path / 'bot_activity_data.csv', tmp_path / 'processed' / 'singapore_enhanced_bot_data.csv'
+    demographics = tmp_path / 'singapore_demographics.csv'
+    pd.DataFrame({'town': ['Bedok', 'Yishun']}).to_csv(demographics, index=False)
+    monkeypatch.setattr(singapore_data_setup, 'BOT_ACTIVITY_DATA', str(bot_path))
+    monkeypatch.setattr(singapore_data_setup, 'ENHANCED_BOT_DATA', str(enhanced_path))
+    return bot_path, enhanced_path, str(demographics)
+
+
+def _bot_data(n):
+    return pd.DataFrame({'user_id': [f"user_{i:03d}" for i in range(n)], 'age': range(70, 70 + n)})
+
+
+def test_integration_appends_only_new_users(bot_files):
+    bot_path, enhanced_path, demographics = bot_files
+    _bot_data(3).to_csv(bot_path, index=False)
+    assert len(integrate_singapore_bot_data(demographics_path=demographics)) == 3
+    _bot_data(5).to_csv(bot_path, index=False)
+    assert len(integrate_singapore_bot_data(demographics_path=demographics)) == 2
+    assert integrate_singapore_bot_data(demographics_path=demographics).empty
+    assert pd.read_csv(enhanced_path)['user_id'].tolist() == _bot_data(5)['user_id'].tolist()
+
+
+def test_integration_appends_to_file_with_extra_columns(bot_files):
+    bot_path, enhanced_path, demographics = bot_files
+    _bot_data(2).to_csv(bot_path, index=False)
+    integrate_singapore_bot_data(demographics_path=demographics)
+    existing = pd.read_csv(enhanced_path).assign(care_plan='basic')
+    existing.to_csv(enhanced_path, index=False)
+
+    _bot_data(4).to_csv(bot_path, index=False)
+    assert len(integrate_singapore_bot_data(demographics_path=demographics)) == 2
+    enhanced = pd.read_csv(enhanced_path)
+    assert enhanced.columns.tolist() == existing.columns.tolist()
+    assert enhanced['care_plan'].isna().tolist() == [False, False, True, True]
+    assert enhanced['singapore_town'].notna().all()
+
+
+@pytest.mark.parametrize('load_test', [False, True])
+def test_only_default_output_enriches_bot_data(tmp_path, monkeypatch, load_test):
+    integrated = []
+    for step in ['setup_singapore_data_environment', 'download_singapore_health_data',
+                 'create_singapore_demographics_data']:
+        monkeypatch.setattr(singapore_data_setup, step, lambda *args, **kwargs: None)
+    monkeypatch.setattr(singapore_data_setup, 'integrate_singapore_bot_data',
+                        lambda **kwargs: integrated.append(kwargs['demographics_path']))
+    output_dir = str(tmp_path / 'load_test') if load_test else singapore_data_setup.RAW_DIR
+    singapore_data_setup.main(output_dir=output_dir)
+    assert integrated == ([] if load_test else [os.path.join(output_dir, 'singapore_demographics.csv')])
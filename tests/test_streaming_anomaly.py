@@ -0,0 +1,113 @@
+import types
+import numpy as np
+import pandas as pd
+from model_features import DAILY_FEATURES
+from streaming_anomaly import PersonalBaselines, StreamingAnomalyScorer
+
+
+class NoModels:
+    def get(self, name):
+        return None
+
+
+def scorer(**kwargs):
+    store = types.SimpleNamespace(columns=['age'], vector=lambda user_id: None)
+    return StreamingAnomalyScorer(registry=NoModels(), store=store, baselines=PersonalBaselines(), **kwargs)
+
+
+def test_welford_matches_numpy_and_skips_missing_values():
+    rng = np.random.default_rng(0)
+    X = rng.normal(50, 10, size=(40, len(DAILY_FEATURES)))
+    X[rng.random(X.shape) < 0.2] = np.nan
+    baselines = PersonalBaselines()
+    for user in range(20):  # more users than the initial capacity
+        row = baselines.row(f'u{user}')
+        for x in X:
+            baselines.update(row, x)
+    row = baselines.row('u19')
+    assert np.array_equal(baselines.count[row], (~np.isnan(X)).sum(axis=0))
+    assert np.allclose(baselines.mean[row], np.nanmean(X, axis=0))
+    assert np.allclose(baselines.std(row), np.nanstd(X, axis=0, ddof=1))
+
+
+def test_baselines_save_and_load(tmp_path):
+    baselines = PersonalBaselines()
+    baselines.update(baselines.row('a'), np.arange(len(DAILY_FEATURES), dtype=float))
+    path = baselines.save(str(tmp_path / 'baselines.npz'))
+    loaded = PersonalBaselines.load(path)
+    assert loaded.user_ids == ['a']
+    assert np.array_equal(loaded.mean[0], baselines.mean[0])
+
+
+def test_deviations_flagged_and_kept_out_of_the_baseline():
+    s = scorer(min_history=7)
+    for day in range(30):
+        swing = 1 if day % 2 else -1
+        result = s.score('u1', {'heart_rate_avg': 70 + 2 * swing, 'steps_daily': 4000 + 200 * swing})
+        assert not result['is_anomaly']
+    row = s.baselines.row('u1')
+    j = DAILY_FEATURES.index('heart_rate_avg')
+    mean_before, count_before = s.baselines.mean[row, j], s.baselines.count[row, j]
+
+    for day in range(5):
+        result = s.score('u1', {'heart_rate_avg': 130, 'steps_daily': 4000})
+        assert result['global_score'] is None
+        assert list(result['deviations']) == ['heart_rate_avg']
+    # The anomalous heart rates did not shift the baseline; the normal steps were learned
+    assert s.baselines.count[row, j] == count_before
+    assert s.baselines.mean[row, j] == mean_before
+    assert s.baselines.count[row, DAILY_FEATURES.index('steps_daily')] == 35
+
+
+def test_cli_prints_flags_without_a_global_model(tmp_path, monkeypatch, capsys):
+    import runpy
+    import sys
+    import model_registry
+    import feature_store
+    monkeypatch.setattr(model_registry.ModelRegistry, 'load', lambda self: NoModels())
+    monkeypatch.setattr(feature_store.UserFeatureStore, 'load_or_build',
+                        classmethod(lambda cls, *a, **k: types.SimpleNamespace(columns=['age'], vector=lambda u: None)))
+    records = pd.DataFrame({'user_id': ['u1'] * 12, 'heart_rate_avg': [70, 71, 69, 70, 72, 70, 71, 69, 70, 71, 70, 150]})
+    records.to_csv(tmp_path / 'records.csv', index=False)
+    baselines = tmp_path / 'baselines.npz'
+    monkeypatch.setattr(sys, 'argv', ['streaming_anomaly.py', str(tmp_path / 'records.csv'), '--baselines', str(baselines)])
+    runpy.run_module('streaming_anomaly', run_name='__main__')
+    out = capsys.readouterr().out
+    assert 'global=n/a' in out
+    assert baselines.exists()
+
+
+def test_lasting_step_change_becomes_the_new_baseline():
+    s = scorer(min_history=7, adapt_after=7)
+    rng = np.random.default_rng(0)
+    for day in range(60):
+        s.score('u1', {'steps_daily': 4000 + rng.normal(0, 200)})
+    # Steps drop for good (e.g. after a fall): flagged at first, then absorbed as the new normal
+    flagged = [bool(s.score('u1', {'steps_daily': 1500 + rng.normal(0, 100)})['deviations']) for day in range(30)]
+    assert all(flagged[:7])
+    assert not any(flagged[7:])
+    row, j = s.baselines.row('u1'), DAILY_FEATURES.index('steps_daily')
+    assert abs(s.baselines.mean[row, j] - 1500) < 100
+    # A return to the old level is a new change again
+    assert s.score('u1', {'steps_daily': 4000})['deviations']
+
+
+def test_normal_value_ends_a_run_of_deviations():
+    s = scorer(min_history=7, adapt_after=3)
+    for day in range(30):
+        s.score('u1', {'heart_rate_avg': 70 + (1 if day % 2 else -1)})
+    for value in [130, 130, 70, 130, 130, 70]:
+        s.score('u1', {'heart_rate_avg': value})
+    row, j = s.baselines.row('u1'), DAILY_FEATURES.index('heart_rate_avg')
+    assert abs(s.baselines.mean[row, j] - 70) < 1
+    assert s.baselines.held_count[row, j] == 0
+
+
+def test_baselines_saved_without_held_runs_still_load(tmp_path):
+    path = str(tmp_path / 'baselines.npz')
+    n = len(DAILY_FEATURES)
+    np.savez(path, user_ids=np.asarray(['a']), features=np.asarray(DAILY_FEATURES),
+             count=np.ones((1, n), dtype=np.int32), mean=np.full((1, n), 5.0), m2=np.zeros((1, n)))
+    loaded = PersonalBaselines.load(path)
+    assert loaded.mean[0, 0] == 5.0
+    assert loaded.held_count[0].sum() == 0
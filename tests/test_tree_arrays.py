@@ -0,0 +1,115 @@
+import multiprocessing
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+from tree_arrays import TreeArrays, supports
+
+
+def _forest(seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(50, 10, size=(400, 6))
+    y = (X[:, 0] + rng.normal(0, 5, 400) > 50).astype(int)
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=20, max_depth=6, random_state=seed).fit(scaler.transform(X), y)
+    return model, scaler, X
+
+
+def _predict_loaded(directory, X):
+    return TreeArrays.load(directory).predict(X)
+
+
+def test_saved_arrays_are_memory_mapped_read_only(tmp_path):
+    model, scaler, X = _forest()
+    TreeArrays.from_model(model, scaler).save(str(tmp_path))
+    loaded = TreeArrays.load(str(tmp_path))
+    for name in ('feature', 'threshold', 'left', 'right', 'value', 'roots', 'mean', 'scale'):
+        array = getattr(loaded, name)
+        assert isinstance(array.base, np.memmap), name
+        assert not array.flags.writeable, name
+    assert np.array_equal(loaded.predict(X), model.predict_proba(scaler.transform(X).astype(np.float32)))
+
+
+def test_worker_processes_score_from_the_shared_files(tmp_path):
+    model, scaler, X = _forest()
+    TreeArrays.from_model(model, scaler).save(str(tmp_path))
+    with multiprocessing.get_context('spawn').Pool(2) as pool:
+        results = pool.starmap(_predict_loaded, [(str(tmp_path), X[:50]), (str(tmp_path), X[50:100])])
+    assert np.array_equal(np.vstack(results), TreeArrays.load(str(tmp_path)).predict(X[:100]))
+
+
+def test_only_tree_ensembles_are_exported():
+    from sklearn.ensemble import IsolationForest
+    assert supports(_forest()[0])
+    isolation = IsolationForest(n_estimators=5, random_state=0).fit(np.zeros((10, 2)))
+    assert not supports(isolation)
+    with pytest.raises(TypeError):
+        TreeArrays.from_model(isolation)
+
+
+def _regressors():
+    from sklearn.ensemble import GradientBoostingRegressor
+    from sklearn.tree import DecisionTreeRegressor
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(400, 5))
+    y = X[:, 0] * 3 + X[:, 1] ** 2 + rng.normal(0, 0.1, 400)
+    scaler = StandardScaler().fit(X)
+    X_scaled = scaler.transform(X)
+    return [GradientBoostingRegressor(n_estimators=30, max_depth=3, random_state=0).fit(X_scaled, y),
+            DecisionTreeRegressor(max_depth=8, random_state=0).fit(X_scaled, y)], scaler, X
+
+
+def test_forest_matches_sklearn_bit_for_bit():
+    model, scaler, X = _forest()
+    trees = TreeArrays.from_model(model, scaler)
+    expected = model.predict_proba(scaler.transform(X).astype(np.float32))
+    assert np.array_equal(trees.predict(X), expected)
+    # The single-row path walks all trees at once and must add them up in the same order
+    for i in range(25):
+        assert np.array_equal(trees.predict(X[i:i + 1]), expected[i:i + 1])
+
+
+def test_regressors_match_sklearn_bit_for_bit():
+    models, scaler, X = _regressors()
+    for model in models:
+        trees = TreeArrays.from_model(model, scaler)
+        expected = model.predict(scaler.transform(X).astype(np.float32))
+        assert np.array_equal(trees.predict(X), expected), type(model).__name__
+        for i in range(25):
+            assert np.array_equal(trees.predict(X[i:i + 1]), expected[i:i + 1]), type(model).__name__
+
+
+def test_verify_rejects_arrays_of_another_model():
+    model, scaler, X = _forest(0)
+    other, _, _ = _forest(1)
+    trees = TreeArrays.from_model(model, scaler)
+    trees.verify(model, scaler.transform(X))
+    with pytest.raises(ValueError):
+        trees.verify(other, scaler.transform(X))
+
+
+def test_inference_service_uses_the_flattened_forest(tmp_path):
+    from inference_service import adherent_proba
+    from model_registry import LoadedModel
+    model, scaler, X = _forest()
+    TreeArrays.from_model(model, scaler).save(str(tmp_path))
+    pickled = LoadedModel('medication_adherence', scaler, model=model)
+    flattened = LoadedModel('medication_adherence', scaler, trees=TreeArrays.load(str(tmp_path)))
+    assert np.array_equal(adherent_proba(flattened, X), adherent_proba(pickled, X))
+    assert flattened._model is None  # the pickle is never loaded
+
+
+def test_verify_sums_forest_probabilities_in_tree_order(monkeypatch):
+    model, scaler, X = _forest()
+    model.set_params(n_jobs=-1)
+    jobs = []
+    real_predict_proba = RandomForestClassifier.predict_proba
+
+    def recording_predict_proba(self, X):
+        jobs.append(self.n_jobs)
+        return real_predict_proba(self, X)
+
+    monkeypatch.setattr(RandomForestClassifier, 'predict_proba', recording_predict_proba)
+    TreeArrays.from_model(model, scaler).verify(model, scaler.transform(X))
+    assert jobs == [1]
+    assert model.n_jobs == -1
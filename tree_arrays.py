@@ -0,0 +1,205 @@
+"""
+tree_arrays.py
+
+Array-backed storage for the tree ensembles of the Singapore Senior Care ML models.
+sklearn copies every tree's node arrays into private memory when a model is unpickled,
+so each bot worker and batch job would hold its own copy of the forests. Here the nodes of
+all trees are concatenated into a few flat .npy files that are opened with mmap_mode='r':
+every process maps the same read-only pages from the page cache.
+
+The arrays double as a compact predictor: the StandardScaler is fused in, so raw feature rows
+go in and sklearn's exact outputs come out, without sklearn's per-call validation overhead.
+Supported: RandomForestClassifier (class probabilities), GradientBoostingRegressor and
+DecisionTreeRegressor (the distilled students).
+"""
+
+import copy
+import json
+import os
+import numpy as np
+
+TREE_ARRAYS = ('feature', 'threshold', 'left', 'right', 'value', 'roots')
+SCALER_ARRAYS = ('mean', 'scale')
+META_FILE = 'meta.json'
+
+
+def supports(model):
+    # sklearn is only needed when exporting; serving reads the arrays with numpy alone
+    from sklearn.ensemble import RandomForestClassifier, GradientBoostingRegressor
+    from sklearn.tree import DecisionTreeRegressor
+    return isinstance(model, (RandomForestClassifier, GradientBoostingRegressor, DecisionTreeRegressor))
+
+
+class TreeArrays:
+    """
+    All trees of an ensemble as flat node arrays.
+    Node i of the ensemble tests X[:, feature[i]] <= threshold[i] and moves to left[i] or right[i];
+    leaves point at themselves, so a row can keep stepping once it has reached its leaf.
+    roots[t] is the first node of tree t and value[i] its leaf output.
+    mean and scale are the fused StandardScaler parameters (None if exported without one).
+    """
+
+    def __init__(self, arrays, meta):
+        for name in TREE_ARRAYS + SCALER_ARRAYS:
+            setattr(self, name, arrays.get(name))
+        self.meta = meta
+        self.kind = meta['kind']
+        self.n_features = meta['n_features']
+        self.max_depth = meta['max_depth']
+        self.classes = np.asarray(meta.get('classes', []))
+        # Leaves are the nodes that point at themselves
+        self.is_leaf = self.left == np.arange(len(self.left))
+
+    @classmethod
+    def from_model(cls, model, scaler=None):
+        from sklearn.ensemble import RandomForestClassifier, GradientBoostingRegressor
+        from sklearn.tree import DecisionTreeRegressor
+        if isinstance(model, RandomForestClassifier):
+            trees = [estimator.tree_ for estimator in model.estimators_]
+            meta = {'kind': 'forest_classifier', 'classes': np.asarray(model.classes_).tolist()}
+        elif isinstance(model, GradientBoostingRegressor):
+            trees = [estimator.tree_ for estimator in model.estimators_[:, 0]]
+            n_features = model.n_features_in_
+            init = 0.0 if model.init_ == 'zero' else float(model.init_.predict(np.zeros((1, n_features)))[0])
+            meta = {'kind': 'gradient_boosting', 'init': init, 'learning_rate': float(model.learning_rate)}
+        elif isinstance(model, DecisionTreeRegressor) and model.n_outputs_ == 1:
+            # A single regression tree is a one-stage boosting model: 0 + 1.0 * leaf is exactly the leaf
+            trees = [model.tree_]
+            meta = {'kind': 'tree_regressor', 'init': 0.0, 'learning_rate': 1.0}
+        else:
+            raise TypeError(f"Cannot export {type(model).__name__} as tree arrays")
+
+        sizes = np.array([tree.node_count for tree in trees])
+        roots = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        feature, threshold, left, right, value = [], [], [], [], []
+        for root, tree in zip(roots, trees):
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            left.append(root + np.where(is_leaf, nodes, tree.children_left))
+            right.append(root + np.where(is_leaf, nodes, tree.children_right))
+            if meta['kind'] == 'forest_classifier':
+                value.append(tree.value[:, 0, :len(meta['classes'])])
+            else:
+                value.append(tree.value[:, 0, 0])
+
+        arrays = {
+            'feature': np.concatenate(feature).astype(np.int32),
+            'threshold': np.concatenate(threshold).astype(np.float64),
+            'left': np.concatenate(left).astype(np.int32),
+            'right': np.concatenate(right).astype(np.int32),
+            'value': np.ascontiguousarray(np.concatenate(value), dtype=np.float64),
+            'roots': roots.astype(np.int32),
+        }
+        if scaler is not None:
+            arrays['mean'] = np.asarray(scaler.mean_, dtype=np.float64)
+            arrays['scale'] = np.asarray(scaler.scale_, dtype=np.float64)
+        meta.update({'n_features': int(model.n_features_in_), 'n_trees': len(trees),
+                     'max_depth': int(max(tree.max_depth for tree in trees))})
+        return cls(arrays, meta)
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name in TREE_ARRAYS + SCALER_ARRAYS:
+            if getattr(self, name) is not None:
+                np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, META_FILE), 'w') as f:
+            json.dump(self.meta, f, indent=2)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """Open saved arrays; with mmap_mode='r' processes share them instead of copying"""
+        with open(os.path.join(directory, META_FILE), 'r') as f:
+            meta = json.load(f)
+        arrays = {}
+        for name in TREE_ARRAYS + SCALER_ARRAYS:
+            path = os.path.join(directory, f"{name}.npy")
+            if os.path.exists(path):
+                # Plain ndarray views of the mapping: same shared pages, without np.memmap's per-op overhead
+                arrays[name] = np.load(path, mmap_mode=mmap_mode).view(np.ndarray)
+        return cls(arrays, meta)
+
+    def verify(self, model, X):
+        """Raise ValueError unless predict_scaled matches sklearn exactly on the scaled rows X"""
+        X = np.asarray(X, dtype=np.float32)
+        if getattr(model, 'n_jobs', None) not in (None, 1):
+            # Threads add the per-tree probabilities in whatever order they finish, which changes the
+            # last bits; one thread sums in tree order like predict_scaled (a shallow copy shares the trees)
+            model = copy.copy(model)
+            model.set_params(n_jobs=1)
+        expected = model.predict_proba(X) if self.kind == 'forest_classifier' else model.predict(X)
+        if not np.array_equal(self.predict_scaled(X), expected):
+            raise ValueError(f"Tree arrays do not reproduce {type(model).__name__} predictions")
+
+    def transform(self, X):
+        """
+        The fused StandardScaler in float64, as applied to the (float64) training frames,
+        then cast to the float32 rows sklearn's trees compare
+        """
+        return ((np.asarray(X, dtype=np.float64) - self.mean) / self.scale).astype(np.float32)
+
+    def _row_leaves(self, x):
+        """Leaf reached in every tree by one scaled row: all trees step together, max_depth times"""
+        if len(self.roots) == 1:
+            # A single tree: walking it with scalars beats max_depth vectorized steps over one node
+            node = 0
+            while not self.is_leaf[node]:
+                node = self.left[node] if x[self.feature[node]] <= self.threshold[node] else self.right[node]
+            return np.array([node])
+        node = self.roots
+        for _ in range(self.max_depth):
+            node = np.where(x[self.feature[node]] <= self.threshold[node], self.left[node], self.right[node])
+        return node
+
+    def _tree_leaves(self, X, root):
+        """Leaf reached in one tree by every scaled row; rows drop out as they reach a leaf"""
+        node = np.full(len(X), root, dtype=np.int32)
+        active = np.arange(len(X))
+        while len(active):
+            current = node[active]
+            go_left = X[active, self.feature[current]] <= self.threshold[current]
+            current = np.where(go_left, self.left[current], self.right[current])
+            node[active] = current
+            active = active[~self.is_leaf[current]]
+        return node
+
+    def predict(self, X):
+        """Class probabilities (forest classifier) or predictions (regression models) for raw feature rows"""
+        return self.predict_scaled(self.transform(X))
+
+    def predict_scaled(self, X):
+        """Class probabilities (forest classifier) or predictions (regression models) for scaled rows"""
+        X = np.asarray(X, dtype=np.float32)
+        if len(X) == 1:
+            return self._combine(self.value[self._row_leaves(X[0])])[np.newaxis]
+        # Batches: tree by tree, accumulating in tree order exactly like sklearn
+        if self.kind == 'forest_classifier':
+            total = np.zeros((len(X), len(self.classes)))
+        else:
+            total = np.full(len(X), self.meta['init'])
+        for root in self.roots:
+            leaf_values = self.value[self._tree_leaves(X, root)]
+            if self.kind == 'forest_classifier':
+                total += self._normalize(leaf_values)
+            else:
+                total += self.meta['learning_rate'] * leaf_values
+        if self.kind == 'forest_classifier':
+            total /= self.meta['n_trees']
+        return total
+
+    @staticmethod
+    def _normalize(leaf_values):
+        """Per-tree class fractions, as DecisionTreeClassifier.predict_proba computes them"""
+        normalizer = leaf_values.sum(axis=-1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+        return leaf_values / normalizer
+
+    def _combine(self, leaf_values):
+        """One row's output from its leaf in every tree (cumsum adds in tree order, like the batch path)"""
+        if self.kind == 'forest_classifier':
+            return np.cumsum(self._normalize(leaf_values), axis=0)[-1] / self.meta['n_trees']
+        stages = np.empty(self.meta['n_trees'] + 1)
+        stages[0] = self.meta['init']
+        stages[1:] = self.meta['learning_rate'] * leaf_values
+        return np.cumsum(stages)[-1]